@@ -0,0 +1,153 @@
+import sys
+import os
+import csv
+import math
+import time
+import shutil
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src'))
+sys.path.append(SRC_DIR)
+
+from FinancialReport import FinancialReport
+from SalesRollup import SalesRollup
+
+# Purchase lines in the generated purchase data, override with FINANCIAL_REPORT_LINES
+LINES = int(os.environ.get('FINANCIAL_REPORT_LINES', 1_000_000))
+# The row by row pipeline is timed on this many lines and scaled up, it takes minutes at a million
+ROW_BY_ROW_LINES = min(LINES, 100_000)
+
+# Date range of the report: the whole of the generated year
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 12, 31)
+
+ITEMS = ['Advil', 'Amoxicillin', 'Band-Aids', 'Claritin', 'Crestor', 'Gatorade', 'Ibuprofen', 'Naproxen',
+         'Prozac', 'Snickers', 'Tylenol', 'Vitamin C', 'Water Bottle']
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+
+
+def write_purchases(purchase_file, lines):
+    """Write a purchase data CSV with lines purchase lines spread over 2024."""
+    random = np.random.default_rng(403)
+    quantity = random.integers(1, 5, lines)
+    price = np.round(random.uniform(0.5, 60, lines), 2)
+    total = np.round(quantity * price, 2)
+    pd.DataFrame({
+        'Date': pd.Timestamp(START_DATE) + pd.to_timedelta(np.sort(random.integers(0, 366, lines)), unit='D'),
+        'First Name': random.choice(['Tupac', 'Amber', 'Miguel', 'Ruben'], lines),
+        'Last Name': random.choice(['S', 'G', 'P'], lines),
+        'Item Name': random.choice(ITEMS, lines),
+        'ID': random.integers(1, 40, lines),
+        'Quantity': quantity,
+        'Price': price,
+        'Total Cost': total,
+        'Grand Total': total,
+        'Payment Method': random.choice(PAYMENT_METHODS, lines),
+        'Prescription': 'no',
+    }).to_csv(purchase_file, index=False, date_format='%Y-%m-%d', float_format='%.2f')
+
+
+def row_by_row(purchase_file):
+    """The report before the engine: let pandas guess the types, filter, then format the table with iterrows()."""
+    purchase_data = pd.read_csv(purchase_file)
+    purchase_data['Date'] = pd.to_datetime(purchase_data['Date'], errors='coerce')
+    filtered_data = purchase_data[
+        (purchase_data['Date'] >= pd.Timestamp(START_DATE)) & (purchase_data['Date'] <= pd.Timestamp(END_DATE))
+    ]
+    total_revenue = filtered_data['Total Cost'].sum()
+    rows = []
+    for _, row in filtered_data.iterrows():
+        rows.append((str(row['Date']), str(row['Item Name']), f"${row['Total Cost']:.2f}", str(row['Payment Method'])))
+    return total_revenue, rows
+
+
+def csv_loop_totals(purchase_file):
+    """The totals computed the way the old console report did, one row at a time with the csv module."""
+    total_revenue, revenue_by_item, revenue_by_payment = 0.0, {}, {}
+    with open(purchase_file, mode='r') as file:
+        for row in csv.DictReader(file):
+            total_cost = float(row['Total Cost'])
+            total_revenue += total_cost
+            revenue_by_item[row['Item Name']] = revenue_by_item.get(row['Item Name'], 0.0) + total_cost
+            revenue_by_payment[row['Payment Method']] = revenue_by_payment.get(row['Payment Method'], 0.0) + total_cost
+    return total_revenue, revenue_by_item, revenue_by_payment
+
+
+def engine(purchase_file):
+    """The report engine: typed read, grouped totals and the formatted table columns."""
+    report = FinancialReport.from_csv(purchase_file, START_DATE, END_DATE)
+    return report, report.table()
+
+
+def engine_from_rollup(rollup_file, start_date=START_DATE, end_date=END_DATE):
+    """The report engine reading the daily sales rollup instead of the purchase lines."""
+    report = FinancialReport.from_rollup(rollup_file, start_date, end_date)
+    return report, report.table()
+
+
+def same_amount(first, second):
+    """Check two amounts of money are equal to the cent, allowing for rounding in very large sums."""
+    return math.isclose(first, second, rel_tol=1e-9, abs_tol=0.01)
+
+
+def timed(function, *args):
+    """Run function once and return (result, seconds)."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        purchase_file = os.path.join(temp_dir, 'db_purchase_data.csv')
+        sample_file = os.path.join(temp_dir, 'db_purchase_data_sample.csv')
+        write_purchases(purchase_file, LINES)
+        write_purchases(sample_file, ROW_BY_ROW_LINES)
+        print(f"Purchase data: {LINES:,} lines, {os.path.getsize(purchase_file) / 1e6:.0f} MB")
+
+        print("\nTest 1: Financial report of a year of purchases")
+        (report, table), engine_seconds = timed(engine, purchase_file)
+        (_, rows), sample_seconds = timed(row_by_row, sample_file)
+        row_by_row_seconds = sample_seconds * LINES / ROW_BY_ROW_LINES
+        (total_revenue, revenue_by_item, revenue_by_payment), loop_seconds = timed(csv_loop_totals, purchase_file)
+        print(f"Report engine (totals, breakdowns and table): {engine_seconds:.2f} s")
+        print(f"Row by row with iterrows(): {row_by_row_seconds:.1f} s "
+              f"(timed on {ROW_BY_ROW_LINES:,} lines and scaled up)")
+        print(f"Totals only with a csv loop: {loop_seconds:.2f} s")
+        print(f"The engine is {row_by_row_seconds / engine_seconds:.0f}x faster than the row by row report.")
+
+        rollup = SalesRollup.for_file(purchase_file=purchase_file)
+        rollup_rows, rebuild_seconds = timed(rollup.rebuild)
+        (rollup_report, rollup_table), rollup_seconds = timed(engine_from_rollup, rollup.rollup_file)
+        (_, month_table), month_seconds = timed(engine_from_rollup, rollup.rollup_file, date(2024, 3, 1), date(2024, 3, 31))
+        print(f"Rebuilding the daily sales rollup ({rollup_rows:,} rows, done once): {rebuild_seconds:.2f} s")
+        print(f"Report engine reading the rollup: {rollup_seconds * 1000:.0f} ms for the year, "
+              f"{month_seconds * 1000:.0f} ms for one month ({len(month_table['Date']):,} rows)")
+
+        print("\nTest 2: The engine gives the same numbers and table")
+        # Sums over a million floats depend a little on the order they are added in
+        assert same_amount(report.total_revenue, total_revenue), "Total revenue differs"
+        for item, revenue in revenue_by_item.items():
+            assert same_amount(report.revenue_by_item[item], revenue), f"Revenue of {item} differs"
+        for method, revenue in revenue_by_payment.items():
+            assert same_amount(report.revenue_by_payment[method], revenue), f"Revenue paid by {method} differs"
+        assert len(report.daily) == report.purchases['Date'].nunique()
+        assert same_amount(report.daily['Revenue'].sum(), report.total_revenue)
+
+        assert same_amount(rollup_report.total_revenue, total_revenue), "Total revenue from the rollup differs"
+        assert rollup_table == table, "The daily sales read from the rollup differ"
+        assert len(rows) == ROW_BY_ROW_LINES
+        print(f"Total revenue ${report.total_revenue:,.2f} over {len(report.daily)} days, "
+              f"{len(table['Date']):,} daily sales rows, all matching.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
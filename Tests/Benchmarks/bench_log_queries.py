@@ -0,0 +1,98 @@
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src'))
+sys.path.append(SRC_DIR)
+
+import TransactionLog
+
+# Size of the generated log: days of history and events logged on each day
+DAYS = 180
+EVENTS_PER_DAY = 1000
+FIRST_DAY = date(2024, 1, 1)
+
+# How many times each query is repeated, the best run is reported
+REPEATS = 5
+
+
+def best_time(function, repeats=REPEATS):
+    """Run function repeats times and return the fastest run in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def write_segments(segment_dir):
+    """Write DAYS day segments with EVENTS_PER_DAY events spread over each day."""
+    os.makedirs(segment_dir)
+    for day_number in range(DAYS):
+        day = FIRST_DAY + timedelta(days=day_number)
+        start = datetime.combine(day, datetime.min.time())
+        with open(os.path.join(segment_dir, day.isoformat() + '.log'), mode='w') as file:
+            for event in range(EVENTS_PER_DAY):
+                logged = start + timedelta(seconds=event * 86400 // EVENTS_PER_DAY)
+                file.write(json.dumps({
+                    'time': logged.isoformat(timespec='milliseconds'), 'user': 'bennett', 'action': 'purchase',
+                    'message': 'Purchase by user: bennett', 'item_ids': [str(event)]
+                }) + '\n')
+
+
+def scan_everything(segment_dir, start_time, end_time):
+    """What a report did before the log was indexed: read every line of the log and filter it."""
+    records = []
+    for name in sorted(os.listdir(segment_dir)):
+        if name.endswith('.log'):
+            with open(os.path.join(segment_dir, name), mode='r') as file:
+                for line in file.readlines():
+                    record = TransactionLog.parse_line(line)
+                    if record and start_time <= record['time'] <= end_time:
+                        records.append(record)
+    return records
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        segment_dir = os.path.join(temp_dir, 'transactions')
+        write_segments(segment_dir)
+        size_mb = sum(os.path.getsize(os.path.join(segment_dir, name)) for name in os.listdir(segment_dir)) / 1e6
+        print(f"Log of {DAYS} days, {DAYS * EVENTS_PER_DAY} events, {size_mb:.1f} MB")
+
+        print("\nTest 1: Building the index (done once, afterwards only new lines are indexed)")
+        start = time.perf_counter()
+        TransactionLog.read_records(segment_dir=segment_dir)
+        print(f"Reading the whole log while indexing it: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        windows = [
+            ('one hour', datetime(2024, 3, 1, 14), datetime(2024, 3, 1, 14, 59, 59)),
+            ('one day', date(2024, 3, 1), date(2024, 3, 1)),
+            ('one week', date(2024, 3, 1), date(2024, 3, 7)),
+            ('one month', date(2024, 3, 1), date(2024, 3, 31)),
+        ]
+        print("\nTest 2: Reading a date range")
+        print(f"{'window':>10} {'events':>8} {'indexed ms':>11} {'full scan ms':>13}")
+        for name, window_start, window_end in windows:
+            records = TransactionLog.read_records(window_start, window_end, segment_dir=segment_dir)
+            indexed = best_time(lambda: TransactionLog.read_records(window_start, window_end, segment_dir=segment_dir))
+            start_time = TransactionLog._range_bound(window_start, datetime.min.time(), '')
+            end_time = TransactionLog._range_bound(window_end, datetime.max.time(), '')
+            expected = scan_everything(segment_dir, start_time, end_time)
+            scanned = best_time(lambda: scan_everything(segment_dir, start_time, end_time), repeats=1)
+            print(f"{name:>10} {len(records):>8} {indexed:>11.1f} {scanned:>13.1f}")
+            assert records == expected, f"The indexed read of {name} does not match a full scan"
+        print("\nThe indexed reads return the same events as reading the whole log.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
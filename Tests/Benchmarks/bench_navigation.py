@@ -0,0 +1,99 @@
+import sys
+import os
+import gc
+import time
+import tracemalloc
+
+# Render without a display so the benchmark can run on a build machine
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# Add the project root and the src directory to the system path, the screens open the database files relative to src
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.append(ROOT_DIR)
+sys.path.append(SRC_DIR)
+os.chdir(SRC_DIR)
+
+from PyQt5.QtWidgets import QApplication, QStackedWidget
+from PyQt5.QtCore import QEvent, QTimer
+from ScreenRouter import ScreenRouter
+from LoginRoles import LoginRoles
+from Session import Session
+
+# Number of walks through every screen, and how often the user logs out and back in
+WALKS = 1000
+LOGOUT_EVERY = 100
+USERNAME = 'bennett'
+
+# Screens visited on every walk, each one is followed by a return to the dashboard
+WALK = ['purchases', 'reports', 'inventory', 'fill_prescription', 'patients', 'prescriptions', 'admin']
+
+
+def snapshot(app, widget):
+    """Count what navigation could leak: screens in the stack, live widgets, timers and Python memory."""
+    # Let Qt delete the screens closed by deleteLater()
+    app.processEvents()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    gc.collect()
+    timers = len(widget.findChildren(QTimer))
+    return {
+        'screens': widget.count(),
+        'widgets': len(QApplication.allWidgets()),
+        'timers': timers,
+        'memory_kb': tracemalloc.get_traced_memory()[0] // 1024,
+    }
+
+
+def walk(app, router):
+    """Go through every screen and back to the dashboard once."""
+    for name in WALK:
+        router.show(name)
+        router.show('dashboard')
+        app.processEvents()
+
+
+def run_tests():
+    app = QApplication.instance() or QApplication(sys.argv)
+    widget = QStackedWidget()
+    router = ScreenRouter.for_widget(widget)
+    router.show('login')
+    session = Session.for_account(LoginRoles().get_user_data(USERNAME))
+
+    tracemalloc.start()
+    print(f"\nTest 1: {WALKS} walks through every screen, logging out every {LOGOUT_EVERY} walks")
+
+    # Warm up once so every screen and module has been created before measuring
+    router.start_session(session)
+    walk(app, router)
+    baseline = snapshot(app, widget)
+    print(f"After the first walk: {baseline}")
+
+    start = time.perf_counter()
+    for number in range(1, WALKS + 1):
+        walk(app, router)
+        if number % LOGOUT_EVERY == 0:
+            router.end_session()
+            router.start_session(session)
+            walk(app, router)  # Recreate the session screens so the counts compare like for like
+            current = snapshot(app, widget)
+            print(f"After {number} walks: {current}")
+
+            assert current['screens'] == baseline['screens'], "Screens are piling up in the stacked widget"
+            assert current['widgets'] <= baseline['widgets'], "Widgets of closed screens are still alive"
+            assert current['timers'] <= baseline['timers'], "Timers of closed screens are still alive"
+    elapsed = time.perf_counter() - start
+
+    final = snapshot(app, widget)
+    tracemalloc.stop()
+    transitions = WALKS * len(WALK) * 2
+    print(f"{transitions} screen changes in {elapsed:.2f}s ({elapsed / transitions * 1000:.3f} ms each)")
+
+    # Allow some slack for caches that grow once (interned strings, Qt style data) but not per walk
+    growth = final['memory_kb'] - baseline['memory_kb']
+    print(f"Python memory grew by {growth} KB over {WALKS} walks")
+    assert growth < 1024, "Memory keeps growing while navigating"
+    print("Navigation does not leak screens, widgets, timers or memory.")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,100 @@
+import sys
+import os
+import csv
+import time
+import shutil
+import tempfile
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src'))
+sys.path.append(SRC_DIR)
+
+# Keep the fingerprint key of the benchmark out of the home folder
+os.environ.setdefault('PHARMACY_FINGERPRINT_KEY', 'benchmark fingerprint key')
+
+import PasswordHasher
+from LoginRoles import LoginRoles
+from UserDirectory import UserDirectory
+
+# A login (checking the password against its hash) must finish within this many milliseconds
+# on the machine running the benchmark. Override with LOGIN_BUDGET_MS.
+LOGIN_BUDGET_MS = float(os.environ.get('LOGIN_BUDGET_MS', 250))
+
+# Work factors to measure, and how many times each measurement is repeated (the best run is reported)
+COSTS = range(10, 17)
+REPEATS = 3
+
+# Accounts in the database used to time the password uniqueness check
+ACCOUNTS = 200
+
+
+def best_time(function, repeats=REPEATS):
+    """Run function repeats times and return the fastest run in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def setup_accounts(roles_file, count):
+    """Write an accounts database with count hashed accounts, all with different passwords."""
+    directory = UserDirectory.for_file(roles_file)
+    salt = PasswordHasher.load_salt(directory.salt_file)
+    key = PasswordHasher.load_key()
+    # The lowest cost keeps the setup quick, the lookup doesn't depend on it
+    with open(roles_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(UserDirectory.FIELDNAMES)
+        for number in range(count):
+            password = f'password{number}'
+            writer.writerow([f'user{number}', f'user{number}@example.com', PasswordHasher.hash_password(password, cost=1),
+                             'technician', '0', 'unlocked', PasswordHasher.fingerprint(password, salt, key)])
+
+
+def run_tests():
+    print("\nTest 1: Time to hash and check a password for each work factor")
+    print(f"{'cost':>4} {'hash ms':>9} {'verify ms':>10}")
+    within_budget = []
+    for cost in COSTS:
+        stored = PasswordHasher.hash_password('correct horse', cost=cost)
+        hash_ms = best_time(lambda: PasswordHasher.hash_password('correct horse', cost=cost))
+        # A wrong password is never cached, so this times the full scrypt check
+        verify_ms = best_time(lambda: PasswordHasher.verify_password('wrong horse', stored))
+        print(f"{cost:>4} {hash_ms:>9.1f} {verify_ms:>10.1f}")
+        if verify_ms <= LOGIN_BUDGET_MS:
+            within_budget.append(cost)
+    recommended = max(within_budget) if within_budget else None
+    print(f"Highest work factor within the {LOGIN_BUDGET_MS:.0f} ms login budget: {recommended}")
+    print(f"Configured work factor: {PasswordHasher.DEFAULT_COST} (set PHARMACY_PASSWORD_COST to change it)")
+
+    print("\nTest 2: A login stays within budget at the configured work factor")
+    stored = PasswordHasher.hash_password('correct horse')
+    login_ms = best_time(lambda: PasswordHasher.verify_password('wrong horse', stored))
+    print(f"Checking a password: {login_ms:.1f} ms (budget {LOGIN_BUDGET_MS:.0f} ms)")
+    assert login_ms <= LOGIN_BUDGET_MS, "The configured work factor is too slow for this machine"
+
+    PasswordHasher.verify_password('correct horse', stored)
+    cached_ms = best_time(lambda: PasswordHasher.verify_password('correct horse', stored), repeats=100)
+    print(f"Checking it again after a successful login: {cached_ms:.3f} ms")
+
+    print(f"\nTest 3: Password uniqueness check with {ACCOUNTS} hashed accounts")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        roles_file = os.path.join(temp_dir, 'db_user_account.csv')
+        setup_accounts(roles_file, ACCOUNTS)
+        login_roles = LoginRoles(roles_file=roles_file)
+        lookup_ms = best_time(lambda: login_roles.password_exists('a brand new password'))
+        # Checking the password against every account's own salt would cost one scrypt per account
+        print(f"Fingerprint lookup: {lookup_ms:.1f} ms, "
+              f"checking every hash would take about {login_ms * ACCOUNTS / 1000:.1f} s")
+        assert login_roles.password_exists(f'password{ACCOUNTS // 2}'), "A used password was not found"
+        assert not login_roles.password_exists('a brand new password'), "An unused password was found"
+        print("The lookup finds used passwords.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
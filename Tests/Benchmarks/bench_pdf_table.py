@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import tracemalloc
+
+from fpdf import FPDF
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src'))
+sys.path.append(SRC_DIR)
+
+from PDFTable import PDFTable
+
+# Rows drawn in each measurement, override with PDF_TABLE_ROWS
+ROWS = int(os.environ.get('PDF_TABLE_ROWS', 20_000))
+
+HEADERS = ['Date', 'Item Name', 'Total Cost', 'Payment Method']
+LONG_MESSAGE = ("Prescription filled: Prescription Number: RX-2024-000123, Medication: Amoxicillin 500mg capsules, "
+                "Quantity: 30, Pharmacist: bennett")
+
+
+def purchase_rows(count):
+    """Rows like the financial report's, made as they are drawn."""
+    methods = ['Cash', 'Credit Card', 'Debit Card']
+    for number in range(count):
+        yield (f"2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}", f"Item {number % 50}",
+               f"${number % 9000 / 100:.2f}", methods[number % 3])
+
+
+def new_pdf():
+    pdf = FPDF()
+    pdf.set_compression(False)  # Keep the page text readable so the headers can be counted
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", style='B', size=14)
+    pdf.cell(200, 10, txt="Financial Report", ln=True, align='C')
+    return pdf
+
+
+def cell_by_cell(pdf, rows):
+    """How the reports drew their tables before: fixed widths, one cell per value, FPDF breaking the pages."""
+    col_widths = [40, 50, 40, 60]
+    pdf.set_font("Arial", style='B', size=10)
+    for header, width in zip(HEADERS, col_widths):
+        pdf.cell(width, 10, header, border=1, align='C')
+    pdf.ln()
+    pdf.set_font("Arial", size=10)
+    for row in rows:
+        for width, value in zip(col_widths, row):
+            pdf.cell(width, 10, value, border=1, align='C')
+        pdf.ln()
+
+
+def timed_render(draw):
+    """Draw the rows, return (pdf, seconds)."""
+    pdf = new_pdf()
+    start = time.perf_counter()
+    draw(pdf)
+    return pdf, time.perf_counter() - start
+
+
+def peak_memory(draw):
+    """Peak MB of Python memory while drawing the rows (measured on its own, tracing slows drawing down a lot)."""
+    tracemalloc.start()
+    draw(new_pdf())
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def run_tests():
+    print(f"\nTest 1: Drawing {ROWS:,} rows")
+    draw_table = lambda pdf: PDFTable(pdf, HEADERS).render(purchase_rows(ROWS))
+    draw_cells = lambda pdf: cell_by_cell(pdf, list(purchase_rows(ROWS)))  # The reports built every row first
+    pdf, seconds = timed_render(draw_table)
+    print(f"PDFTable: {ROWS / seconds:,.0f} rows/s ({seconds:.2f} s, {pdf.page} pages, peak {peak_memory(draw_table):.0f} MB)")
+    table_pages = pdf.page
+    old_pdf, old_seconds = timed_render(draw_cells)
+    print(f"Cell by cell: {ROWS / old_seconds:,.0f} rows/s ({old_seconds:.2f} s, {old_pdf.page} pages, "
+          f"peak {peak_memory(draw_cells):.0f} MB)")
+    # Most of the memory is the PDF itself, FPDF keeps every page until the file is written
+    page_bytes = sum(len(page) for page in pdf.pages.values()) / 1e6
+    print(f"Page content kept by FPDF: {page_bytes:.0f} MB")
+
+    print("\nTest 2: The headers are on every page")
+    header_count = sum(page.count('(Payment Method) Tj') for page in pdf.pages.values())
+    print(f"Headers drawn {header_count} times on {table_pages} pages")
+    assert header_count == table_pages, "A page is missing its headers"
+    old_header_count = sum(page.count('(Payment Method) Tj') for page in old_pdf.pages.values())
+    print(f"Cell by cell drew them {old_header_count} time(s) on {old_pdf.page} pages")
+
+    print("\nTest 3: Long text is wrapped inside its column and the columns fill the page")
+    pdf = new_pdf()
+    table = PDFTable(pdf, ['Date', 'Log Message'], align=['C', 'L'])
+    table.render([('11-26-2024 10:17:19 PM', LONG_MESSAGE)] * 50)
+    page_width = pdf.w - pdf.l_margin - pdf.r_margin
+    print(f"Column widths: {[round(width, 1) for width in table.widths]} mm of {page_width:.1f} mm")
+    assert abs(sum(table.widths) - page_width) < 0.01, "The columns don't fill the page"
+    lines = table._wrap(LONG_MESSAGE, table.widths[1])
+    print(f"The message is drawn on {len(lines)} lines: {lines}")
+    assert len(lines) > 1 and ' '.join(lines) == LONG_MESSAGE, "The message was not wrapped word by word"
+    pdf.set_font("Arial", size=10)
+    assert all(pdf.get_string_width(line) <= table.widths[1] - 2 * PDFTable.PADDING for line in lines), "A line is too wide"
+    print("Every line fits in its column.")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,121 @@
+import sys
+import os
+import csv
+import time
+import shutil
+import tempfile
+from datetime import date, timedelta
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src'))
+sys.path.append(SRC_DIR)
+
+from AtomicFile import WriteBatch
+from SalesRollup import SalesRollup, _number, _totals
+from Storage import TABLES, open_table
+
+# Rows in the rollup before the sales are timed: a few days, a few months and a few years of history
+ROLLUP_SIZES = [1_000, 10_000, 50_000]
+# Sales timed at each size, override with SALES_ROLLUP_SALES
+SALES = int(os.environ.get('SALES_ROLLUP_SALES', 1000))
+# The old way reads and rewrites the whole rollup, it is timed on fewer sales
+ROW_BY_ROW_SALES = 20
+
+ITEMS = ['Advil', 'Amoxicillin', 'Band-Aids', 'Claritin', 'Crestor', 'Gatorade', 'Ibuprofen', 'Naproxen',
+         'Prozac', 'Snickers', 'Tylenol', 'Vitamin C', 'Water Bottle']
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+TODAY = '2026-10-18'
+
+
+def write_rollup(db_dir, rows):
+    """Write an empty purchase file and a rollup with rows rows of past days."""
+    with open(os.path.join(db_dir, TABLES['purchases']['file']), mode='w', newline='') as file:
+        csv.writer(file).writerow(TABLES['purchases']['fields'])
+    keys = [(item, method) for item in ITEMS for method in PAYMENT_METHODS]
+    with open(os.path.join(db_dir, TABLES['sales_daily']['file']), mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SalesRollup.FIELDNAMES)
+        writer.writeheader()
+        for number in range(rows):
+            item, method = keys[number % len(keys)]
+            day = date(2026, 10, 17) - timedelta(days=number // len(keys))
+            writer.writerow(dict(
+                {'Date': day.isoformat(), 'Item Name': item, 'Payment Method': method}, **_totals(3, 29.97, 2)
+            ))
+
+
+def sale_lines(number):
+    """The (item name, quantity, total cost) lines of one sale."""
+    return [(ITEMS[(number + line) % len(ITEMS)], str(1 + line), f"{(1 + line) * 4.99:.2f}") for line in range(3)]
+
+
+def row_by_row_sale(table, day, payment_method, lines):
+    """How a sale updated the rollup before it was kept in memory: find and rewrite each row in the table."""
+    with WriteBatch(), table.lock.exclusive():
+        for item_name, quantity, total_cost in lines:
+            key = {'Date': day, 'Item Name': item_name, 'Payment Method': payment_method}
+            row = table.find_one(**key)
+            if row is None:
+                table.append(dict(key, **_totals(_number(quantity), _number(total_cost), 1)))
+            else:
+                table.update(key, _totals(
+                    _number(row['Units']) + _number(quantity), _number(row['Revenue']) + _number(total_cost),
+                    int(row['Transactions']) + 1
+                ))
+
+
+def time_sales(sell, sales):
+    """Make sales sales with sell(number) and return the average time of one in milliseconds."""
+    start = time.perf_counter()
+    for number in range(sales):
+        sell(number)
+    return (time.perf_counter() - start) / sales * 1000
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"\nTest 1: Cost of adding a sale to rollups of {', '.join(f'{size:,}' for size in ROLLUP_SIZES)} rows")
+        results = []
+        for size in ROLLUP_SIZES:
+            db_dir = os.path.join(temp_dir, str(size))
+            os.makedirs(db_dir)
+            write_rollup(db_dir, size)
+            rollup = SalesRollup.for_file(purchase_file=os.path.join(db_dir, TABLES['purchases']['file']))
+            rollup.refresh()  # Read once when the first sale of the day is made
+
+            def sell(number):
+                with WriteBatch():
+                    rollup.record_sale(TODAY, PAYMENT_METHODS[number % len(PAYMENT_METHODS)], sale_lines(number))
+
+            in_memory = time_sales(sell, SALES)
+            rollup.checkpoint()  # The old way writes the CSV file directly, fold the journal into it first
+            table = open_table('sales_daily', rollup.rollup_file)
+            row_by_row = time_sales(
+                lambda number: row_by_row_sale(table, TODAY, PAYMENT_METHODS[number % 3], sale_lines(number)),
+                ROW_BY_ROW_SALES
+            )
+            results.append((size, in_memory, row_by_row))
+            print(f"{size:>7,} rows: {in_memory:.2f} ms per sale in memory with the journal "
+                  f"(journal compacted as it reaches the size of the rollup), {row_by_row:.1f} ms finding and rewriting each row")
+
+        print("\nTest 2: The cost per sale stays flat as the rollup grows")
+        smallest, largest = results[0][1], results[-1][1]
+        growth = ROLLUP_SIZES[-1] / ROLLUP_SIZES[0]
+        print(f"{growth:.0f}x more rows made a sale {largest / smallest:.1f}x slower in memory "
+              f"and {results[-1][2] / results[0][2]:.1f}x slower finding and rewriting each row.")
+        assert largest < smallest * 3, "The cost of a sale grows with the size of the rollup"
+
+        print("\nTest 3: The rollup written to disk has every sale")
+        rollup.ensure_built()
+        rows = open_table('sales_daily', rollup.rollup_file).read_all()
+        sold = sum(int(row['Transactions']) for row in rows if row['Date'] == TODAY)
+        expected = (SALES + ROW_BY_ROW_SALES) * len({item for item, _, _ in sale_lines(0)})
+        assert len(rows) == ROLLUP_SIZES[-1] + len(ITEMS) * len(PAYMENT_METHODS), f"{len(rows)} rollup rows"
+        assert sold == expected, f"{sold} purchases of today's items, expected {expected}"
+        print(f"{len(rows):,} rows with {sold:,} purchases of today's items.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
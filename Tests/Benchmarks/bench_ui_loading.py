@@ -0,0 +1,134 @@
+import sys
+import os
+import time
+import subprocess
+
+# Render without a display so the benchmark can run on a build machine
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# Add the project root and the src directory to the system path, the screens open the database files relative to src
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.append(ROOT_DIR)
+sys.path.append(SRC_DIR)
+os.chdir(SRC_DIR)
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QWidget
+from PyQt5.QtCore import QEvent
+import UILoader
+from ScreenRouter import ScreenRouter
+from LoginRoles import LoginRoles
+from Session import Session
+
+# How many times each measurement is repeated, the best run is reported
+REPEATS = 20
+STARTUP_REPEATS = 5
+USERNAME = 'bennett'
+
+# Starts the application up to the login screen in a fresh interpreter and prints how long it took
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import sys
+sys.path.append({root!r})
+sys.path.append({src!r})
+from PyQt5.QtWidgets import QApplication, QStackedWidget
+from ScreenRouter import ScreenRouter
+from LoginRoles import LoginRoles
+from Session import Session
+app = QApplication(sys.argv)
+ScreenRouter.for_widget(QStackedWidget()).show('login')
+print(time.perf_counter() - start)
+"""
+
+
+def best_time(function, repeats=REPEATS):
+    """Run function repeats times and return the fastest run in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def use_compiled(compiled):
+    """Switch the loader between the compiled classes and parsing the .ui files."""
+    UILoader.USE_COMPILED = compiled
+    UILoader._classes.clear()
+
+
+def load_every_file():
+    for ui_file in sorted(os.listdir(UILoader.UI_DIR)):
+        if ui_file.endswith('.ui'):
+            window = QMainWindow()
+            UILoader.load_ui(ui_file, window)
+            window.deleteLater()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def visit_every_screen():
+    """First visit of every screen with a fresh router, what a user pays the first time they open each page."""
+    widget = QStackedWidget()
+    router = ScreenRouter.for_widget(widget)
+    router.show('login')
+    router.start_session(Session.for_account(LoginRoles().get_user_data(USERNAME)))
+    for name in ScreenRouter.SCREENS:
+        if name != 'login':
+            router.show(name)
+    router.end_session()
+    widget.deleteLater()
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def startup_time(compiled):
+    """Seconds from starting the interpreter to the login screen being built."""
+    env = dict(os.environ, PHARMACY_COMPILED_UI='1' if compiled else '0')
+    times = []
+    for _ in range(STARTUP_REPEATS):
+        result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT.format(root=ROOT_DIR, src=SRC_DIR)],
+                                env=env, cwd=SRC_DIR, capture_output=True, text=True, check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times) * 1000
+
+
+def run_tests():
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Make sure the compiled classes exist and match the .ui files
+    UILoader.build()
+    # load_ui() registers the icons before the first screen is built, do it now so both paths decode them
+    UILoader.load_resources()
+
+    print("\nTest 1: Build every .ui file onto a window")
+    use_compiled(False)
+    parsed = best_time(load_every_file)
+    use_compiled(True)
+    compiled = best_time(load_every_file)
+    print(f"loadUi: {parsed:.1f} ms, compiled: {compiled:.1f} ms ({parsed / compiled:.1f}x faster)")
+
+    print("\nTest 2: First visit of every screen after logging in")
+    use_compiled(False)
+    parsed = best_time(visit_every_screen, repeats=5)
+    use_compiled(True)
+    compiled = best_time(visit_every_screen, repeats=5)
+    print(f"loadUi: {parsed:.1f} ms, compiled: {compiled:.1f} ms ({parsed / compiled:.1f}x faster)")
+
+    print("\nTest 3: Start the application up to the login screen")
+    parsed = startup_time(False)
+    compiled = startup_time(True)
+    print(f"loadUi: {parsed:.1f} ms, compiled: {compiled:.1f} ms ({parsed / compiled:.1f}x faster)")
+
+    # Both paths have to build the same screens, check one of them widget for widget
+    use_compiled(False)
+    parsed_window = UILoader.load_ui('Dashboard.ui', QMainWindow())
+    use_compiled(True)
+    compiled_window = UILoader.load_ui('Dashboard.ui', QMainWindow())
+    parsed_names = sorted(child.objectName() for child in parsed_window.findChildren(QWidget) if child.objectName())
+    compiled_names = sorted(child.objectName() for child in compiled_window.findChildren(QWidget) if child.objectName())
+    assert parsed_names == compiled_names, "The compiled Dashboard does not have the same widgets"
+    print("\nThe compiled and parsed screens have the same widgets.")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,150 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# The test looks at the CSV files themselves
+os.environ['PHARMACY_STORAGE'] = 'csv'
+
+import AtomicFile
+from AtomicFile import WriteBatch, atomic_write
+from Inventory import Inventory
+from InventoryStore import InventoryStore
+from Storage import TABLES, open_table
+
+
+def write_file(path, text):
+    with open(path, mode='w', newline='') as file:
+        file.write(text)
+
+
+def read_file(path):
+    with open(path, mode='r', newline='') as file:
+        return file.read()
+
+
+def setup_databases(temp_dir):
+    """A purchases table with one line and an inventory with one lot."""
+    purchase_file = os.path.join(temp_dir, TABLES['purchases']['file'])
+    with open(purchase_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=TABLES['purchases']['fields'])
+        writer.writeheader()
+        writer.writerow({'Date': '2024-11-01', 'First Name': 'Amber', 'Item Name': 'Advil', 'ID': '1', 'Quantity': '1'})
+    inventory_file = os.path.join(temp_dir, TABLES['inventory']['file'])
+    with open(inventory_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=InventoryStore.FIELDNAMES)
+        writer.writeheader()
+        writer.writerow({'Item': 'Advil', 'ID': '1', 'Quantity': '10', 'Price': '8.99', 'Expiration Date': '2030-01-01',
+                         'Date Added': '2024-01-01', 'Date Updated': '', 'Date Removed': ''})
+    return purchase_file, inventory_file
+
+
+def sale(item_id, quantity):
+    return {'Date': '2024-11-02', 'First Name': 'Bob', 'Item Name': 'Advil', 'ID': item_id, 'Quantity': quantity}
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print("\nTest 1: A write that fails half way leaves the original file as it was")
+        path = os.path.join(temp_dir, 'data.csv')
+        write_file(path, 'a,b\n1,2\n')
+
+        def fail_half_way(file):
+            file.write('a,b\n3,')
+            raise OSError("Disk full")
+
+        try:
+            atomic_write(path, fail_half_way)
+            assert False, "The error was swallowed"
+        except OSError:
+            pass
+        assert read_file(path) == 'a,b\n1,2\n', "The file was changed by the failed write"
+        assert os.listdir(temp_dir) == ['data.csv'], f"Temporary files were left behind: {os.listdir(temp_dir)}"
+        atomic_write(path, lambda file: file.write('a,b\n3,4\n'))
+        assert read_file(path) == 'a,b\n3,4\n'
+        print("The failed write changed nothing, the next one replaced the file.")
+
+        print("\nTest 2: A WriteBatch writes each file once, when it ends")
+        purchase_file, inventory_file = setup_databases(temp_dir)
+        purchases = open_table('purchases', purchase_file)
+        before = read_file(purchase_file)
+        writes = []
+        original_write = AtomicFile.atomic_write_csv
+        AtomicFile.atomic_write_csv = lambda path, *args: (writes.append(path), original_write(path, *args))
+        try:
+            with WriteBatch():
+                purchases.append(sale('1', '2'))
+                purchases.update({'First Name': 'Amber'}, {'Quantity': '3'})
+                purchases.append(sale('1', '4'))
+                assert read_file(purchase_file) == before, "A write was made before the batch ended"
+                assert [row['Quantity'] for row in purchases.read_all()] == ['3', '2', '4'], "Reads missed the staged rows"
+        finally:
+            AtomicFile.atomic_write_csv = original_write
+        assert writes == [os.path.abspath(purchase_file)], f"Expected one write, got {len(writes)}"
+        assert [row['Quantity'] for row in purchases.read_all()] == ['3', '2', '4']
+        print("Three changes were written in one write.")
+
+        print("\nTest 3: An error inside a WriteBatch writes nothing and releases the locks")
+        purchases_before = read_file(purchase_file)
+        inventory_before = read_file(inventory_file)
+        inventory = Inventory(inventory_file=inventory_file)
+        try:
+            with WriteBatch():
+                purchases.append(sale('1', '5'))
+                assert inventory.sell_item('1', 5)
+                assert inventory.get_item('1')['Quantity'] == '5', "The batch doesn't see its own change"
+                with WriteBatch():  # Joins the outer batch, nothing is written when it ends
+                    purchases.append(sale('1', '6'))
+                assert read_file(purchase_file) == purchases_before, "The inner batch wrote its change"
+                raise RuntimeError("Card declined")
+        except RuntimeError:
+            pass
+        assert read_file(purchase_file) == purchases_before, "The purchases were written"
+        assert read_file(inventory_file) == inventory_before and not os.path.exists(inventory_file + '.journal'), \
+            "The inventory was written"
+        assert inventory.get_item('1')['Quantity'] == '10', "The inventory in memory kept the abandoned change"
+        assert purchases.lock.mode is None and inventory.store.lock.mode is None, "A lock is still held"
+        print("Nothing was written and the inventory in memory went back to the file.")
+
+        print("\nTest 4: A write that fails when the batch ends discards the changes that were not written yet")
+        discarded = []
+
+        def fail():
+            raise OSError("Disk full")
+
+        try:
+            with WriteBatch() as batch:
+                batch.defer('failing', fail, lambda: discarded.append('failing'))
+                purchases.append(sale('1', '7'))
+                assert inventory.sell_item('1', 4)
+        except OSError:
+            pass
+        assert discarded == ['failing'], f"The failed owner was not discarded: {discarded}"
+        assert read_file(purchase_file) == purchases_before, "The purchases were written"
+        assert inventory.get_item('1')['Quantity'] == '10', "The inventory in memory kept the change that was not written"
+        assert purchases.lock.mode is None and inventory.store.lock.mode is None, "A lock is still held"
+        print("The inventory that was not flushed went back to the file.")
+
+        print("\nTest 5: A failed write outside a batch doesn't leave the change in memory")
+        write = inventory.store._write
+        inventory.store._write = lambda rows: fail()
+        try:
+            inventory.sell_item('1', 4)
+            assert False, "The error was swallowed"
+        except OSError:
+            pass
+        finally:
+            inventory.store._write = write
+        assert inventory.get_item('1')['Quantity'] == '10', "The inventory in memory kept the change that was not written"
+        print("The inventory in memory went back to the file.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,116 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from datetime import date
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(SRC_DIR)
+
+import ColumnarArchive
+from FinancialReport import FinancialReport
+from Storage import TABLES
+
+ITEMS = [('Advil', '8.99'), ('Gatorade', '1.89'), ('Tylenol', '9.49')]
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+
+
+def write_purchases(purchase_file):
+    """Purchases on every day from September to November 2024, plus a line with an unreadable date."""
+    with open(purchase_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(TABLES['purchases']['fields'])
+        for number in range(91):
+            day = date.fromordinal(date(2024, 9, 1).toordinal() + number)
+            item, price = ITEMS[number % len(ITEMS)]
+            quantity = 1 + number % 4
+            total = f"{quantity * float(price):.2f}"
+            writer.writerow([day.isoformat(), 'Amber', str(number), item, '1', quantity, price, total, total,
+                             PAYMENT_METHODS[number % len(PAYMENT_METHODS)], 'no'])
+        writer.writerow(['not a date', 'Amber', 'X', 'Advil', '1', '1', '8.99', '8.99', '8.99', 'Cash', 'no'])
+
+
+def run_tests():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print(ColumnarArchive.MISSING_PYARROW)
+        sys.exit(1)
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_dir = os.path.join(temp_dir, 'DBFiles')
+        archive_dir = os.path.join(temp_dir, 'archive')
+        os.makedirs(db_dir)
+        purchase_file = os.path.join(db_dir, TABLES['purchases']['file'])
+        write_purchases(purchase_file)
+        shutil.copy(os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_inventory.csv'), db_dir)
+        shutil.copy(os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_prescriptions.csv'), db_dir)
+
+        print("\nTest 1: Tables are archived one file per month with fixed types")
+        ColumnarArchive.export_all(db_dir, archive_dir)
+        purchase_months = sorted(os.listdir(os.path.join(archive_dir, 'purchases')))
+        print(f"Purchase files: {purchase_months}")
+        assert purchase_months == ['2024-09.parquet', '2024-10.parquet', '2024-11.parquet', 'undated.parquet']
+        purchases = ColumnarArchive.read_table('purchases', archive_dir=archive_dir)
+        assert len(purchases) == 92, "Rows were lost"
+        assert str(purchases['Date'].dtype).startswith('datetime64'), "The dates were not stored as dates"
+        assert purchases['Total Cost'].dtype == 'float64' and purchases['Item Name'].dtype == 'category'
+        for name in ('inventory', 'prescriptions'):
+            with open(os.path.join(db_dir, TABLES[name]['file']), mode='r') as file:
+                expected = sum(1 for _ in csv.DictReader(file))
+            assert len(ColumnarArchive.read_table(name, archive_dir=archive_dir)) == expected, f"Rows of {name} were lost"
+        print("Every row is archived, dates and numbers come back with their types.")
+
+        print("\nTest 2: A date range only opens its months and reads only the requested columns")
+        files = ColumnarArchive.partition_files('purchases', date(2024, 10, 10), date(2024, 10, 20), archive_dir)
+        assert [os.path.basename(path) for path in files] == ['2024-10.parquet']
+        october = ColumnarArchive.read_table(
+            'purchases', date(2024, 10, 10), date(2024, 10, 20), columns=['Item Name', 'Total Cost'], archive_dir=archive_dir
+        )
+        assert len(october) == 11, "The rows outside the date range were not filtered out"
+        assert set(october.columns) == {'Date', 'Item Name', 'Total Cost'}, f"Read columns {list(october.columns)}"
+        print(f"{len(october)} rows from one file, columns {list(october.columns)}.")
+
+        print("\nTest 3: The financial report reads the archive and gives the same report as the CSV")
+        from_archive = FinancialReport.from_archive(date(2024, 9, 15), date(2024, 11, 15), archive_dir)
+        from_csv = FinancialReport.from_csv(purchase_file, date(2024, 9, 15), date(2024, 11, 15))
+        assert list(from_archive.table_rows()) == list(from_csv.table_rows()), "The daily sales differ"
+        assert f"{from_archive.total_revenue:.2f}" == f"{from_csv.total_revenue:.2f}", "The total revenue differs"
+        assert from_archive.summary_text() == from_csv.summary_text(), "The printed report differs"
+        print(f"Total revenue ${from_archive.total_revenue:.2f} over {len(from_archive.daily)} days in both.")
+
+        print("\nTest 4: Exporting again mirrors the table, months without rows are removed")
+        write_purchases(purchase_file)
+        with open(purchase_file, mode='r') as file:
+            lines = [line for line in file if not line.startswith('2024-09')]
+        with open(purchase_file, mode='w') as file:
+            file.writelines(lines)
+        ColumnarArchive.export_table('purchases', purchase_file, archive_dir)
+        assert '2024-09.parquet' not in os.listdir(os.path.join(archive_dir, 'purchases')), "September was kept"
+        assert len(ColumnarArchive.read_table('purchases', date(2024, 9, 1), date(2024, 9, 30), archive_dir=archive_dir)) == 0
+        print("September is gone from the archive.")
+
+        print("\nTest 5: The reports read the archive only while it has every row of their date range")
+        inventory_file = os.path.join(db_dir, TABLES['inventory']['file'])
+        today = date.today()
+        assert ColumnarArchive.covers('purchases', today, purchase_file, archive_dir), "The archive is up to date"
+        assert ColumnarArchive.covers('inventory', None, inventory_file, archive_dir)
+        later = os.path.getmtime(os.path.join(archive_dir, 'purchases', '2024-10.parquet')) + 60
+        for path in (purchase_file, inventory_file):
+            os.utime(path, (later, later))  # A sale or a restock after the archive was written
+        assert not ColumnarArchive.covers('purchases', today, purchase_file, archive_dir), "Today's new sale is missing"
+        assert ColumnarArchive.covers('purchases', date(2024, 11, 30), purchase_file, archive_dir), \
+            "New sales can't be in a range that ended before the archive was written"
+        assert not ColumnarArchive.covers('inventory', date(2024, 11, 30), inventory_file, archive_dir), \
+            "An inventory change can move a lot into any month"
+        assert not ColumnarArchive.covers('prescriptions', None, archive_dir=os.path.join(temp_dir, 'none'))
+        print("The archive is used for past date ranges and for tables that haven't changed since.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,77 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from multiprocessing import Process
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from Inventory import Inventory
+from InventoryStore import InventoryStore
+from Storage import report_csv
+
+# Number of terminals selling at the same time and how many sales each one makes
+PROCESSES = 8
+SALES_PER_PROCESS = 150
+STARTING_QUANTITY = 100000
+
+
+def setup_inventory(inventory_file):
+    """Create an inventory with two items that every process sells from."""
+    with open(inventory_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=InventoryStore.FIELDNAMES)
+        writer.writeheader()
+        for item, item_id in (('Aspirin', '1'), ('Ibuprofen', '2')):
+            writer.writerow({
+                'Item': item, 'ID': item_id, 'Quantity': str(STARTING_QUANTITY), 'Price': '1.00',
+                'Expiration Date': '2099-01-01', 'Date Added': '2024-01-01', 'Date Updated': '', 'Date Removed': ''
+            })
+
+
+def sell(inventory_file):
+    """One terminal: sell one unit of each item and fill a prescription, over and over."""
+    inventory = Inventory(inventory_file=inventory_file)
+    for _ in range(SALES_PER_PROCESS):
+        inventory.sell_item('1', 1)
+        inventory.fill_prescription('Ibuprofen', 2)
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        inventory_file = os.path.join(temp_dir, 'db_inventory.csv')
+        setup_inventory(inventory_file)
+
+        print(f"\nTest 1: {PROCESSES} processes making {SALES_PER_PROCESS} sales each")
+        processes = [Process(target=sell, args=(inventory_file,)) for _ in range(PROCESSES)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert all(process.exitcode == 0 for process in processes), "A selling process failed"
+
+        # Read the result in a fresh process state, straight from the files on disk
+        InventoryStore._stores.clear()
+        inventory = Inventory(inventory_file=inventory_file)
+        aspirin = int(inventory.get_item('1')['Quantity'])
+        ibuprofen = int(inventory.get_item('2')['Quantity'])
+        expected_aspirin = STARTING_QUANTITY - PROCESSES * SALES_PER_PROCESS
+        expected_ibuprofen = STARTING_QUANTITY - PROCESSES * SALES_PER_PROCESS * 2
+        print(f"Aspirin: {aspirin} (expected {expected_aspirin}), Ibuprofen: {ibuprofen} (expected {expected_ibuprofen})")
+        assert aspirin == expected_aspirin, "Aspirin sales were lost"
+        assert ibuprofen == expected_ibuprofen, "Ibuprofen sales were lost"
+
+        print("\nTest 2: The CSV the reports read is complete after a checkpoint")
+        InventoryStore.for_file(inventory_file).checkpoint()
+        with open(report_csv('inventory', inventory_file), mode='r', newline='') as file:
+            quantities = {row['ID']: int(row['Quantity']) for row in csv.DictReader(file)}
+        assert quantities == {'1': expected_aspirin, '2': expected_ibuprofen}
+        print("All sales accounted for.")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,117 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from Inventory import Inventory
+from InventoryStore import InventoryStore
+from PrescriptionStore import PrescriptionStore
+from Prescriptions import Prescriptions
+
+LOTS = [
+    ('Advil', '1', '10', '2030-01-01'),
+    ('Advil', '2', '5', '2029-06-01'),
+    ('Tylenol', '3', '3', '2031-01-01'),
+]
+
+
+def new_databases(temp_dir, name):
+    """A directory of its own with an inventory of two Advil lots and one Tylenol lot, and no prescriptions yet."""
+    directory = os.path.join(temp_dir, name)
+    os.makedirs(directory)
+    inventory_file = os.path.join(directory, 'db_inventory.csv')
+    with open(inventory_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=InventoryStore.FIELDNAMES)
+        writer.writeheader()
+        for item, item_id, quantity, expiration_date in LOTS:
+            writer.writerow({
+                'Item': item, 'ID': item_id, 'Quantity': quantity, 'Price': '1.00',
+                'Expiration Date': expiration_date, 'Date Added': '2024-01-01', 'Date Updated': '', 'Date Removed': ''
+            })
+    return inventory_file, os.path.join(directory, 'db_prescriptions.csv')
+
+
+def quantities(inventory_file):
+    """Quantity of every lot as stored, read by a fresh Inventory."""
+    InventoryStore._stores.clear()
+    inventory = Inventory(inventory_file=inventory_file)
+    return [inventory.get_item(item_id)['Quantity'] for _, item_id, _, _ in LOTS]
+
+
+def statuses(prescription_file):
+    """Status and pharmacist of every prescription as stored, read by a fresh Prescriptions."""
+    PrescriptionStore._stores.clear()
+    return {
+        row['Prescription_Number']: (row['Status'], row['Pharmacist'])
+        for row in Prescriptions(prescription_file=prescription_file).read_prescriptions()
+    }
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        inventory_file, _ = new_databases(temp_dir, 'allocation')
+        inventory = Inventory(inventory_file=inventory_file)
+
+        print("\nTest 1: Every order is allocated in one pass, an order that is short takes nothing")
+        results = inventory.fill_prescriptions([('Advil', 8), ('Advil', 10), ('Tylenol', 2)])
+        assert results == [True, False, True], f"Got {results}"
+        assert quantities(inventory_file) == ['7', '0', '1'], "The short order took part of the stock"
+        print(f"Results {results}, the short order left the 7 remaining Advil alone.")
+
+        print("\nTest 2: When every order is short nothing is taken")
+        inventory = Inventory(inventory_file=inventory_file)
+        assert inventory.fill_prescriptions([('Advil', 50), ('Tylenol', 5), ('Aspirin', 1)]) == [False, False, False]
+        assert quantities(inventory_file) == ['7', '0', '1'], "The inventory changed"
+        print("Nothing was taken.")
+
+        print("\nTest 3: Filling selected prescriptions reports a result for each one")
+        inventory_file, prescription_file = new_databases(temp_dir, 'fill_selected')
+        inventory = Inventory(inventory_file=inventory_file)
+        prescriptions = Prescriptions(prescription_file=prescription_file)
+        for number, medication, quantity in (('101', 'Advil', 12), ('102', 'Advil', 12), ('103', 'Tylenol', 3),
+                                             ('104', 'Tylenol', 1)):
+            prescriptions.add_prescription('Ada', 'Lovelace', '12/10/1815', number, medication, quantity)
+        prescriptions.update_status('104', 'Filled', 'Miguel')
+
+        results = prescriptions.fill_prescriptions(['101', '102', '103', '104', '105', '101'], inventory, 'Tester')
+        print(results)
+        assert list(results) == ['101', '102', '103', '104', '105'], "The results are not in the order given"
+        assert [filled for filled, _ in results.values()] == [True, False, True, False, False]
+        assert statuses(prescription_file) == {
+            '101': ('Filled', 'Tester'), '102': ('Pending', ''), '103': ('Filled', 'Tester'), '104': ('Filled', 'Miguel')
+        }
+        assert quantities(inventory_file) == ['3', '0', '0'], "The stock taken does not match the filled prescriptions"
+        print("Filled prescriptions were marked, the others were left as they were.")
+
+        print("\nTest 4: An error before the batch is written leaves both databases unchanged")
+        inventory_file, prescription_file = new_databases(temp_dir, 'failure')
+        inventory = Inventory(inventory_file=inventory_file)
+        prescriptions = Prescriptions(prescription_file=prescription_file)
+        prescriptions.add_prescription('Ada', 'Lovelace', '12/10/1815', '102', 'Advil', 12)
+        before = statuses(prescription_file)
+        prescriptions = Prescriptions(prescription_file=prescription_file)
+
+        def fail(*args):
+            raise OSError("Disk full")
+
+        prescriptions.store.update = fail
+        try:
+            prescriptions.fill_prescriptions(['102'], inventory, 'Tester')
+            assert False, "The error was swallowed"
+        except OSError:
+            pass
+        del prescriptions.store.update
+        assert quantities(inventory_file) == ['10', '5', '3'], "The stock was taken although the fill failed"
+        assert statuses(prescription_file) == before, "A prescription changed"
+        print("The inventory and the prescriptions are as they were.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,140 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from datetime import date
+from types import SimpleNamespace
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from FinancialReport import FinancialReport
+from PDFTable import PDFTable
+from Reports import Reports
+from SalesRollup import SalesRollup
+from Storage import TABLES, report_csv
+
+ITEMS = [('Advil', 8.99), ('Gatorade', 1.89), ('Tylenol', 9.49), ('Vitamin C', 10.00), ('Band-Aids', 3.25)]
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+CUSTOMERS = [('Amber', 'P'), ('Miguel', 'G'), ('Ruben', 'G')]
+
+
+def write_purchases(purchase_file):
+    """Write 120 purchases over October and November 2024, each of one to three lines, some with an item twice.
+    Every tenth customer makes the same purchase again right after."""
+    with open(purchase_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=TABLES['purchases']['fields'])
+        writer.writeheader()
+        for number in range(120):
+            day = date(2024, 10 + number % 2, 1 + number * 7 % 30)
+            first_name, last_name = CUSTOMERS[number % len(CUSTOMERS)]
+            items = [ITEMS[(number + line * line) % len(ITEMS)] for line in range(1 + number % 3)]
+            lines = [(item, 1 + (number + line) % 4, price) for line, (item, price) in enumerate(items)]
+            grand_total = round(sum(quantity * price for _, quantity, price in lines), 2)
+            for item, quantity, price in lines * (2 if number % 10 == 0 else 1):  # Bought again right after
+                writer.writerow({
+                    'Date': day.isoformat(), 'First Name': first_name, 'Last Name': last_name, 'Item Name': item,
+                    'ID': '1', 'Quantity': quantity, 'Price': f"{price:.2f}", 'Total Cost': f"{quantity * price:.2f}",
+                    'Grand Total': f"{grand_total:.2f}", 'Payment Method': PAYMENT_METHODS[number % 5 % 3],
+                    'Prescription': 'no'
+                })
+
+
+def csv_loop_report(purchase_file, start_date, end_date):
+    """The numbers of the report worked out one line at a time with the csv module, the way the old report did."""
+    total_revenue, revenue_by_item, revenue_by_payment = 0.0, {}, {}
+    daily = {}  # (date, item, payment method) -> [units, revenue, purchases of the item]
+    seen = set()
+    purchase, number, purchase_cents = None, 0, 0
+    with open(purchase_file, mode='r') as file:
+        for row in csv.DictReader(file):
+            if not start_date.isoformat() <= row['Date'] <= end_date.isoformat():
+                continue
+            total_cost = float(row['Total Cost'])
+            total_revenue += total_cost
+            revenue_by_item[row['Item Name']] = revenue_by_item.get(row['Item Name'], 0.0) + total_cost
+            revenue_by_payment[row['Payment Method']] = revenue_by_payment.get(row['Payment Method'], 0.0) + total_cost
+            sales = daily.setdefault((row['Date'], row['Item Name'], row['Payment Method']), [0, 0.0, 0])
+            sales[0] += int(row['Quantity'])
+            sales[1] += total_cost
+            # A purchase is the lines written one after the other for it, until they add up to its grand total
+            line_purchase = tuple(row[column] for column in FinancialReport.PURCHASE_KEY)
+            if line_purchase != purchase or purchase_cents >= round(float(row['Grand Total']) * 100):
+                purchase, number, purchase_cents = line_purchase, number + 1, 0
+            purchase_cents += round(total_cost * 100)
+            # An item on two lines of one purchase is one purchase of that item
+            if (number, row['Item Name']) not in seen:
+                seen.add((number, row['Item Name']))
+                sales[2] += 1
+    return total_revenue, revenue_by_item, revenue_by_payment, daily
+
+
+def cents(revenue):
+    """Revenue by name rounded to the cent, sums of floats differ in the last digits with the order they are added in."""
+    return {name: f"{value:.2f}" for name, value in revenue.items()}
+
+
+def check_report(report, expected):
+    """Compare a FinancialReport with the numbers worked out by csv_loop_report."""
+    total_revenue, revenue_by_item, revenue_by_payment, daily = expected
+    assert f"{report.total_revenue:.2f}" == f"{total_revenue:.2f}", "The total revenue differs"
+    assert cents(report.revenue_by_item.to_dict()) == cents(revenue_by_item), "The revenue by item differs"
+    assert cents(report.revenue_by_payment.to_dict()) == cents(revenue_by_payment), "The revenue by payment method differs"
+    rows = [
+        (day, item, method, str(units), str(purchases), f"${revenue:.2f}")
+        for (day, item, method), (units, revenue, purchases) in sorted(daily.items())
+    ]
+    assert list(report.table_rows()) == rows, "The daily sales differ"
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        purchase_file = os.path.join(temp_dir, 'db_purchase_data.csv')
+        write_purchases(purchase_file)
+
+        print("\nTest 1: The report from the purchase lines has the numbers the old row by row report had")
+        for start_date, end_date in ((date(2024, 10, 1), date(2024, 11, 30)), (date(2024, 10, 15), date(2024, 11, 3))):
+            report = FinancialReport.from_csv(purchase_file, start_date, end_date)
+            check_report(report, csv_loop_report(purchase_file, start_date, end_date))
+            print(f"{start_date} to {end_date}: ${report.total_revenue:.2f} over {len(report.sales)} daily sales rows.")
+        assert FinancialReport.from_csv(purchase_file, date(2025, 1, 1), date(2025, 1, 31)).empty
+
+        print("\nTest 2: The report from the daily sales rollup has the same numbers")
+        rollup = SalesRollup.for_file(purchase_file=purchase_file)
+        rollup.rebuild()
+        start_date, end_date = date(2024, 10, 8), date(2024, 11, 22)
+        report = FinancialReport.from_rollup(report_csv('sales_daily', rollup.rollup_file), start_date, end_date)
+        check_report(report, csv_loop_report(purchase_file, start_date, end_date))
+        print(f"${report.total_revenue:.2f} from {len(report.sales)} rollup rows.")
+
+        print("\nTest 3: The PDF has the revenue by item and by payment method, highest first, then the daily sales")
+        tables = []
+
+        def add_table(pdf, headers, rows, align=None):
+            rows = list(rows)
+            tables.append((headers, rows))
+            return PDFTable(pdf, headers, align=align).render(rows)
+
+        reports = SimpleNamespace(add_table=add_table, new_report_file=lambda name: os.path.join(temp_dir, name + '.pdf'))
+        job = SimpleNamespace(progress=lambda *args: None, track=lambda rows, *args: rows)
+        path = Reports.build_financial_report(reports, job, purchase_file, start_date, end_date)
+        assert os.path.getsize(path) > 0, "The PDF was not written"
+        assert [headers for headers, _ in tables] == [
+            ['Item Name', 'Revenue'], ['Payment Method', 'Revenue'],
+            ['Date', 'Item Name', 'Payment Method', 'Units', 'Purchases', 'Revenue']
+        ], f"Tables drawn: {[headers for headers, _ in tables]}"
+        _, revenue_by_item, revenue_by_payment, _ = csv_loop_report(purchase_file, start_date, end_date)
+        for (_, rows), expected in zip(tables, (revenue_by_item, revenue_by_payment)):
+            assert dict(rows) == {name: f"${revenue}" for name, revenue in cents(expected).items()}
+            revenues = [float(revenue[1:]) for _, revenue in rows]
+            assert revenues == sorted(revenues, reverse=True), "The revenue is not highest first"
+        assert len(tables[2][1]) == len(report.sales)
+        print(f"Drew {len(tables[0][1])} items, {len(tables[1][1])} payment methods and {len(tables[2][1])} daily sales.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,159 @@
+import sys
+import os
+import csv
+import shutil
+import json
+import tempfile
+from multiprocessing import Process
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from Inventory import Inventory
+from InventoryStore import InventoryStore
+from Storage import get_backend
+
+LOTS = [
+    ('Advil', '1', '10', '2030-01-01'),
+    ('Advil', '2', '5', '2029-06-01'),
+    ('Tylenol', '3', '50', '2031-01-01'),
+    ('Gatorade', '4', '200', 'No Expiration Date'),
+]
+
+
+def write_inventory(inventory_file, lots):
+    """Create an inventory file with the given (item, ID, quantity, expiration date) lots."""
+    with open(inventory_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=InventoryStore.FIELDNAMES)
+        writer.writeheader()
+        for item, item_id, quantity, expiration_date in lots:
+            writer.writerow({
+                'Item': item, 'ID': item_id, 'Quantity': quantity, 'Price': '1.00',
+                'Expiration Date': expiration_date, 'Date Added': '2024-01-01', 'Date Updated': '', 'Date Removed': ''
+            })
+
+
+def restock(inventory_file, item, item_id, quantity, expiration_date):
+    """Another terminal changing a lot."""
+    Inventory(inventory_file=inventory_file).update_stock(item, item_id, quantity, '1.00', expiration_date)
+
+
+def restart(inventory_file):
+    """Forget the in-memory inventory, as if the program was started again."""
+    InventoryStore._stores.clear()
+    return Inventory(inventory_file=inventory_file)
+
+
+def journal_lines(inventory_file):
+    """The records in the inventory journal."""
+    try:
+        with open(inventory_file + '.journal', mode='rb') as file:
+            return file.read().splitlines(keepends=True)
+    except FileNotFoundError:
+        return []
+
+
+def csv_quantity(inventory_file, item_id):
+    """Quantity of a lot in the CSV file alone, without the journal."""
+    with open(inventory_file, mode='r', newline='') as file:
+        return next(row['Quantity'] for row in csv.DictReader(file) if row['ID'] == item_id)
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        inventory_file = os.path.join(temp_dir, 'db_inventory.csv')
+        write_inventory(inventory_file, LOTS)
+
+        print("\nTest 1: Lookups by ID and by item name come from one store shared by every Inventory")
+        inventory = Inventory(inventory_file=inventory_file)
+        assert Inventory(inventory_file=inventory_file).store is inventory.store, "Each Inventory loaded its own copy"
+        assert inventory.get_item('3')['Item'] == 'Tylenol'
+        assert inventory.get_item('99') is None
+        assert [row['ID'] for row in inventory.store.get_by_name('  ADVIL ')] == ['1', '2'], "Lookup by name ignores case"
+        assert [entry['Quantity'] for entry in inventory.check_stock('Advil')] == [10, 5]
+        assert inventory.check_low_stock() == [('Advil', '1', '10'), ('Advil', '2', '5'), ('Tylenol', '3', '50')]
+        print("Items are found by ID and by name, every Inventory uses the same store.")
+
+        print("\nTest 2: The inventory is read again only when another terminal changes it")
+        rows = inventory.store.rows
+        inventory.read_inventory_data()
+        assert inventory.store.rows is rows, "The inventory was read again although nothing changed"
+
+        process = Process(target=restock, args=(inventory_file, 'Tylenol', '3', 75, '2031-01-01'))
+        process.start()
+        process.join()
+        assert process.exitcode == 0, "The other terminal failed"
+        assert inventory.get_item('3')['Quantity'] == '75', "The change made by another terminal was not seen"
+        print("The change made by another terminal was picked up.")
+
+        print("\nTest 3: Prescriptions take the lots that expire first, expired and removed lots are skipped")
+        os.makedirs(os.path.join(temp_dir, 'fefo'))  # A directory of its own, with SQLite it gets its own database
+        fefo_file = os.path.join(temp_dir, 'fefo', 'db_inventory.csv')
+        write_inventory(fefo_file, LOTS + [('Advil', '5', '20', '2020-01-01'), ('Advil', '6', '20', '2029-01-01')])
+        fefo = Inventory(inventory_file=fefo_file)
+        assert fefo.remove_medication('6')
+        allocated = lambda quantity: [(row['ID'], units) for row, units in fefo.store.allocate('Advil', quantity) or []]
+        assert allocated(12) == [('2', 5), ('1', 7)], f"Allocated {allocated(12)}"
+        assert fefo.store.allocate('Advil', 16) is None, "More than the usable stock was allocated"
+
+        # Re-dating a lot and dating it back leaves two heap entries with the same date, only the latest one counts
+        fefo.update_stock('Advil', '1', 10, '1.00', '2031-01-01')
+        fefo.update_stock('Advil', '1', 10, '1.00', '2030-01-01')
+        assert allocated(15) == [('2', 5), ('1', 10)], f"Allocated {allocated(15)}"
+        assert fefo.store.allocate('Advil', 20) is None, "A lot was allocated twice"
+        assert not fefo.fill_prescription('Advil', 20)
+        assert fefo.fill_prescription('Advil', 12)
+        assert [fefo.get_item(item_id)['Quantity'] for item_id in ('1', '2', '5', '6')] == ['3', '0', '20', '20']
+
+        # A medication counts as expired only when every lot still in stock has expired
+        assert not fefo.is_expired('Advil'), "An expired lot made the medication expired although a good lot is left"
+        assert not fefo.is_expired('Gatorade') and not fefo.is_expired('Aspirin')
+        assert fefo.fill_prescription('Advil', 3)
+        assert fefo.is_expired('Advil'), "Only the expired lot is left in stock"
+        print("The lot expiring first was used first, each lot once, and nothing went below zero.")
+
+        if get_backend() != 'csv':
+            print("\nTests 4 to 6 skipped: the SQLite backend updates single rows and has no journal.")
+            return
+
+        print("\nTest 4: A change is appended to the journal and replayed after a restart")
+        with open(inventory_file, mode='rb') as file:
+            csv_data = file.read()
+        records = len(journal_lines(inventory_file))
+        inventory.sell_item('1', 3)
+        with open(inventory_file, mode='rb') as file:
+            assert file.read() == csv_data, "The CSV file was rewritten for one change"
+        assert len(journal_lines(inventory_file)) == records + 1, "The change was not journaled as one record"
+        inventory = restart(inventory_file)
+        assert inventory.get_item('1')['Quantity'] == '7', "The journal was not replayed"
+        print("One record was appended and replayed after the restart.")
+
+        print("\nTest 5: A record cut short by a crash is ignored, then cut off by the next change")
+        with open(inventory_file + '.journal', mode='ab') as file:
+            file.write(b'{"Item": "Advil", "ID": "1", "Quan')
+        inventory = restart(inventory_file)
+        assert inventory.get_item('1')['Quantity'] == '7', "The torn record changed the inventory"
+        inventory.sell_item('1', 1)
+        lines = journal_lines(inventory_file)
+        assert all(line.endswith(b'\n') and json.loads(line) for line in lines), "The torn record was left in the journal"
+        assert restart(inventory_file).get_item('1')['Quantity'] == '6', "The change after the torn record was lost"
+        print(f"The journal holds {len(lines)} complete records.")
+
+        print(f"\nTest 6: The journal is folded into the CSV file after {InventoryStore.COMPACT_EVERY} records")
+        inventory = restart(inventory_file)
+        for _ in range(InventoryStore.COMPACT_EVERY):
+            inventory.sell_item('4', 1)
+        assert len(journal_lines(inventory_file)) < InventoryStore.COMPACT_EVERY, "The journal was never compacted"
+        assert int(csv_quantity(inventory_file, '4')) < 200, "The compacted changes are not in the CSV file"
+        inventory.store.checkpoint()
+        assert journal_lines(inventory_file) == [], "The checkpoint left records in the journal"
+        assert csv_quantity(inventory_file, '4') == '0' and csv_quantity(inventory_file, '1') == '6'
+        assert restart(inventory_file).get_item('4')['Quantity'] == '0'
+        print("Every change is in the CSV file and the journal is empty.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -1,10 +1,19 @@
 import sys
 import os
 import csv
+import shutil
+import tempfile
 
 # Add the src directory to the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
+# Key the password fingerprints of the test accounts with a test key instead of creating one in the home folder,
+# and keep the logins made by the test out of the pharmacy's transaction log
+os.environ['PHARMACY_FINGERPRINT_KEY'] = 'test fingerprint key'
+TEMP_DIR = tempfile.mkdtemp()
+os.environ['PHARMACY_LOG_DIR'] = os.path.join(TEMP_DIR, 'logs')
+
+import TransactionLog
 from LoginRoles import LoginRoles  # Adjust the import path after updating the sys.path
 
 def setup_test_file(test_file):
@@ -101,5 +110,9 @@ def run_tests():
     # Clean up the test file (optional)
     # os.remove(test_roles_file)
 
+    # The log is written in the background, finish it before its folder is removed
+    TransactionLog.flush()
+    shutil.rmtree(TEMP_DIR)
+
 if __name__ == "__main__":
     run_tests()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# Keep the logins made by the test out of the pharmacy's transaction log, and its fingerprint key out of the home folder
+TEMP_DIR = tempfile.mkdtemp()
+os.environ['PHARMACY_LOG_DIR'] = os.path.join(TEMP_DIR, 'logs')
+os.environ['PHARMACY_FINGERPRINT_KEY_FILE'] = os.path.join(TEMP_DIR, 'fingerprint.key')
+
+import PasswordHasher
+import TransactionLog
+from LoginRoles import LoginRoles
+from Storage import open_table
+from UserDirectory import UserDirectory
+
+ACCOUNTS = [
+    ('amber', 'amberpass', 'manager'),
+    ('miguel', 'miguelpass', 'pharmacist'),
+    ('ruben', 'rubenpass', 'technician'),
+]
+
+
+def write_accounts(roles_file):
+    """Create an accounts file with passwords stored the old way, as plain text."""
+    with open(roles_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(UserDirectory.FIELDNAMES)
+        for username, password, role in ACCOUNTS:
+            writer.writerow([username, f'{username}@pharmacy.com', password, role, '0', 'unlocked', ''])
+
+
+def stored_passwords(roles_file):
+    """Password and fingerprint of every account as stored."""
+    table = open_table('user_accounts', roles_file)
+    return {row['Username']: (row['Password'], row['Password_Fingerprint']) for row in table.read_all()}
+
+
+def run_tests():
+    default_cost = PasswordHasher.DEFAULT_COST
+    try:
+        # Low work factors keep the test fast, the format and the checks are the same
+        PasswordHasher.DEFAULT_COST = 10
+
+        print("\nTest 1: A hashed password is checked against its hash, a plain text password against itself")
+        stored = PasswordHasher.hash_password('amberpass')
+        assert stored.split('$')[:4] == ['scrypt', '10', str(PasswordHasher.BLOCK_SIZE), str(PasswordHasher.PARALLELISM)]
+        assert PasswordHasher.is_hashed(stored) and 'amberpass' not in stored
+        assert PasswordHasher.hash_password('amberpass') != stored, "Two hashes of one password used the same salt"
+        assert PasswordHasher.verify_password('amberpass', stored)
+        assert PasswordHasher.verify_password('amberpass', stored), "The remembered check gave a different answer"
+        assert not PasswordHasher.verify_password('amberpas', stored)
+        assert PasswordHasher.verify_password('oldpass', 'oldpass') and not PasswordHasher.verify_password('x', 'oldpass')
+        damaged = '$'.join(stored.split('$')[:5] + ['!!!'])
+        assert not PasswordHasher.verify_password('amberpass', damaged), "A damaged hash was accepted"
+        print(f"Stored as {stored[:30]}...")
+
+        print("\nTest 2: Plain text passwords and other work factors need to be hashed again")
+        assert PasswordHasher.needs_rehash('amberpass')
+        assert not PasswordHasher.needs_rehash(stored)
+        assert PasswordHasher.needs_rehash(stored, cost=11)
+        assert PasswordHasher.needs_rehash(PasswordHasher.hash_password('amberpass', cost=9))
+        print("Only the hash with the current work factor is kept.")
+
+        print("\nTest 3: Fingerprints are keyed with a secret kept away from the salt, and don't change with the work factor")
+        salt_file = os.path.join(TEMP_DIR, 'salt')
+        salt = PasswordHasher.load_salt(salt_file)
+        assert len(salt) == PasswordHasher.SALT_BYTES and PasswordHasher.load_salt(salt_file) == salt
+        key = PasswordHasher.load_key()
+        assert len(key) == PasswordHasher.KEY_BYTES and PasswordHasher.load_key() == key
+        assert os.path.exists(os.path.join(TEMP_DIR, 'fingerprint.key')), "The key was not written to its own file"
+        fingerprint = PasswordHasher.fingerprint('amberpass', salt, key)
+        assert PasswordHasher.is_keyed(fingerprint) and not PasswordHasher.is_keyed('')
+        PasswordHasher.DEFAULT_COST = 11
+        assert PasswordHasher.fingerprint('amberpass', salt, key) == fingerprint, "Changing the work factor changed the fingerprint"
+        assert PasswordHasher.fingerprint('amberpas', salt, key) != fingerprint
+        assert PasswordHasher.fingerprint('amberpass', os.urandom(PasswordHasher.SALT_BYTES), key) != fingerprint
+        assert PasswordHasher.fingerprint('amberpass', salt, os.urandom(PasswordHasher.KEY_BYTES)) != fingerprint, \
+            "The salt alone was enough to make the fingerprint"
+        PasswordHasher.DEFAULT_COST = 10
+        print("The fingerprint is the same at both work factors and changes with the key.")
+
+        print("\nTest 4: Logging in hashes a plain text password, and hashes it again when the work factor changes")
+        roles_file = os.path.join(TEMP_DIR, 'db_user_account.csv')
+        write_accounts(roles_file)
+        login_roles = LoginRoles(roles_file=roles_file)
+        session, message = login_roles.login('amber', 'amberpass')
+        assert session is not None, message
+        password, fingerprint = stored_passwords(roles_file)['amber']
+        assert PasswordHasher.is_hashed(password) and password.split('$')[1] == '10', f"Stored {password}"
+        assert fingerprint == login_roles.directory.fingerprint('amberpass')
+        PasswordHasher.DEFAULT_COST = 11
+        assert login_roles.login('amber', 'amberpass')[0] is not None
+        password, rehashed_fingerprint = stored_passwords(roles_file)['amber']
+        assert password.split('$')[1] == '11', "The password was not hashed with the new work factor"
+        assert rehashed_fingerprint == fingerprint, "Hashing again changed the fingerprint"
+        assert login_roles.password_exists('amberpass'), "The password is not found after the work factor changed"
+        ok, message = login_roles.create_account('technician', 'grace', 'amberpass', 'grace@pharmacy.com')
+        assert not ok, "An account was created with a password already in use"
+        print("The password was hashed at login and again after the work factor changed.")
+
+        print("\nTest 5: Logging in replaces a fingerprint made before they were keyed")
+        login_roles.directory.update('amber', {'Password_Fingerprint': 'unkeyedfingerprint'})
+        assert not login_roles.password_exists('amberpass')
+        assert login_roles.login('amber', 'amberpass')[0] is not None
+        password, refreshed_fingerprint = stored_passwords(roles_file)['amber']
+        assert refreshed_fingerprint == fingerprint, "The old fingerprint was not replaced at login"
+        assert password.split('$')[1] == '11', "Replacing the fingerprint changed the password hash"
+        assert login_roles.password_exists('amberpass')
+        print("The fingerprint was made again with the key.")
+
+        print("\nTest 6: Migrating hashes every password still stored as plain text")
+        assert login_roles.migrate_passwords() == 2
+        passwords = stored_passwords(roles_file)
+        assert all(PasswordHasher.is_hashed(password) for password, _ in passwords.values()), passwords
+        assert passwords['amber'][0] == password, "An account that was already hashed was hashed again"
+        assert login_roles.migrate_passwords() == 0
+        for username, password, _ in ACCOUNTS:
+            assert login_roles.login(username, password)[0] is not None, f"{username} can't log in after migrating"
+            assert login_roles.password_exists(password)
+        assert not login_roles.password_exists('unused')
+        print("Every account logs in with its hashed password.")
+    finally:
+        PasswordHasher.DEFAULT_COST = default_cost
+        TransactionLog.flush()  # The log is written in the background, finish it before its folder is removed
+        shutil.rmtree(TEMP_DIR)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,87 @@
+import sys
+import os
+import shutil
+import inspect
+import tempfile
+from multiprocessing import Process
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from Prescriptions import Prescriptions
+
+PATIENTS = [('Ada', 'Lovelace', '12/10/1815'), ('Alan', 'Turing', '06/23/1912'), ('Grace', 'Hopper', '12/09/1906')]
+MEDICATIONS = ['Advil', 'Tylenol', 'Amoxicillin']
+
+
+def add_history(prescriptions, count):
+    """Add count prescriptions numbered from 1, spread over the patients, every third one picked up."""
+    for number in range(1, count + 1):
+        first_name, last_name, dob = PATIENTS[number % len(PATIENTS)]
+        prescriptions.add_prescription(first_name, last_name, dob, str(number), MEDICATIONS[number % len(MEDICATIONS)], 10)
+        if number % 3 == 0:
+            prescriptions.update_status(str(number), 'Picked Up', 'Miguel')
+
+
+def pick_up(prescription_file, prescription_number):
+    """Another terminal picking up a prescription."""
+    Prescriptions(prescription_file=prescription_file).pickup_prescription(prescription_number)
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        prescription_file = os.path.join(temp_dir, 'db_prescriptions.csv')
+        prescriptions = Prescriptions(prescription_file=prescription_file)
+        add_history(prescriptions, 30)
+
+        print("\nTest 1: Prescriptions are found by number, by patient and by status from one shared store")
+        assert Prescriptions(prescription_file=prescription_file).store is prescriptions.store, "Each instance has its own copy"
+        assert [row['Medication'] for row in prescriptions.store.get(' 7 ')] == ['Tylenol']
+        assert prescriptions.store.get('999') == []
+        ada = prescriptions.findByPatient(*PATIENTS[0])
+        assert [row['Prescription_Number'] for row in ada] == [str(number) for number in range(3, 31, 3)]
+        pending = prescriptions.find_by_status('Pending')
+        assert len(pending) == 20 and all(int(row['Prescription_Number']) % 3 for row in pending)
+        assert len(prescriptions.find_by_status('Picked Up')) == 10
+        print(f"{len(ada)} prescriptions for {PATIENTS[0][0]}, {len(pending)} pending.")
+
+        print("\nTest 2: Changing the status moves a prescription between the status lists")
+        assert prescriptions.update_status('1', 'Filled', 'Tester')
+        assert '1' not in [row['Prescription_Number'] for row in prescriptions.find_by_status('Pending')]
+        assert [row['Prescription_Number'] for row in prescriptions.find_by_status('Filled')] == ['1']
+        assert prescriptions.store.get('1')[0]['Pharmacist'] == 'Tester'
+        assert not prescriptions.update_status('999', 'Filled'), "A prescription that doesn't exist was updated"
+        print("The prescription is only in the Filled list now.")
+
+        print("\nTest 3: A change made by another terminal is picked up")
+        process = Process(target=pick_up, args=(prescription_file, '1'))
+        process.start()
+        process.join()
+        assert process.exitcode == 0, "The other terminal failed"
+        assert prescriptions.find_by_status('Filled') == [], "The change made by another terminal was not seen"
+        assert prescriptions.store.get('1')[0]['Status'] == 'Picked Up'
+        print("The prescription picked up by the other terminal moved to Picked Up.")
+
+        print("\nTest 4: Prescriptions are read a page at a time")
+        pages = prescriptions.iter_prescriptions({'Status': 'Pending'}, offset=0, limit=7)
+        assert inspect.isgenerator(pages), "iter_prescriptions does not stream the rows"
+        pending = [row['Prescription_Number'] for row in prescriptions.find_by_status('Pending')]
+        paged = []
+        for offset in range(0, 40, 7):
+            page = [row['Prescription_Number'] for row in prescriptions.iter_prescriptions({'Status': 'Pending'}, offset, 7)]
+            assert len(page) == min(7, max(0, len(pending) - offset)), f"Page at {offset} has {len(page)} rows"
+            paged.extend(page)
+        assert paged == pending and prescriptions.count_prescriptions({'Status': 'Pending'}) == 19
+        turing = {'Patient_First_Name': 'Alan', 'Patient_Last_Name': 'Turing', 'Patient_DOB': '06/23/1912', 'Status': 'Pending'}
+        assert [row['Prescription_Number'] for row in prescriptions.iter_prescriptions(turing, offset=2, limit=3)] == \
+            ['10', '13', '16']
+        next(prescriptions.iter_prescriptions())['Status'] = 'Changed'
+        assert prescriptions.store.rows[0]['Status'] != 'Changed', "A page gave out the store's own rows"
+        print(f"{len(pending)} pending prescriptions read back in pages of 7.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
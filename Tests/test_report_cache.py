@@ -0,0 +1,71 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+from datetime import date
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(SRC_DIR)
+
+from ReportCache import ReportCache
+
+START_DATE = date(2024, 11, 1)
+END_DATE = date(2024, 11, 30)
+
+
+def write_file(path, size, text='x'):
+    """Write a file of size bytes."""
+    with open(path, mode='w') as file:
+        file.write(text * size)
+    return path
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cache = ReportCache.for_directory(os.path.join(temp_dir, 'cache'), max_mb=0.05)
+        purchase_file = write_file(os.path.join(temp_dir, 'db_purchase_data.csv'), 100, 'p')
+        inventory_file = write_file(os.path.join(temp_dir, 'db_inventory.csv'), 100, 'i')
+
+        print("\nTest 1: A report is reused while its source files are unchanged")
+        key = cache.key("Financial Report", START_DATE, END_DATE, [purchase_file])
+        assert cache.get(key) is None, "Nothing was cached yet"
+        path = cache.put(key, write_file(os.path.join(temp_dir, 'Financial_Report.pdf'), 1000))
+        assert cache.get(cache.key("Financial Report", START_DATE, END_DATE, [purchase_file])) == path
+        assert cache.get(cache.key("Financial Report", START_DATE, date(2024, 12, 31), [purchase_file])) is None
+        assert cache.get(cache.key("Inventory Report", START_DATE, END_DATE, [purchase_file])) is None
+        print(f"Cached as {os.path.basename(path)}, other reports and date ranges are not mixed up with it.")
+
+        print("\nTest 2: Changing a source file invalidates the report")
+        time.sleep(0.01)
+        with open(purchase_file, mode='a') as file:
+            file.write("2024-11-30,Amber,G,Advil,1,1,5.00,5.00,5.00,Cash,no\n")
+        new_key = cache.key("Financial Report", START_DATE, END_DATE, [purchase_file])
+        assert new_key != key and cache.get(new_key) is None, "A report of changed data was returned"
+        new_path = cache.put(new_key, write_file(os.path.join(temp_dir, 'Financial_Report.pdf'), 1000))
+        assert not os.path.exists(path), "The outdated version of the report was kept"
+        assert cache.get(new_key) == new_path
+        print("The outdated report was replaced by the new one.")
+
+        print("\nTest 3: The least recently used reports are removed once the cache is full")
+        paths = {}
+        for month in range(1, 13):
+            month_key = cache.key("Inventory Report for Period", date(2024, month, 1), date(2024, month, 28), [inventory_file])
+            paths[month] = cache.put(month_key, write_file(os.path.join(temp_dir, 'report.pdf'), 5000))
+            time.sleep(0.01)  # Keep the modification times in order
+            if month > 1:
+                cache.get(cache.key("Inventory Report for Period", date(2024, 1, 1), date(2024, 1, 28), [inventory_file]))
+        kept = [month for month, month_path in paths.items() if os.path.exists(month_path)]
+        print(f"Cache of {cache.size():,} bytes (limit {cache.max_bytes:,}), months kept: {kept}")
+        assert cache.size() <= cache.max_bytes, "The cache grew past its size"
+        assert 1 in kept and 12 in kept, "A recently used report was removed"
+        assert 2 not in kept, "The least recently used report was kept"
+        assert not os.path.exists(new_path), "The financial report, used the longest ago, was kept"
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,105 @@
+import sys
+import os
+import time
+import tempfile
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(SRC_DIR)
+
+from ReportJob import ReportJob, NoReportData
+
+# Rows in the report drawn while the event loop is watched
+ROWS = 20_000
+
+# Longest the event loop may go without running while a report is generated
+MAX_GAP_MS = 250
+
+
+def purchase_rows(count):
+    """Rows like the financial report's."""
+    for number in range(count):
+        yield (f"2024-{number % 12 + 1:02d}-{number % 28 + 1:02d}", f"Item {number % 50}", f"${number % 9000 / 100:.2f}")
+
+
+def build_pdf(job, rows, path):
+    """A report job: draw the rows into a PDF through job.track() and save it."""
+    from fpdf import FPDF
+    from PDFTable import PDFTable
+    pdf = FPDF()
+    pdf.add_page()
+    PDFTable(pdf, ['Date', 'Item Name', 'Total Cost']).render(job.track(purchase_rows(rows), rows, 0, 90, "Drawing"))
+    job.progress(95, "Saving")
+    pdf.output(path)
+    return path
+
+
+def run_job(job, on_tick=None):
+    """Start the job and run the event loop until it ends, return (how it ended, its value, progress seen)."""
+    outcome = {}
+    progress = []
+    loop = QEventLoop()
+    job.signals.progress.connect(lambda percent, text: progress.append(percent))
+    job.signals.finished.connect(lambda path: outcome.update(ended='finished', value=path))
+    job.signals.no_data.connect(lambda message: outcome.update(ended='no data', value=message))
+    job.signals.failed.connect(lambda error: outcome.update(ended='failed', value=error))
+    job.signals.cancelled.connect(lambda: outcome.update(ended='cancelled', value=None))
+    for signal in (job.signals.finished, job.signals.no_data, job.signals.failed, job.signals.cancelled):
+        signal.connect(loop.quit)
+    timer = QTimer()
+    if on_tick:
+        timer.timeout.connect(on_tick)
+        timer.start(10)
+    job.start()
+    loop.exec_()
+    timer.stop()
+    return outcome['ended'], outcome['value'], progress
+
+
+def run_tests():
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'report.pdf')
+
+        print(f"\nTest 1: A report of {ROWS:,} rows is built while the event loop keeps running")
+        ticks = []
+        job = ReportJob("Test Report", lambda job: build_pdf(job, ROWS, path))
+        start = time.perf_counter()
+        ended, value, progress = run_job(job, on_tick=lambda: ticks.append(time.perf_counter()))
+        seconds = time.perf_counter() - start
+        gaps = [(later - earlier) * 1000 for earlier, later in zip([start] + ticks, ticks)]
+        print(f"Built in {seconds:.2f} s, the event loop ran {len(ticks)} times, longest gap {max(gaps):.0f} ms")
+        assert ended == 'finished' and value == path and os.path.exists(path), f"The job ended with {ended}: {value}"
+        assert progress == sorted(progress) and progress[-1] == 100, "Progress did not go up to 100%"
+        assert max(gaps) < MAX_GAP_MS, "The event loop was blocked while the report was built"
+        print(f"{len(progress)} progress updates, the report was written.")
+
+        print("\nTest 2: Cancelling stops the job before the report is written")
+        os.remove(path)
+        job = ReportJob("Test Report", lambda job: build_pdf(job, ROWS * 10, path))
+        QTimer.singleShot(200, job.cancel)
+        start = time.perf_counter()
+        ended, value, progress = run_job(job)
+        print(f"Stopped {(time.perf_counter() - start) * 1000:.0f} ms after it started, at {progress[-1]}%")
+        assert ended == 'cancelled', f"The job ended with {ended}"
+        assert not os.path.exists(path), "A cancelled report was written"
+
+        print("\nTest 3: Reports with nothing in them and reports that fail are told apart")
+        def no_data(job):
+            raise NoReportData("No logs found within the specified date range.")
+        ended, value, _ = run_job(ReportJob("Test Report", no_data))
+        assert (ended, value) == ('no data', "No logs found within the specified date range.")
+        ended, value, _ = run_job(ReportJob("Test Report", lambda job: open(os.path.join(temp_dir, 'missing.csv'))))
+        assert ended == 'failed' and 'missing.csv' in value, f"The job ended with {ended}: {value}"
+        print(f"Failed with: {value}")
+    finally:
+        for name in os.listdir(temp_dir):
+            os.remove(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
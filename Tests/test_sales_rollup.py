@@ -0,0 +1,126 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from multiprocessing import Process
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from AtomicFile import WriteBatch
+from SalesRollup import SalesRollup
+from Storage import TABLES, open_table, report_csv
+
+# Number of terminals selling at the same time and how many sales each one makes
+PROCESSES = 6
+SALES_PER_PROCESS = 40
+
+ITEMS = [('Advil', '8.99'), ('Gatorade', '1.89'), ('Tylenol', '9.49'), ('Vitamin C', '10.00')]
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+
+
+def sale_lines(terminal, number):
+    """The (item name, quantity, price) lines of one sale, some sales have the same item on two lines."""
+    lines = [ITEMS[(terminal + number) % len(ITEMS)], ITEMS[number % len(ITEMS)]]
+    return [(item, str(1 + (number + line) % 3), price) for line, (item, price) in enumerate(lines)]
+
+
+def make_sale(purchase_file, terminal, number):
+    """What Purchases.save_to_csv does: append the purchase lines and add the sale to the rollup, in one batch."""
+    date = f"2024-11-{1 + number % 5:02d}"
+    payment_method = PAYMENT_METHODS[(terminal + number) % len(PAYMENT_METHODS)]
+    lines = [(item, quantity, f"{int(quantity) * float(price):.2f}") for item, quantity, price in sale_lines(terminal, number)]
+    grand_total = round(sum(float(total) for _, _, total in lines), 2)
+    table = open_table('purchases', purchase_file)
+    with WriteBatch():
+        for item, quantity, total in lines:
+            table.append({
+                'Date': date, 'First Name': f'Terminal{terminal}', 'Last Name': str(number), 'Item Name': item,
+                'ID': '1', 'Quantity': quantity, 'Price': '', 'Total Cost': total, 'Grand Total': grand_total,
+                'Payment Method': payment_method, 'Prescription': 'no'
+            })
+        SalesRollup.for_file(purchase_file=purchase_file).record_sale(date, payment_method, lines)
+
+
+def sell(purchase_file, terminal):
+    """One terminal making its sales."""
+    for number in range(SALES_PER_PROCESS):
+        make_sale(purchase_file, terminal, number)
+
+
+def read_rollup(rollup):
+    """The rollup rows as a dictionary keyed by day, item and payment method, as the reports read them."""
+    rollup.ensure_built()
+    return {tuple(row[column] for column in SalesRollup.KEY): row for row in rollup.table.read_all()}
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        purchase_file = os.path.join(temp_dir, 'db_purchase_data.csv')
+        with open(purchase_file, mode='w', newline='') as file:
+            csv.writer(file).writerow(TABLES['purchases']['fields'])
+        rollup = SalesRollup.for_file(purchase_file=purchase_file)
+
+        print("\nTest 1: The first sale starts the rollup from the purchases made before it")
+        make_sale(purchase_file, 0, 0)
+        make_sale(purchase_file, 1, 0)
+        # As if these purchases had been made before the rollup existed
+        if rollup.table.backend == 'csv':
+            os.remove(rollup.rollup_file)
+        else:
+            rollup.table.write_all([])
+        make_sale(purchase_file, 2, 0)
+        rows = read_rollup(rollup)
+        print(f"{len(rows)} rollup rows after three sales: {sorted(rows)}")
+        expected = sum(len({item for item, _, _ in sale_lines(terminal, 0)}) for terminal in range(3))
+        assert sum(int(row['Transactions']) for row in rows.values()) == expected, "A sale is missing or counted twice"
+
+        print(f"\nTest 2: {PROCESSES} terminals making {SALES_PER_PROCESS} sales each")
+        processes = [Process(target=sell, args=(purchase_file, terminal)) for terminal in range(3, PROCESSES + 3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert all(process.exitcode == 0 for process in processes), "A selling process failed"
+
+        incremental = read_rollup(rollup)
+        purchase_lines = len(open_table('purchases', purchase_file).read_all())
+        rollup.rebuild()
+        rebuilt = read_rollup(rollup)
+        print(f"{purchase_lines} purchase lines, {len(incremental)} rollup rows")
+        assert incremental == rebuilt, "The rollup kept at each sale differs from the one rebuilt from the purchases"
+        print("The rollup kept at each sale is the same as the one rebuilt from every purchase.")
+
+        print("\nTest 3: The financial report reads the same numbers from the rollup")
+        from FinancialReport import FinancialReport
+        from_purchases = FinancialReport.from_csv(report_csv('purchases', purchase_file))
+        rollup.ensure_built()
+        from_rollup = FinancialReport.from_rollup(report_csv('sales_daily', rollup.rollup_file))
+        assert list(from_rollup.table_rows()) == list(from_purchases.table_rows()), "The daily sales differ"
+        assert f"{from_rollup.total_revenue:.2f}" == f"{from_purchases.total_revenue:.2f}", "The total revenue differs"
+        print(f"Total revenue ${from_rollup.total_revenue:.2f} from {len(from_rollup.sales)} rollup rows.")
+
+        print("\nTest 4: A customer buying the same again on the same day makes two purchases")
+        before = read_rollup(rollup)
+        make_sale(purchase_file, 0, 7)
+        make_sale(purchase_file, 0, 7)  # Same day, customer, items, grand total and payment method
+        incremental = read_rollup(rollup)
+        date, payment_method = f"2024-11-{1 + 7 % 5:02d}", PAYMENT_METHODS[7 % len(PAYMENT_METHODS)]
+        for item in {item for item, _, _ in sale_lines(0, 7)}:
+            key = (date, item, payment_method)
+            added = int(incremental[key]['Transactions']) - int(before[key]['Transactions'] if key in before else 0)
+            assert added == 2, f"The two purchases added {added} purchases of {item}"
+        rollup.rebuild()
+        assert read_rollup(rollup) == incremental, "Rebuilding counted the two purchases differently"
+        from_purchases = FinancialReport.from_csv(report_csv('purchases', purchase_file))
+        from_rollup = FinancialReport.from_rollup(report_csv('sales_daily', rollup.rollup_file))
+        assert list(from_rollup.table_rows()) == list(from_purchases.table_rows()), "The report counted them differently"
+        print("Both purchases were counted, at the sale, when rebuilding and in the report.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,113 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+from datetime import datetime
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# The router is checked without showing a window, the logins are kept out of the pharmacy's transaction log
+# and the fingerprint key out of the home folder
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+TEMP_DIR = tempfile.mkdtemp()
+os.environ['PHARMACY_LOG_DIR'] = os.path.join(TEMP_DIR, 'logs')
+os.environ['PHARMACY_FINGERPRINT_KEY_FILE'] = os.path.join(TEMP_DIR, 'fingerprint.key')
+
+from PyQt5.QtWidgets import QApplication, QStackedWidget, QWidget
+
+import TransactionLog
+from LoginRoles import LoginRoles
+from ScreenRouter import ScreenRouter
+from Session import ADMIN, FILL_PRESCRIPTION, REMOVE_PATIENT, Session
+from UserDirectory import UserDirectory
+
+ACCOUNTS = [
+    ('amber', 'amberpass', 'Manager'),
+    ('miguel', 'miguelpass', 'pharmacist'),
+    ('ruben', 'rubenpass', 'technician'),
+]
+
+
+class FakeScreen(QWidget):
+    # Stands in for the pages so the router can be checked without the databases behind them
+    def __init__(self, widget, session=None):
+        super().__init__()
+        self.session = session
+
+
+def write_accounts(roles_file):
+    """Create an accounts file with passwords stored the old way, as plain text."""
+    with open(roles_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(UserDirectory.FIELDNAMES)
+        for username, password, role in ACCOUNTS:
+            writer.writerow([username, f'{username}@pharmacy.com', password, role, '0', 'unlocked', ''])
+
+
+def run_tests():
+    app = QApplication.instance() or QApplication(sys.argv)
+    try:
+        roles_file = os.path.join(TEMP_DIR, 'db_user_account.csv')
+        write_accounts(roles_file)
+        login_roles = LoginRoles(roles_file=roles_file)
+
+        print("\nTest 1: Logging in returns the session of the user with the permissions of their role")
+        before = datetime.now()
+        session, message = login_roles.login('amber', 'amberpass')
+        assert isinstance(session, Session), f"Login returned {session!r}: {message}"
+        assert (session.username, session.role, session.display_name) == ('amber', 'manager', 'amber'), session
+        assert before <= session.login_time <= datetime.now(), "The login time is not the time of the login"
+        assert session.permissions == {ADMIN, REMOVE_PATIENT}
+        assert session.can(ADMIN) and not session.can(FILL_PRESCRIPTION)
+        pharmacist, _ = login_roles.login('miguel', 'miguelpass')
+        assert pharmacist.can(FILL_PRESCRIPTION) and pharmacist.can(REMOVE_PATIENT) and not pharmacist.can(ADMIN)
+        technician, _ = login_roles.login('ruben', 'rubenpass')
+        assert technician.permissions == frozenset(), "A technician was given permissions"
+        named = Session.for_account({'Username': 'ada', 'First Name': 'Ada', 'Last Name': 'Lovelace', 'Role': ' Manager '})
+        assert named.display_name == 'Ada Lovelace' and named.role == 'manager'
+        print(f"Logged in as {session.role} with {sorted(session.permissions)}.")
+
+        print("\nTest 2: A session can't be changed after login")
+        for field in ('role', 'permissions'):
+            try:
+                setattr(technician, field, 'manager' if field == 'role' else frozenset({ADMIN}))
+                assert False, f"The session's {field} was changed"
+            except AttributeError:
+                pass
+        assert technician.role == 'technician' and not technician.can(ADMIN)
+        print("The session could not be changed.")
+
+        print("\nTest 3: A wrong password or an unknown user gets no session")
+        assert login_roles.login('amber', 'wrong') == (None, "Invalid password")
+        assert login_roles.login('nobody', 'amberpass') == (None, "Invalid username")
+        login_roles.directory.flush()  # Write the failed attempt before the accounts file is removed
+        print("No session was returned.")
+
+        print("\nTest 4: The router hands the session to the user's screens and deletes them on logout")
+        widget = QStackedWidget()
+        router = ScreenRouter.for_widget(widget)
+        router.SCREENS = {
+            'login': (__name__, 'FakeScreen', (800, 525), False),
+            'dashboard': (__name__, 'FakeScreen', (1050, 600), True),
+        }
+        try:
+            router.show('dashboard')
+            assert False, "A user's screen was shown without a session"
+        except RuntimeError:
+            pass
+        dashboard = router.start_session(session)
+        assert dashboard.session is session and router.session is session
+        login_screen = router.end_session()
+        assert router.session is None and 'dashboard' not in router.screens
+        assert login_screen.session is None and widget.indexOf(dashboard) == -1, "The dashboard was kept after logout"
+        assert router.start_session(pharmacist).session is pharmacist, "The next user got the previous session"
+        print("Each session got its own dashboard.")
+    finally:
+        TransactionLog.flush()  # The log is written in the background, finish it before its folder is removed
+        shutil.rmtree(TEMP_DIR)
+
+
+if __name__ == "__main__":
+    run_tests()
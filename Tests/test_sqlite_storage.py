@@ -0,0 +1,118 @@
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# Every table opened by this test uses the SQLite backend
+os.environ['PHARMACY_STORAGE'] = 'sqlite'
+
+import Storage
+from AtomicFile import WriteBatch
+from Storage import DATABASE_NAME, TABLES
+from Inventory import Inventory
+from Prescriptions import Prescriptions
+
+DB_FILES = os.path.join(os.path.dirname(__file__), '..', 'DBFiles')
+
+
+def read_csv(csv_file, fields):
+    """Every row of a CSV file with the columns of its table."""
+    with open(csv_file, mode='r', newline='') as file:
+        return [{field: row.get(field) or '' for field in fields} for row in csv.DictReader(file)]
+
+
+def run_tests():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        originals = {}
+        for name, table in TABLES.items():
+            shutil.copy(os.path.join(DB_FILES, table['file']), temp_dir)
+            originals[name] = read_csv(os.path.join(temp_dir, table['file']), table['fields'])
+
+        print("\nTest 1: Every CSV file is imported into one SQLite database with its indexes")
+        Storage.import_csv_tables(temp_dir)
+        connection = sqlite3.connect(os.path.join(temp_dir, DATABASE_NAME))
+        for name, table in TABLES.items():
+            count = connection.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
+            assert count == len(originals[name]), f"{name} has {count} rows instead of {len(originals[name])}"
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for expected in ('idx_inventory_ID', 'idx_inventory_Item', 'idx_prescriptions_Prescription_Number',
+                         'idx_user_accounts_Username', 'idx_patients_FirstName_LastName_DateOfBirth'):
+            assert expected in indexes, f"Index {expected} is missing"
+        plan = ' '.join(str(row) for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM "inventory" WHERE "ID" = ?', ('3',)
+        ))
+        assert 'idx_inventory_ID' in plan, f"Looking up an ID scans the table: {plan}"
+        connection.close()
+        print(f"Imported {len(TABLES)} tables, a lookup by ID uses its index.")
+
+        print("\nTest 2: Inventory and prescriptions are changed in the database, not in the CSV files")
+        inventory_file = os.path.join(temp_dir, TABLES['inventory']['file'])
+        prescription_file = os.path.join(temp_dir, TABLES['prescriptions']['file'])
+        inventory = Inventory(inventory_file=inventory_file)
+        prescriptions = Prescriptions(prescription_file=prescription_file)
+        assert inventory.store.table.backend == 'sqlite' and prescriptions.store.table.backend == 'sqlite'
+
+        item = originals['inventory'][2]
+        assert inventory.sell_item(item['ID'], 3)
+        inventory.update_stock('Melatonin', '9001', 40, '4.50', '2030-05-01')
+        prescription = originals['prescriptions'][0]
+        assert prescriptions.update_status(prescription['Prescription_Number'], 'Filled', 'Tester')
+        prescriptions.add_prescription('Ada', 'Lovelace', '12/10/1815', '9002', 'Melatonin', 10)
+        assert read_csv(inventory_file, TABLES['inventory']['fields']) == originals['inventory'], "The CSV file was written"
+        print("The CSV files are unchanged while the database holds the changes.")
+
+        print("\nTest 3: Exporting writes the changed tables back to CSV, everything else is as imported")
+        Storage.export_csv_tables(temp_dir)
+        expected = {name: [dict(row) for row in rows] for name, rows in originals.items()}
+        expected['inventory'][2]['Quantity'] = str(int(item['Quantity']) - 3)
+        new_lot = read_csv(inventory_file, TABLES['inventory']['fields'])[-1]
+        assert new_lot['Item'] == 'Melatonin' and new_lot['Quantity'] == '40', "The new lot was not exported"
+        expected['inventory'].append(new_lot)
+        expected['prescriptions'][0].update({'Status': 'Filled', 'Pharmacist': 'Tester'})
+        expected['prescriptions'].append({
+            'Patient_First_Name': 'Ada', 'Patient_Last_Name': 'Lovelace', 'Patient_DOB': '12/10/1815',
+            'Prescription_Number': '9002', 'Medication': 'Melatonin', 'Quantity': '10', 'Status': 'Pending',
+            'Pharmacist': ''
+        })
+        for name, table in TABLES.items():
+            exported = read_csv(os.path.join(temp_dir, table['file']), table['fields'])
+            assert exported == expected[name], f"{name} was not exported as expected"
+        print("Every table came back with exactly the changes made.")
+
+        print("\nTest 4: Each thread has its own connection, and every write of this process changes the signature")
+        table = Storage.open_table('inventory', inventory_file)
+        other = Storage.open_table('inventory', inventory_file)  # Another store's table, on the same connection
+        signature = table.signature()
+        other.update({'ID': item['ID']}, {'Quantity': '7'})
+        assert table.signature() != signature, "A write through this thread's connection left the signature as it was"
+
+        def read_quantity(quantities):
+            quantities.append(table.find_one(ID=item['ID'])['Quantity'])
+
+        during, after = [], []
+        with WriteBatch():
+            table.update({'ID': item['ID']}, {'Quantity': '0'})
+            signature = table.signature()
+            reader = threading.Thread(target=read_quantity, args=(during,))
+            reader.start()
+            reader.join()
+        reader = threading.Thread(target=read_quantity, args=(after,))
+        reader.start()
+        reader.join()
+        assert during == ['7'], f"Another thread saw the rows of a batch that was still open: {during}"
+        assert after == ['0'], f"Another thread did not see the committed batch: {after}"
+        assert table.signature() == signature, "The signature changed without another write"
+        print("The open batch was only seen by its own thread, until it was committed.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,69 @@
+import sys
+import os
+import subprocess
+
+# Project root, main.py adds the src folder to the path itself
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Everything imported before the login window can be shown should load within this many milliseconds
+# (summed over every module, as reported by python -X importtime). Override with STARTUP_IMPORT_BUDGET_MS.
+IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 300))
+
+# Modules that must not be imported until the user needs them
+DEFERRED_MODULES = [
+    'pandas', 'fpdf', 'webbrowser', 'sqlite3', 'resources_rc', 'FinancialReport', 'PDFTable', 'ReportJob', 'ReportCache', 'SalesRollup', 'ColumnarArchive',
+    'Dashboard', 'Reports', 'AdminUI', 'Purchases', 'InventoryUI', 'FillPrescriptionUI', 'PatientUI', 'PrescriptionUI',
+]
+
+# Does what main.py does up to showing the login window, without starting the event loop
+STARTUP_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import main
+from PyQt5.QtWidgets import QApplication, QStackedWidget
+from ScreenRouter import ScreenRouter
+app = QApplication(sys.argv)
+ScreenRouter.for_widget(QStackedWidget()).show('login')
+"""
+
+
+def import_times():
+    """Start the application in a fresh interpreter and return {module: (self ms, cumulative ms)}."""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    env.pop('PHARMACY_STORAGE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(root=ROOT_DIR)],
+                            env=env, cwd=os.path.join(ROOT_DIR, 'src'), capture_output=True, text=True)
+    assert result.returncode == 0, f"The application failed to start:\n{result.stderr}"
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return times
+
+
+def run_tests():
+    # The first run may compile .pyc files, measure the second one
+    import_times()
+    times = import_times()
+
+    print("\nTest 1: Heavy modules are not imported before the login window")
+    imported = [name for name in DEFERRED_MODULES if name in times or f'src.{name}' in times]
+    print(f"Imported at startup: {imported or 'none of them'}")
+    assert not imported, f"These modules should only be imported when first used: {imported}"
+
+    print("\nTest 2: Startup imports stay within the budget")
+    total = sum(self_ms for self_ms, _ in times.values())
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    for name, (self_ms, _) in slowest:
+        print(f"  {name}: {self_ms:.1f} ms")
+    print(f"Total: {total:.1f} ms over {len(times)} modules (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    assert total <= IMPORT_BUDGET_MS, "Startup imports are over budget"
+    print("Cold start is within budget.")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,128 @@
+import sys
+import os
+import csv
+import shutil
+import tempfile
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# The models are checked without showing a window
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QModelIndex, Qt
+from PyQt5.QtWidgets import QApplication
+
+from AtomicFile import WriteBatch
+from Inventory import Inventory
+from InventoryStore import InventoryStore
+from InventoryTableModel import InventoryTableModel
+from Prescriptions import Prescriptions
+from PrescriptionTableModel import PrescriptionTableModel
+
+PRESCRIPTION_COLUMNS = [('Prescription Number', 'Prescription_Number'), ('Medication', 'Medication'), ('Status', 'Status')]
+
+LOTS = [
+    ('Tylenol', '3', '50', '2031-01-01', ''),
+    ('Advil', '1', '10', '2030-01-01', ''),
+    ('Gatorade', '4', '200', 'No Expiration Date', ''),
+    ('Advil', '2', '5', '2029-06-01', ''),
+    ('Aspirin', '5', '80', '2028-01-01', '2024-11-26'),
+]
+
+
+def write_inventory(inventory_file):
+    """Create an inventory with four lots and one removed lot."""
+    with open(inventory_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=InventoryStore.FIELDNAMES)
+        writer.writeheader()
+        for item, item_id, quantity, expiration_date, date_removed in LOTS:
+            writer.writerow({
+                'Item': item, 'ID': item_id, 'Quantity': quantity, 'Price': '1.00', 'Expiration Date': expiration_date,
+                'Date Added': '2024-01-01', 'Date Updated': '', 'Date Removed': date_removed
+            })
+
+
+def column(model, column_number):
+    """The values shown in one column of a model, top to bottom."""
+    return [model.data(model.index(row, column_number)) for row in range(model.rowCount())]
+
+
+def run_tests():
+    app = QApplication.instance() or QApplication(sys.argv)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        prescriptions = Prescriptions(prescription_file=os.path.join(temp_dir, 'db_prescriptions.csv'))
+        with WriteBatch():
+            for number in range(1, 376):
+                prescriptions.add_prescription('Ada', 'Lovelace', '12/10/1815', str(number), 'Advil', 10)
+                if number % 3 == 0:
+                    prescriptions.update_status(str(number), 'Picked Up')
+
+        print("\nTest 1: The prescription table reads one page, and the next one only when the view asks for it")
+        model = PrescriptionTableModel(prescriptions, PRESCRIPTION_COLUMNS)
+        assert model.rowCount() == 0 and not model.canFetchMore(QModelIndex()), "An empty model has rows to fetch"
+        model.set_filter({'Status': 'Pending'})
+        page_size = PrescriptionTableModel.PAGE_SIZE
+        assert model.rowCount() == page_size, f"The first page has {model.rowCount()} rows"
+        counts = [model.rowCount()]
+        while model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+            counts.append(model.rowCount())
+        assert counts == [page_size, 2 * page_size, 250], f"Rows after each page: {counts}"
+        assert model.columnCount() == 3 and model.headerData(1, Qt.Horizontal) == 'Medication'
+        assert model.data(model.index(0, 0)) == '1' and model.data(model.index(249, 0)) == '374'
+        print(f"Rows after each page: {counts}")
+
+        print("\nTest 2: Changing the filter starts again at the first page, a shown row can be updated in place")
+        changed = []
+        model.dataChanged.connect(lambda top_left, bottom_right: changed.append((top_left.row(), bottom_right.column())))
+        model.update_row(0, {'Status': 'Filled'})
+        assert model.data(model.index(0, 2)) == 'Filled' and changed == [(0, 2)]
+        model.set_filter({'Status': 'Picked Up'})
+        assert model.rowCount() == page_size and model.data(model.index(0, 0)) == '3'
+        model.clear()
+        assert model.rowCount() == 0 and model.row_data(0) is None
+        print("The table was reset for the new filter and the update was shown without reloading.")
+
+        print("\nTest 3: The inventory table shows the store's own rows, without the removed lots")
+        inventory_file = os.path.join(temp_dir, 'db_inventory.csv')
+        write_inventory(inventory_file)
+        inventory = Inventory(inventory_file=inventory_file)
+        model = InventoryTableModel(inventory)
+        assert column(model, 1) == ['3', '1', '4', '2'], f"Shown IDs {column(model, 1)}"
+        shown_rows = [row for row in inventory.store.rows if not row['Date Removed']]
+        assert all(shown is stored for shown, stored in zip(model.rows, shown_rows)), "The rows were copied"
+        print(f"{model.rowCount()} lots shown straight from the store.")
+
+        print("\nTest 4: The search box and the header sort go through the proxy")
+        proxy = model.create_proxy()
+        proxy.setFilterFixedString('advil')
+        assert column(proxy, 1) == ['1', '2'], f"Search found {column(proxy, 1)}"
+        proxy.setFilterFixedString('2029')
+        assert column(proxy, 1) == ['2'], "The search does not look at every column"
+        proxy.setFilterFixedString('')
+        proxy.sort(2, Qt.AscendingOrder)
+        assert column(proxy, 2) == ['5', '10', '50', '200'], f"Quantities sorted as {column(proxy, 2)}"
+        assert column(model, 1) == ['3', '1', '4', '2'], "Sorting reordered the model"
+        print(f"Sorted by quantity: {column(proxy, 2)}")
+
+        print("\nTest 5: Edits stay in the table until they are saved")
+        assert model.setData(model.index(1, 2), '99')
+        assert model.row_values(1)['Quantity'] == '99' and inventory.get_item('1')['Quantity'] == '10'
+        model.refresh()
+        assert model.data(model.index(1, 2)) == '10', "Refreshing kept an unsaved edit"
+        row = model.add_empty_row()
+        for column_number, value in enumerate(['Melatonin', '6', '40', '4.50', '2030-05-01']):
+            model.setData(model.index(row, column_number), value)
+        values = model.row_values(row)
+        inventory.update_stock(values['Item'], values['ID'], values['Quantity'], values['Price'], values['Expiration Date'])
+        model.refresh()
+        assert column(model, 0)[-1] == 'Melatonin' and model.rowCount() == 5, "The saved lot is not shown"
+        print("The unsaved edit was dropped, the saved lot is shown after a refresh.")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
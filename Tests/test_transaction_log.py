@@ -0,0 +1,113 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import subprocess
+from datetime import date, datetime
+
+# Add the src directory to the system path
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(SRC_DIR)
+
+# Terminals logging at the same time and the events each one logs
+PROCESSES = 4
+EVENTS = 2000
+
+# Logs EVENTS purchases as one terminal, the log directory comes from PHARMACY_LOG_DIR
+WORKER_SCRIPT = """
+import sys
+sys.path.insert(0, {src!r})
+import TransactionLog
+for number in range(int(sys.argv[1])):
+    TransactionLog.log(TransactionLog.PURCHASE, sys.argv[2], f"Purchase by user: {{sys.argv[2]}}", item_ids=[str(number)])
+"""
+
+
+def run_tests():
+    log_dir = tempfile.mkdtemp()
+    try:
+        env = dict(os.environ, PHARMACY_LOG_DIR=log_dir)
+        segment_dir = os.path.join(log_dir, 'transactions')
+
+        print("\nTest 1: Several terminals log at the same time")
+        workers = [
+            subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT.format(src=SRC_DIR), str(EVENTS), f'user{number}'], env=env)
+            for number in range(PROCESSES)
+        ]
+        for worker in workers:
+            assert worker.wait() == 0, "A terminal failed to log its events"
+
+        # Every event was logged today, so they are all in one segment
+        segments = [name for name in os.listdir(segment_dir) if name.endswith('.log')]
+        assert len(segments) == 1, f"Expected one segment for today, found {segments}"
+        with open(os.path.join(segment_dir, segments[0]), mode='r') as file:
+            records = [json.loads(line) for line in file]  # Fails if two lines were written into each other
+        print(f"{len(records)} events logged, every line is a complete JSON record.")
+        assert len(records) == PROCESSES * EVENTS, "Events were lost"
+        for number in range(PROCESSES):
+            ids = [record['item_ids'][0] for record in records if record['user'] == f'user{number}']
+            assert ids == [str(event) for event in range(EVENTS)], f"user{number}'s events are missing or out of order"
+        assert all(record['action'] == 'purchase' and record['time'] for record in records)
+        print("Every terminal's events are there in the order they were logged.")
+
+        print("\nTest 2: A log written before the log was JSON and split by day is still read")
+        with open(os.path.join(log_dir, 'transaction.log'), mode='w') as file:
+            file.write("2024-11-25 09:02:11,120 - Login successful for user: bennett\n")
+            file.write("2024-11-26 22:17:19 - USER: bennett - ACTION: PURCHASE\n")
+            file.write("2024-11-26 22:18:39,337 - Login successful for user: rubenG\n")
+        import TransactionLog
+        records = TransactionLog.read_records(date(2024, 11, 26), date(2024, 11, 26), segment_dir=segment_dir)
+        print(records)
+        assert records[0] == {'time': '2024-11-26T22:17:19.000', 'user': '', 'action': '',
+                              'message': 'USER: bennett - ACTION: PURCHASE'}
+        assert [record['message'] for record in records] == [
+            'USER: bennett - ACTION: PURCHASE', 'Login successful for user: rubenG'
+        ]
+
+        print("\nTest 3: Splitting the old log by day gives the same events")
+        everything = TransactionLog.read_records(segment_dir=segment_dir)
+        TransactionLog.split_legacy_log(segment_dir)
+        assert not os.path.exists(os.path.join(log_dir, 'transaction.log')), "The old log was not removed"
+        assert sorted(os.listdir(segment_dir))[:2] == ['2024-11-25.log', '2024-11-26.log']
+        split = TransactionLog.read_records(segment_dir=segment_dir)
+        assert sorted(map(json.dumps, split)) == sorted(map(json.dumps, everything)), "Events changed when split"
+        evening = TransactionLog.read_records(datetime(2024, 11, 26, 22, 18), datetime(2024, 11, 26, 23, 0),
+                                              segment_dir=segment_dir)
+        assert [record['message'] for record in evening] == ['Login successful for user: rubenG']
+        print(f"{len(split)} events in {len(os.listdir(segment_dir)) - 1} day segments.")
+
+        print("\nTest 4: Flushing while other threads log loses no event and leaves the writer running")
+        TransactionLog.SEGMENT_DIR = os.path.join(log_dir, 'threads')  # Read when the writer starts
+
+        def log_events(number):
+            for event in range(EVENTS):
+                TransactionLog.log(TransactionLog.PURCHASE, f'thread{number}', "Purchase", item_ids=[str(event)])
+
+        threads = [threading.Thread(target=log_events, args=(number,)) for number in range(PROCESSES)]
+        for thread in threads:
+            thread.start()
+        flushes = 0
+        while any(thread.is_alive() for thread in threads):
+            TransactionLog.flush()
+            flushes += 1
+        for thread in threads:
+            thread.join()
+        listener = TransactionLog._listener
+        TransactionLog.log(TransactionLog.LOGIN, 'last', "Login successful for user: last")
+        TransactionLog.flush()
+        assert TransactionLog._listener is listener, "Flushing stopped the writer"
+        records = TransactionLog.read_records(segment_dir=TransactionLog.SEGMENT_DIR)
+        assert records[-1]['user'] == 'last', "flush() returned before the last event was written"
+        assert len(records) == PROCESSES * EVENTS + 1, f"{PROCESSES * EVENTS + 1 - len(records)} events were lost"
+        for number in range(PROCESSES):
+            ids = [record['item_ids'][0] for record in records if record['user'] == f'thread{number}']
+            assert ids == [str(event) for event in range(EVENTS)], f"thread{number}'s events are missing or out of order"
+        print(f"{len(records)} events logged by {PROCESSES} threads while flushing {flushes} times, none lost.")
+    finally:
+        shutil.rmtree(log_dir)
+
+
+if __name__ == "__main__":
+    run_tests()
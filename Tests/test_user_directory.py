@@ -0,0 +1,163 @@
+import sys
+import os
+import csv
+import time
+import shutil
+import tempfile
+from multiprocessing import Process
+
+# Add the src directory to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# Keep the logins made by the test out of the pharmacy's transaction log, and its fingerprint key out of the home folder
+TEMP_DIR = tempfile.mkdtemp()
+os.environ['PHARMACY_LOG_DIR'] = os.path.join(TEMP_DIR, 'logs')
+os.environ['PHARMACY_FINGERPRINT_KEY_FILE'] = os.path.join(TEMP_DIR, 'fingerprint.key')
+
+import TransactionLog
+from LoginRoles import LoginRoles
+from Storage import open_table
+from UserDirectory import UserDirectory
+
+ACCOUNTS = [
+    ('amber', 'amber@pharmacy.com', 'amberpass', 'manager'),
+    ('miguel', 'miguel@pharmacy.com', 'miguelpass', 'pharmacist'),
+    ('ruben', 'ruben@pharmacy.com', 'rubenpass', 'technician'),
+]
+
+
+def write_accounts(roles_file):
+    """Create an accounts file with passwords stored the old way, as plain text."""
+    with open(roles_file, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(UserDirectory.FIELDNAMES)
+        for username, email, password, role in ACCOUNTS:
+            writer.writerow([username, email, password, role, '0', 'unlocked', ''])
+
+
+def add_account(roles_file, username):
+    """Another terminal creating an account."""
+    LoginRoles(roles_file=roles_file).create_account('technician', username, f'{username}pass', f'{username}@pharmacy.com')
+
+
+def count_reads(table):
+    """Count the reads of the whole accounts table, returns the list the reads are added to."""
+    reads = []
+    read_all = table.read_all
+    table.read_all = lambda: (reads.append(1), read_all())[1]
+    return reads
+
+
+def count_writes(table):
+    """Count the writes to the accounts table, returns the list the names of the writes are added to."""
+    writes = []
+    inside = []  # The CSV table's update writes through write_all, only the outer call is counted
+    for name in ('append', 'write_all', 'update', 'update_many'):
+        def counted(*args, write=getattr(table, name), name=name):
+            if not inside:
+                writes.append(name)
+            inside.append(name)
+            try:
+                return write(*args)
+            finally:
+                inside.pop()
+        setattr(table, name, counted)
+    return writes
+
+
+def stored_counters(roles_file):
+    """Locked counter and status of every account as stored."""
+    table = open_table('user_accounts', roles_file)
+    return {row['Username']: (row['Locked_counter'], row['Locked_status']) for row in table.read_all()}
+
+
+def run_tests():
+    try:
+        roles_file = os.path.join(TEMP_DIR, 'db_user_account.csv')
+        write_accounts(roles_file)
+
+        print("\nTest 1: Every screen's LoginRoles shares one directory and lookups don't read the accounts again")
+        login_roles = LoginRoles(roles_file=roles_file)
+        assert LoginRoles(roles_file=roles_file).directory is login_roles.directory, "Each LoginRoles has its own copy"
+        reads = count_reads(login_roles.directory.table)
+        assert login_roles.find_user_role('miguel') == 'pharmacist'
+        for _ in range(100):
+            assert login_roles.account_exists('amber') and not login_roles.account_exists('nobody')
+            assert login_roles.get_user_data('ruben')['Email'] == 'ruben@pharmacy.com'
+            assert login_roles.password_exists('rubenpass') and not login_roles.password_exists('unused')
+        assert len(reads) <= 1, f"The accounts were read {len(reads)} times"
+        user = login_roles.get_user_data('amber')
+        user['Role'] = 'technician'
+        assert login_roles.find_user_role('amber') == 'manager', "A lookup gave out the directory's own row"
+        print(f"400 lookups read the accounts {len(reads)} time(s).")
+
+        print("\nTest 2: An account created by another terminal is seen, a removed one is gone")
+        process = Process(target=add_account, args=(roles_file, 'grace'))
+        process.start()
+        process.join()
+        assert process.exitcode == 0, "The other terminal failed"
+        assert login_roles.find_user_role('grace') == 'technician', "The new account was not seen"
+        assert login_roles.password_exists('gracepass'), "The new account's password is not known"
+        assert login_roles.remove_account('ruben')
+        assert not login_roles.account_exists('ruben') and not login_roles.password_exists('rubenpass')
+        print("The directory followed the changes.")
+
+        print("\nTest 3: A login that doesn't change the account writes nothing")
+        directory = login_roles.directory
+        directory.FLUSH_INTERVAL = 3600  # Failed attempts are only written when they lock an account or are flushed
+        writes = count_writes(directory.table)
+        session, message = login_roles.login('amber', 'amberpass')
+        assert session is not None, message
+        assert writes == ['update'], f"The first login should only store the hashed password, it made {writes}"
+        del writes[:]
+        for _ in range(3):
+            assert login_roles.login('amber', 'amberpass')[0] is not None
+        login_roles.reset_locked_counter('amber')
+        assert writes == [], f"Logins with nothing to change made {writes}"
+        print("Three more logins made no writes.")
+
+        print("\nTest 4: Failed attempts are kept in memory and written together")
+        for username, attempts in (('miguel', 3), ('grace', 1)):
+            for _ in range(attempts):
+                assert login_roles.login(username, 'wrong') == (None, "Invalid password")
+        assert writes == [], f"The failed attempts were written one at a time: {writes}"
+        assert login_roles.get_user_data('miguel')['Locked_counter'] == '3', "The waiting attempts are not counted"
+        assert stored_counters(roles_file)['miguel'] == ('0', 'unlocked')
+        directory.flush()
+        assert writes == ['update_many'], f"Flushing made {writes}"
+        counters = stored_counters(roles_file)
+        assert counters['miguel'] == ('3', 'unlocked') and counters['grace'] == ('1', 'unlocked'), counters
+        login_roles.login('miguel', 'miguelpass')
+        assert stored_counters(roles_file)['miguel'] == ('0', 'unlocked'), "A successful login did not reset the counter"
+        print(f"Four failed attempts on two accounts were written in one {writes[0]}.")
+
+        print("\nTest 5: The attempt that reaches the limit locks the account right away")
+        del writes[:]
+        for _ in range(UserDirectory.LOCKOUT_LIMIT - 2):
+            login_roles.login('grace', 'wrong')
+        assert writes == [] and stored_counters(roles_file)['grace'] == ('1', 'unlocked')
+        login_roles.login('grace', 'wrong')  # The fifth attempt counting the one already stored
+        assert writes == ['update_many'], f"Locking the account made {writes}"
+        assert stored_counters(roles_file)['grace'] == ('5', 'locked'), "The account was not locked on disk"
+        assert login_roles.login('grace', 'gracepass') == (None, "Account locked due to too many failed attempts")
+        assert writes == ['update_many'], "The refused login wrote to the accounts"
+        print("The account was locked on disk by the attempt that reached the limit.")
+
+        print("\nTest 6: A failed attempt is written once it has waited FLUSH_INTERVAL, without another attempt")
+        del writes[:]
+        directory.FLUSH_INTERVAL = 0.2
+        assert login_roles.login('amber', 'wrong') == (None, "Invalid password")
+        assert writes == [] and stored_counters(roles_file)['amber'] == ('0', 'unlocked'), "The attempt was written right away"
+        deadline = time.monotonic() + 5
+        while stored_counters(roles_file)['amber'] == ('0', 'unlocked') and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stored_counters(roles_file)['amber'] == ('1', 'unlocked'), "The attempt was not written after the interval"
+        assert writes == ['update_many'], f"Writing the attempt made {writes}"
+        print("The attempt was written by the timer.")
+    finally:
+        TransactionLog.flush()  # The log is written in the background, finish it before its folder is removed
+        shutil.rmtree(TEMP_DIR)
+
+
+if __name__ == "__main__":
+    run_tests()
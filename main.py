@@ -1,6 +1,11 @@
 from PyQt5.QtWidgets import QApplication, QStackedWidget, QDesktopWidget
 import sys
-from src.LogInGUI import MainUI  # Import MainUI from LogInGUI.py in the src folder
+import os
+
+# Add the 'src' folder to the Python path, the screens are imported from there by the ScreenRouter when first shown
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from ScreenRouter import ScreenRouter
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)  # QApplication instance is created here
@@ -8,9 +13,8 @@ if __name__ == "__main__":
     # Create the QStackedWidget
     widget = QStackedWidget()
 
-    # Create the main window (login UI) and pass the widget to it
-    mainwindow = MainUI(widget)
-    widget.addWidget(mainwindow)
+    # Create the main window (login UI) through the router so every screen shares the same navigation
+    mainwindow = ScreenRouter.for_widget(widget).show('login')
 
     # Get screen size using QDesktopWidget
     screen = QDesktopWidget().screenGeometry()
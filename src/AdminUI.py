@@ -1,22 +1,21 @@
 # Import necessary libraries for PyQt5 and system operations
-import os
 from PyQt5.QtWidgets import QMainWindow, QMessageBox
-from PyQt5.uic import loadUi
+from UILoader import load_ui
 from src.LoginRoles import LoginRoles
 
 class AdminUI(QMainWindow):
-    #Constructor class that accepts the widget and username as parameters
-    def __init__(self, widget, username):
+    #Constructor class that accepts the widget and the session of the logged in user as parameters
+    def __init__(self, widget, session):
         super(AdminUI, self).__init__()
         self.widget = widget
-        self.username = username
+        self.session = session
+        self.username = session.username
         
         #create an instance of the LoginRoles class
         self.user_management = LoginRoles()
 
         # Load the UI file relative to the project's root directory
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'AdminUI.ui')
-        loadUi(ui_path, self)
+        load_ui('AdminUI.ui', self)
 
         # Set the window title and dimensions
         self.widget.setFixedSize(1000, 500)
@@ -99,10 +98,6 @@ class AdminUI(QMainWindow):
         
 
     def cancel(self):
-        # Importing MainUI inside the function to avoid a circular import
-        from src.Dashboard import Dashboard  
-
-        # Always create a new instance of the dashboard to avoid data leakage
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
+        # Return to the dashboard
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
@@ -0,0 +1,193 @@
+# Import necessary libraries for system operations
+import csv
+import io
+import os
+import threading
+
+
+def _fsync_directory(directory):
+    # Make the rename itself durable, directories can't be opened for syncing on Windows
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write_function, newline=''):
+    # Replace the file at path with what write_function writes into the open file object
+    # The data goes to a temporary file in the same directory which is flushed to disk and
+    # then renamed over the original, so readers see either the old or the new file, never half of one
+    import tempfile  # Not needed until the first write, keeps it off the startup path
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode='w', newline=newline) as file:
+            write_function(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_csv(path, fieldnames, rows):
+    # Atomically replace a CSV file with a header and the given rows
+    def write_rows(file):
+        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore', restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+    atomic_write(path, write_rows)
+
+
+def durable_append(path, data):
+    # Append text to a file and force it to disk before returning
+    with open(path, mode='a', newline='') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def format_csv_rows(fieldnames, rows):
+    # Returns the CSV text for the rows without a header
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore', restval='')
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+# Batches that are currently open, per thread
+_active = threading.local()
+
+
+def current_batch():
+    # Returns the WriteBatch open in this thread, or None
+    return getattr(_active, 'batch', None)
+
+
+class WriteBatch:
+    # Groups several logical updates into one durable write per file:
+    #
+    #     with WriteBatch():
+    #         prescriptions.update_status(...)
+    #         inventory.fill_prescription(...)
+    #
+    # Writes made inside the block are kept in memory (and visible to reads made inside the block)
+    # and are written when the block ends. If the block raises, nothing is written.
+    # Opening a batch inside another one simply joins the outer batch.
+    # The tables written inside the block stay locked until it ends, so never wait for the user inside one.
+
+    def __init__(self):
+        self._outer = None
+        self.rewrites = {}  # path -> (fieldnames, rows) for files that will be replaced
+        self.appends = {}  # path -> (fieldnames, rows) for rows that will be appended
+        self.deferred = {}  # owner -> (flush, discard) callbacks run when the batch ends
+        self.held = {}  # lock -> release callback, called once everything has been written
+
+
+    def __enter__(self):
+        self._outer = current_batch()
+        if self._outer is not None:
+            return self._outer
+        _active.batch = self
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._outer is not None:
+            return False  # The outer batch commits everything
+
+        _active.batch = None
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+    def stage_rewrite(self, path, fieldnames, rows):
+        # Remember the full new contents of a file, this replaces anything staged for it before
+        path = os.path.abspath(path)
+        self.appends.pop(path, None)
+        self.rewrites[path] = (list(fieldnames), [dict(row) for row in rows])
+
+
+    def stage_append(self, path, fieldnames, row):
+        # Remember a row to append to a file
+        path = os.path.abspath(path)
+        if path in self.rewrites:
+            self.rewrites[path][1].append(dict(row))
+        else:
+            self.appends.setdefault(path, (list(fieldnames), []))[1].append(dict(row))
+
+
+    def staged_rows(self, path):
+        # Returns (rows, appended_rows) staged for a file. rows is None if the file is not being replaced
+        path = os.path.abspath(path)
+        if path in self.rewrites:
+            return [dict(row) for row in self.rewrites[path][1]], []
+        if path in self.appends:
+            return None, [dict(row) for row in self.appends[path][1]]
+        return None, []
+
+
+    def defer(self, owner, flush, discard=None):
+        # Ask for flush() to be called once when the batch commits, or discard() if it is abandoned
+        self.deferred.setdefault(owner, (flush, discard))
+
+
+    def holds(self, lock):
+        # Returns True if the batch is already keeping the lock
+        return lock in self.held
+
+
+    def hold(self, lock, release):
+        # Keep a lock until the batch has been written or discarded
+        self.held[lock] = release
+
+
+    def commit(self):
+        # Write everything that was staged, one write per file
+        # If a write fails, the owners not flushed yet are discarded so they don't keep changes that were never written
+        flushed = set()
+        try:
+            for owner, (flush, _) in self.deferred.items():
+                flush()
+                flushed.add(owner)
+            for path, (fieldnames, rows) in self.rewrites.items():
+                atomic_write_csv(path, fieldnames, rows)
+            for path, (fieldnames, rows) in self.appends.items():
+                durable_append(path, format_csv_rows(fieldnames, rows))
+        except BaseException:
+            for owner, (_, discard) in self.deferred.items():
+                if owner not in flushed and discard:
+                    discard()
+            raise
+        finally:
+            self._clear()
+
+
+    def discard(self):
+        # Drop everything that was staged
+        try:
+            for _, discard in self.deferred.values():
+                if discard:
+                    discard()
+        finally:
+            self._clear()
+
+
+    def _clear(self):
+        self.rewrites = {}
+        self.appends = {}
+        self.deferred = {}
+
+        # Release the locks in the opposite order they were taken
+        held, self.held = self.held, {}
+        for release in reversed(list(held.values())):
+            release()
@@ -0,0 +1,204 @@
+# Import necessary libraries for system operations
+import os
+import sys
+from datetime import datetime, time, timedelta
+import pandas as pd  # Only imported by the archive export and the reports, which are loaded on first use
+from Storage import DB_DIR, TABLES, report_csv, table_files
+
+# Directory the archive is written to, override with PHARMACY_ARCHIVE_DIR
+ARCHIVE_DIR = os.environ.get('PHARMACY_ARCHIVE_DIR', os.path.join(DB_DIR, 'archive'))
+
+# File name of the rows without a date in a table partitioned by month
+UNDATED = 'undated'
+
+# Tables written to the archive: the column each one is partitioned by month on (None for a single file),
+# its date columns and the types of its other columns. The types are fixed so every month has the same
+# schema and reading the archive back never has to infer them.
+# append_only: rows are only ever added, dated the day they are added, so the archive keeps covering the days
+# before it was written (see covers())
+ARCHIVE_TABLES = {
+    'purchases': {
+        'month_column': 'Date',
+        'append_only': True,
+        'dates': ['Date'],
+        'dtypes': {
+            'First Name': 'str', 'Last Name': 'str', 'Item Name': 'category', 'ID': 'str',
+            'Quantity': 'float64', 'Price': 'float64', 'Total Cost': 'float64', 'Grand Total': 'float64',
+            'Payment Method': 'category', 'Prescription': 'category',
+        },
+    },
+    'inventory': {
+        'month_column': 'Date Updated',
+        'dates': ['Expiration Date', 'Date Added', 'Date Updated', 'Date Removed'],
+        'dtypes': {'Item': 'str', 'ID': 'str', 'Quantity': 'float64', 'Price': 'float64'},
+    },
+    'prescriptions': {
+        'month_column': None,  # Prescriptions have no date of their own, only the patient's date of birth
+        'dates': ['Patient_DOB'],
+        'dtypes': {
+            'Patient_First_Name': 'str', 'Patient_Last_Name': 'str', 'Prescription_Number': 'str',
+            'Medication': 'category', 'Quantity': 'float64', 'Status': 'category', 'Pharmacist': 'category',
+        },
+    },
+}
+
+# The archive is written and read with pyarrow, which is only needed for it
+MISSING_PYARROW = "The archive is written in Parquet, which needs pyarrow. Install it with: pip install pyarrow"
+
+
+def export_table(name, csv_file=None, archive_dir=None):
+    # Write a table to the archive as Parquet, one file per month of its month column, and return the
+    # number of rows written. Months that no longer have rows are removed, so the archive mirrors the table.
+    _require_pyarrow()
+    table = ARCHIVE_TABLES[name]
+    csv_file = csv_file or os.path.join(DB_DIR, TABLES[name]['file'])
+    table_dir = os.path.join(archive_dir or ARCHIVE_DIR, name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    rows = typed_rows(name, pd.read_csv(report_csv(name, csv_file), dtype=str, keep_default_na=False))
+    if table['month_column'] is None:
+        partitions = {name: rows}
+    else:
+        months = rows[table['month_column']].dt.strftime('%Y-%m').fillna(UNDATED)
+        partitions = {month: part for month, part in rows.groupby(months, sort=True)}
+
+    for partition, part in partitions.items():
+        _write_parquet(part.reset_index(drop=True), os.path.join(table_dir, f"{partition}.parquet"))
+    for file_name in os.listdir(table_dir):
+        if file_name.endswith('.parquet') and file_name[:-len('.parquet')] not in partitions:
+            os.remove(os.path.join(table_dir, file_name))
+    return len(rows)
+
+
+def read_table(name, start_date=None, end_date=None, columns=None, archive_dir=None):
+    # Read a table back from the archive with its types, opening only the months between start_date and end_date
+    # (both included, None leaves that side open) and reading only the given columns.
+    # Rows are filtered to the exact dates, rows without a date are only returned when no range is given.
+    _require_pyarrow()
+    table = ARCHIVE_TABLES[name]
+    month_column = table['month_column']
+    if columns is not None and month_column and month_column not in columns and (start_date or end_date):
+        columns = [month_column] + list(columns)  # Needed to filter the rows of the first and last months
+
+    parts = [
+        pd.read_parquet(path, columns=columns)
+        for path in partition_files(name, start_date, end_date, archive_dir)
+    ]
+    if not parts:
+        return _empty(name, columns)
+    rows = pd.concat(parts, ignore_index=True)
+
+    # Months with different categories are joined as text, turn them back into categories
+    for column, dtype in table['dtypes'].items():
+        if dtype == 'category' and column in rows.columns:
+            rows[column] = rows[column].astype('category')
+
+    if month_column and (start_date or end_date):
+        dates = rows[month_column]
+        mask = dates.notna()
+        if start_date is not None:
+            mask &= dates >= pd.Timestamp(start_date)
+        if end_date is not None:
+            mask &= dates < pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        rows = rows[mask].reset_index(drop=True)
+    return rows
+
+
+def partition_files(name, start_date=None, end_date=None, archive_dir=None):
+    # Paths of the archive files holding the rows of a table between two dates, oldest month first
+    table_dir = os.path.join(archive_dir or ARCHIVE_DIR, name)
+    if not os.path.isdir(table_dir):
+        return []
+    partitions = sorted(file_name[:-len('.parquet')] for file_name in os.listdir(table_dir) if file_name.endswith('.parquet'))
+    if ARCHIVE_TABLES[name]['month_column'] is not None and (start_date or end_date):
+        first_month = start_date.strftime('%Y-%m') if start_date else ''
+        last_month = end_date.strftime('%Y-%m') if end_date else UNDATED
+        partitions = [month for month in partitions if month != UNDATED and first_month <= month <= last_month]
+    return [os.path.join(table_dir, f"{partition}.parquet") for partition in partitions]
+
+
+def covers(name, end_date=None, csv_file=None, archive_dir=None):
+    # Check if the archive can be read instead of the table for a date range ending on end_date:
+    # pyarrow is installed, the table was archived, and the table has not changed since or (for an
+    # append_only table) the archive was written after end_date was over, so no row of the range came after it
+    try:
+        _require_pyarrow()
+    except ImportError:
+        return False
+    files = partition_files(name, archive_dir=archive_dir)
+    if not files:
+        return False
+    archived_at = min(os.path.getmtime(path) for path in files)  # Every export rewrites every file
+
+    if ARCHIVE_TABLES[name].get('append_only') and end_date is not None:
+        if archived_at >= datetime.combine(end_date + timedelta(days=1), time.min).timestamp():
+            return True
+    sources = [path for path in table_files(name, csv_file) if os.path.exists(path)]
+    return bool(sources) and archived_at >= max(os.path.getmtime(path) for path in sources)
+
+
+def typed_rows(name, rows):
+    # Give the text columns of a table their archive types: dates parsed (empty or invalid ones missing),
+    # numbers as numbers (empty ones missing) and the other columns as text or categories
+    table = ARCHIVE_TABLES[name]
+    rows = rows.copy()
+    for column in table['dates']:
+        if column in rows.columns:
+            rows[column] = pd.to_datetime(rows[column].replace('', None), format='mixed', errors='coerce')
+    for column, dtype in table['dtypes'].items():
+        if column not in rows.columns:
+            continue
+        if dtype == 'float64':
+            rows[column] = pd.to_numeric(rows[column].replace('', None), errors='coerce').astype('float64')
+        else:
+            rows[column] = rows[column].astype(dtype)
+    return rows
+
+
+def _empty(name, columns=None):
+    # An empty table with the archive types, for date ranges with no months in the archive
+    fields = columns or TABLES[name]['fields']
+    return typed_rows(name, pd.DataFrame({column: pd.Series(dtype=str) for column in fields}))
+
+
+def _write_parquet(rows, path):
+    # Write one archive file, replacing the previous one only once the new one is complete
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        rows.to_parquet(temp_path, engine='pyarrow', index=False)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _require_pyarrow():
+    # Fail with how to fix it when pyarrow is not installed
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(MISSING_PYARROW) from None
+
+
+def export_all(db_dir=DB_DIR, archive_dir=None):
+    # Write every archived table of db_dir to the archive
+    for name in ARCHIVE_TABLES:
+        csv_file = os.path.join(db_dir, TABLES[name]['file'])
+        if not os.path.exists(csv_file):
+            print(f"Skipping {name}, {csv_file} not found.")
+            continue
+        rows = export_table(name, csv_file, archive_dir)
+        print(f"Archived {rows} rows of {name} to {os.path.join(archive_dir or ARCHIVE_DIR, name)}.")
+
+
+if __name__ == "__main__":
+    # Usage: python src/ColumnarArchive.py export [db_dir]
+    if len(sys.argv) < 2 or sys.argv[1] != 'export':
+        print("Usage: python src/ColumnarArchive.py export [db_dir]")
+        sys.exit(1)
+
+    try:
+        export_all(sys.argv[2] if len(sys.argv) > 2 else DB_DIR)
+    except ImportError as e:
+        print(e)
+        sys.exit(1)
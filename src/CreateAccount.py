@@ -2,7 +2,7 @@
 import sys
 import os
 from PyQt5.QtWidgets import QMainWindow, QMessageBox
-from PyQt5.uic import loadUi
+from UILoader import load_ui
 from src.LoginRoles import LoginRoles
 
 # Add the 'src' folder to the Python path
@@ -18,8 +18,7 @@ class CreateAccountUI(QMainWindow):
         self.roles = LoginRoles() 
 
         # Load the UI file relative to the project's root directory
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'createAccount.ui')
-        loadUi(ui_path, self)
+        load_ui('createAccount.ui', self)
         
         # Set fixed size for the create account screen
         self.setFixedSize(1000, 600) 
@@ -60,16 +59,6 @@ class CreateAccountUI(QMainWindow):
 
     # Function to navigate back to the login screen
     def returnToLogin(self):
-        from src.LogInGUI import MainUI  # Import MainUI inside the function to avoid circular import
-        # Check if login screen is in the stack to avoid duplicates
-        for i in range(self.widget.count()):
-            if isinstance(self.widget.widget(i), MainUI):
-                self.widget.setCurrentIndex(i)
-                self.widget.setFixedSize(800, 525)  
-                return
-
-        # If the MainUI instance is not found, create a new one
-        login_screen = MainUI(self.widget)
-        self.widget.addWidget(login_screen)
-        self.widget.setCurrentIndex(self.widget.indexOf(login_screen))
-        self.widget.setFixedSize(800, 525)  # Set the window title and dimensions
\ No newline at end of file
+        # Go back to the login screen
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('login')
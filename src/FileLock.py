@@ -0,0 +1,120 @@
+# Import necessary libraries for system operations
+import os
+import threading
+from contextlib import contextmanager
+from AtomicFile import current_batch
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is not available on Windows, there the locks only protect threads of the same process
+    fcntl = None
+
+# Lock modes
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+
+
+class FileLock:
+    # Advisory reader/writer lock shared by every process using the same database file
+    #
+    #     with lock.shared():      # any number of readers at the same time
+    #         ...
+    #     with lock.exclusive():   # one writer, no readers
+    #         ...
+    #
+    # The lock is taken with flock() on a '<file>.lock' sidecar so it never interferes with the file itself.
+    # Locks are reentrant within a thread, and asking for exclusive while holding shared upgrades the lock.
+    # An exclusive lock taken inside a WriteBatch is held until the batch has been written.
+    # Code that holds several locks at once must take them in the same order everywhere
+    # (purchases / prescriptions before inventory) so two processes never wait on each other.
+
+    # One lock per file, shared by every table opened on that file in the process
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    @classmethod
+    def for_file(cls, path):
+        # Return the lock for the given file, creating it the first time it is requested
+        key = os.path.normcase(os.path.abspath(path))
+        with cls._locks_guard:
+            lock = cls._locks.get(key)
+            if lock is None:
+                lock = cls(key)
+                cls._locks[key] = lock
+        return lock
+
+
+    def __init__(self, path):
+        self.lock_file = path + '.lock'
+        self.mode = None  # Mode currently held by this process, None when unlocked
+        self._fd = None
+        self._previous_modes = []  # Mode held before each nested acquire
+        self._thread_lock = threading.RLock()
+
+
+    def acquire(self, mode):
+        # Take the lock in the given mode, blocking until it is available
+        self._thread_lock.acquire()
+        try:
+            self._previous_modes.append(self.mode)
+            if self.mode is None or (self.mode == SHARED and mode == EXCLUSIVE):
+                self._lock(mode)
+        except BaseException:
+            self._previous_modes.pop()
+            self._thread_lock.release()
+            raise
+
+
+    def release(self):
+        # Undo the matching acquire(), going back to the mode held before it
+        try:
+            previous = self._previous_modes.pop()
+            if previous is None:
+                self._unlock()
+            elif previous != self.mode:
+                self._lock(previous)
+        finally:
+            self._thread_lock.release()
+
+
+    @contextmanager
+    def shared(self):
+        # Hold the lock for reading
+        self.acquire(SHARED)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+    @contextmanager
+    def exclusive(self):
+        # Hold the lock for a read-modify-write cycle
+        batch = current_batch()
+        if batch is not None and not batch.holds(self):
+            # The writes are only made when the batch ends, keep other processes out until then
+            self.acquire(EXCLUSIVE)
+            batch.hold(self, self.release)
+
+        self.acquire(EXCLUSIVE)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+    def _lock(self, mode):
+        if fcntl is not None:
+            if self._fd is None:
+                self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+            fcntl.flock(self._fd, fcntl.LOCK_EX if mode == EXCLUSIVE else fcntl.LOCK_SH)
+        self.mode = mode
+
+
+    def _unlock(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.mode = None
@@ -1,27 +1,34 @@
 #FillPrescription.py
 import sys
 import os
-import csv
 
-from datetime import datetime
 # Add the 'src' folder to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-import resources_rc  # Import the compiled resource file
-from PyQt5.QtWidgets import QMainWindow, QMessageBox, QTableWidgetItem
-from PyQt5.uic import loadUi
+from PyQt5.QtWidgets import QMainWindow, QMessageBox
+from UILoader import load_ui
 from Prescriptions import Prescriptions
+from PrescriptionTableModel import PrescriptionTableModel
 from Inventory import Inventory
+from LoginRoles import LoginRoles
+from Session import FILL_PRESCRIPTION
+import TransactionLog
 
 class FillPrescriptionUI(QMainWindow):
-    def __init__(self, widget, username):  # Accept the widget and the current username as an argument
+    # Columns of the pending prescriptions table: (header, prescription column)
+    COLUMNS = [
+        ('First Name', 'Patient_First_Name'), ('Last Name', 'Patient_Last_Name'), ('DOB', 'Patient_DOB'),
+        ('Prescription Number', 'Prescription_Number'), ('Medication', 'Medication'), ('Quantity', 'Quantity'),
+    ]
+
+    def __init__(self, widget, session):  # Accept the widget and the session of the logged in user as an argument
         super(FillPrescriptionUI, self).__init__()
         self.widget = widget 
-        self.username = username
+        self.session = session
+        self.username = session.username
 
         # Load the UI file relative to the project's root
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'FillPrescription.ui')
-        loadUi(ui_path, self)
+        load_ui('FillPrescription.ui', self)
         
         # Set a minimum size for the dashboard
         self.setMinimumSize(1000, 600)
@@ -29,138 +36,102 @@ class FillPrescriptionUI(QMainWindow):
         # Connect buttons to functions
         self.cancelButton.clicked.connect(self.backToDashboard)
         self.fillPerscription.clicked.connect(self.fillPrescription)
+        self.fillSelected.clicked.connect(self.fillSelectedPrescriptions)
         self.CheckStock.clicked.connect(self.checkStock)
         self.Refresh.clicked.connect(self.refreshTable)
 
         # Initialize the database connections
         self.prescriptions_db = Prescriptions()
         self.inventory_db = Inventory()
+
+        # The table reads the pending prescriptions a page at a time
+        self.prescription_model = PrescriptionTableModel(self.prescriptions_db, self.COLUMNS, self)
+        self.tableWidget.setModel(self.prescription_model)
         
         # Load the inventory database
         self.initializeTable()
         
         
-    def initializeTable(self):
-        # Query the database for all pending prescriptions
-        pending_prescriptions = [p for p in self.prescriptions_db.read_prescriptions() if p['Status'] == 'Pending']
+    def on_show(self):
+        # Called by the ScreenRouter when the screen is shown again, list the prescriptions that are waiting now
+        self.initializeTable()
 
-        # Set the table's row count to the number of pending prescriptions
-        self.tableWidget.setRowCount(len(pending_prescriptions))
 
-        # Populate the table with data
-        for row_index, prescription in enumerate(pending_prescriptions):
-            for col_index, value in enumerate(prescription.values()):
-                self.tableWidget.setItem(row_index, col_index, QTableWidgetItem(str(value)))
-    def get_pharmacist_name(self, username):
-        user_file = os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_user_account.csv')
+    def initializeTable(self):
+        # Show the pending prescriptions, only the first page is read until the table is scrolled
+        self.prescription_model.set_filter({'Status': 'Pending'})
 
-        if not os.path.exists(user_file):
-            raise FileNotFoundError(f"User file not found at: {user_file}")
 
-        with open(user_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row['Username'] == username:
-                    return f"{row.get('First Name', 'Unknown')} {row.get('Last Name', 'Unknown')}"
+    def get_pharmacist_name(self, username):
+        if username == self.session.username:
+            return self.session.display_name
+        user_data = LoginRoles().get_user_data(username)
+        if user_data:
+            return f"{user_data.get('First Name', 'Unknown')} {user_data.get('Last Name', 'Unknown')}"
         return "Unknown Pharmacist"
 
     
     def backToDashboard(self):
-        from src.Dashboard import Dashboard  # Importing MainUI inside the function to avoid circular import
+        # Return to the dashboard
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
 
-        # Always create a new instance of MainUI
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
-        self.widget.setFixedSize(1050, 600)
-        
-        
-    def get_user_role(self, username):
-        # Construct the absolute path to the user accounts file
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        user_file = os.path.join(base_path, '..', 'DBFiles', 'db_user_account.csv')
-
-        # Check if the file exists
-        if not os.path.exists(user_file):
-            raise FileNotFoundError(f"User file not found at: {user_file}")
-
-        # Read the user role from the file
-        with open(user_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row['Username'] == username:
-                    return row['Role'].lower()
-        return None
 
     def fillPrescription(self):
         # Allow only pharmacists to fill prescriptions
-        if self.get_user_role(self.username) != 'pharmacist':
+        if not self.session.can(FILL_PRESCRIPTION):
             QMessageBox.critical(self, "Access Denied", "Only pharmacists can fill prescriptions.")
             return
         try:
             # Get the selected row from the table
-            selected_row = self.tableWidget.currentRow()
+            selected_row = self.tableWidget.currentIndex().row()
             if selected_row == -1:
                 QMessageBox.warning(self, "Warning", "No row selected. Please select a prescription to fill.")
                 return
 
-            # Retrieve medication, quantity, and prescription number
-            medication_item = self.tableWidget.item(selected_row, 4)
-            quantity_item = self.tableWidget.item(selected_row, 5)
-            prescription_number_item = self.tableWidget.item(selected_row, 3)
+            prescription = self.prescription_model.row_data(selected_row)
 
             # Check for missing data
-            if not medication_item or not quantity_item or not prescription_number_item:
+            if not prescription or not prescription['Medication'] or not prescription['Quantity'] or not prescription['Prescription_Number']:
                 QMessageBox.warning(self, "Warning", "Incomplete data in the selected row.")
                 return
 
-            medication = medication_item.text().strip()
+            medication = prescription['Medication'].strip()
             try:
-                quantity = int(quantity_item.text().strip())
+                quantity = int(prescription['Quantity'].strip())
             except ValueError:
                 QMessageBox.warning(self, "Error", "Invalid quantity. Please enter a valid number.")
                 return
 
-            prescription_number = prescription_number_item.text().strip()
+            prescription_number = prescription['Prescription_Number'].strip()
 
             # Check for expired medication
             if self.inventory_db.is_expired(medication):
                 QMessageBox.warning(self, "Warning", f"The medication '{medication}' is expired and cannot be dispensed.")
                 return
 
-            # Attempt to fill the prescription
-            success = self.inventory_db.fill_prescription(medication, quantity)
+            # Take the stock and mark the prescription filled in one batch, the same way several are filled
+            success, result = self.prescriptions_db.fill_prescriptions(
+                [prescription_number], self.inventory_db, pharmacist=self.username
+            )[prescription_number]
 
             if success:
-                # Update prescription status and pharmacist name
-                status_updated = self.prescriptions_db.update_status(
-                    prescription_number,
-                    "Filled",
-                    pharmacist=self.username
+                # Log the prescription fill event
+                self.log_prescription_fill(
+                    prescription_number, medication, quantity, self.username
+                )
+
+                QMessageBox.information(
+                    self,
+                    "Success",
+                    f"Successfully filled {quantity} units of '{medication}'. Prescription status updated."
                 )
-                if status_updated:
-                    # Log the prescription fill event
-                    self.log_prescription_fill(
-                        prescription_number, medication, quantity, self.username
-                    )
-
-                    QMessageBox.information(
-                        self,
-                        "Success",
-                        f"Successfully filled {quantity} units of '{medication}'. Prescription status updated."
-                    )
-                else:
-                    QMessageBox.warning(
-                        self,
-                        "Error",
-                        f"Failed to update status for prescription {prescription_number}."
-                    )
                 self.refreshTable()  # Refresh the table
             else:
                 QMessageBox.warning(
                     self,
                     "Error",
-                    f"Failed to fill the prescription for '{medication}'. Insufficient stock or medication not found."
+                    f"Failed to fill prescription {prescription_number}. {result}"
                 )
 
         except Exception as e:
@@ -168,37 +139,78 @@ class FillPrescriptionUI(QMainWindow):
             QMessageBox.critical(self, "Error", f"An error occurred while filling the prescription: {e}")
 
 
+    def fillSelectedPrescriptions(self):
+        # Fill every selected prescription at once, the inventory and prescriptions are each written once
+        if not self.session.can(FILL_PRESCRIPTION):
+            QMessageBox.critical(self, "Access Denied", "Only pharmacists can fill prescriptions.")
+            return
+
+        # Collect the prescriptions of the selected rows
+        selected = {}  # Prescription number -> prescription
+        for index in sorted(self.tableWidget.selectionModel().selectedRows(), key=lambda index: index.row()):
+            prescription = self.prescription_model.row_data(index.row())
+            if prescription and prescription['Prescription_Number'].strip():
+                selected.setdefault(prescription['Prescription_Number'].strip(), prescription)
+
+        if not selected:
+            QMessageBox.warning(self, "Warning", "No rows selected. Please select the prescriptions to fill.")
+            return
+
+        try:
+            results = self.prescriptions_db.fill_prescriptions(
+                list(selected), self.inventory_db, pharmacist=self.username
+            )
+        except Exception as e:
+            print(f"An error occurred while filling the prescriptions: {e}")
+            QMessageBox.critical(self, "Error", f"An error occurred while filling the prescriptions: {e}")
+            return
+
+        # Log each fill and build a summary of what happened to every prescription
+        filled_count = 0
+        message = ""
+        for prescription_number, prescription in selected.items():
+            success, result = results[prescription_number]
+            if success:
+                filled_count += 1
+                self.log_prescription_fill(
+                    prescription_number, prescription['Medication'], prescription['Quantity'], self.username
+                )
+            message += f"Prescription {prescription_number}: {result}\n"
+
+        message = f"Filled {filled_count} of {len(results)} prescriptions.\n\n" + message
+        if filled_count == len(results):
+            QMessageBox.information(self, "Success", message)
+        else:
+            QMessageBox.warning(self, "Fill Selected", message)
+        self.refreshTable()  # Refresh the table
+
+
     def log_prescription_fill(self, prescription_number, medication, quantity, pharmacist):
-        # Log the prescription fill event to transaction.log
-        log_file = os.path.join(os.path.dirname(__file__), '..', 'logs', 'transaction.log')
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = (
-            f"{timestamp} - Prescription filled: "
-            f"Prescription Number: {prescription_number}, "
-            f"Medication: {medication}, Quantity: {quantity}, "
-            f"Pharmacist: {pharmacist}\n"
+        # Log the prescription fill event to the transaction log
+        TransactionLog.log(
+            TransactionLog.PRESCRIPTION_FILL, pharmacist,
+            f"Prescription filled: Prescription Number: {prescription_number}, "
+            f"Medication: {medication}, Quantity: {quantity}, Pharmacist: {pharmacist}",
+            prescription_number=prescription_number, medication=medication, quantity=quantity
         )
-        with open(log_file, mode='a') as file:
-            file.write(log_entry)
-
 
 
     def checkStock(self):
         # Check the stock for the medication selected by the pharmacist
         # Get the selected row
-        selected_row = self.tableWidget.currentRow()
+        selected_row = self.tableWidget.currentIndex().row()
         if selected_row == -1:
             QMessageBox.warning(self, "Warning", "No row selected. Please select a prescription to check stock.")
             return
 
         # Retrieve the medication name from the selected row 
-        medication_item = self.tableWidget.item(selected_row, 4)
-        if not medication_item:
+        prescription = self.prescription_model.row_data(selected_row)
+        if not prescription or not prescription['Medication']:
             QMessageBox.warning(self, "Warning", "Medication name not found in the selected row.")
             return
 
         # Extract the medication name
-        medication = medication_item.text()
+        medication = prescription['Medication']
 
         # Check the stock from the inventory database
         try:
@@ -220,21 +232,11 @@ class FillPrescriptionUI(QMainWindow):
     def refreshTable(self):
         # Refresh the table to display the latest prescriptions that are marked as pending
         try:
-            # Clear the table before refreshing
-            self.tableWidget.clearContents()
-
-            # Query the database for all pending prescriptions
-            pending_prescriptions = [p for p in self.prescriptions_db.read_prescriptions() if p['Status'] == 'Pending']
-
-            # Set the table's row count to the number of pending prescriptions
-            self.tableWidget.setRowCount(len(pending_prescriptions))
-
-            # Populate the table with data
-            for row_index, prescription in enumerate(pending_prescriptions):
-                for col_index, value in enumerate(prescription.values()):
-                    self.tableWidget.setItem(row_index, col_index, QTableWidgetItem(str(value)))
+            # Start again from the first page of pending prescriptions
+            self.prescription_model.set_filter({'Status': 'Pending'})
 
-            QMessageBox.information(self, "Success", f"Loaded {len(pending_prescriptions)} pending prescriptions.")
+            pending_count = self.prescriptions_db.count_prescriptions({'Status': 'Pending'})
+            QMessageBox.information(self, "Success", f"Loaded {pending_count} pending prescriptions.")
 
         except Exception as e:
             print(f"An error occurred while refreshing the table: {e}")
@@ -0,0 +1,232 @@
+# Import necessary libraries for system operations
+import numpy as np
+import pandas as pd  # Only imported by the reports, which are themselves loaded on first use
+
+
+class FinancialReport:
+    # Totals and breakdowns of the sales made between two dates
+    # The report is computed from daily sales: one row per day, item and payment method with the units sold,
+    # the revenue and the number of purchases. They are read from the rollup SalesRollup keeps up to date at
+    # every sale (from_rollup), or grouped from the purchase lines of the CSV file (from_csv) or of the
+    # Parquet archive (from_archive). Every number is computed with
+    # pandas over whole columns (no loop over the rows), and the table rows are formatted once as columns of text.
+
+    # Columns of the purchase data the report reads, with their types so pandas doesn't have to guess them
+    DTYPES = {
+        'First Name': 'str', 'Last Name': 'str', 'Item Name': 'category', 'ID': 'str',
+        'Quantity': 'float64', 'Price': 'float64', 'Total Cost': 'float64', 'Grand Total': 'float64',
+        'Payment Method': 'category', 'Prescription': 'str',
+    }
+
+    # Columns of the daily sales rollup and their types
+    ROLLUP_DTYPES = {
+        'Item Name': 'category', 'Payment Method': 'category', 'Units': 'float64', 'Revenue': 'float64',
+        'Transactions': 'int64',
+    }
+
+    # Columns that identify one row of the daily sales
+    SALES_KEY = ['Date', 'Item Name', 'Payment Method']
+
+    # Columns of the lines of one purchase, a purchase of several items is one line per item
+    # (a customer can make two purchases with the same values, see purchase_numbers())
+    PURCHASE_KEY = ['Date', 'First Name', 'Last Name', 'Grand Total', 'Payment Method']
+
+    # Columns of the archived purchases the report reads
+    ARCHIVE_COLUMNS = PURCHASE_KEY + ['Item Name', 'Quantity', 'Total Cost']
+
+    def __init__(self, sales, start_date=None, end_date=None, purchases=None):
+        # sales is a DataFrame of daily sales read by load_rollup() or made by daily_sales(), the dates are included
+        # in the report. purchases are the purchase lines the sales were made from, when the report is made from them
+        self.start_date = start_date
+        self.end_date = end_date
+        self.sales = sales[_in_date_range(sales['Date'], start_date, end_date)]
+        self.purchases = None if purchases is None else purchases[_in_date_range(purchases['Date'], start_date, end_date)]
+
+        revenue = self.sales['Revenue']
+        self.total_revenue = float(revenue.sum())
+
+        # Revenue of each item and of each payment method, highest first
+        self.revenue_by_item = revenue.groupby(self.sales['Item Name'], observed=True).sum().sort_values(ascending=False)
+        self.revenue_by_payment = revenue.groupby(self.sales['Payment Method'], observed=True).sum().sort_values(ascending=False)
+
+        # One row per day with sales: revenue, units sold and purchases of each item (a purchase of two items counts twice)
+        self.daily = self.sales.groupby('Date')[['Revenue', 'Units', 'Transactions']].sum()
+
+
+    @classmethod
+    def from_csv(cls, purchase_file, start_date=None, end_date=None):
+        # Build the report of the purchases in a CSV file
+        purchases = load_purchases(purchase_file)
+        purchases = purchases[_in_date_range(purchases['Date'], start_date, end_date)]
+        return cls(daily_sales(purchases), start_date, end_date, purchases)
+
+
+    @classmethod
+    def from_rollup(cls, rollup_file, start_date=None, end_date=None):
+        # Build the report from a CSV of the daily sales rollup, without reading the purchase lines
+        return cls(load_rollup(rollup_file), start_date, end_date)
+
+
+    @classmethod
+    def from_archive(cls, start_date=None, end_date=None, archive_dir=None):
+        # Build the report from the Parquet archive of the purchases (see ColumnarArchive),
+        # reading only the months in the date range and the columns the report uses, already typed
+        from ColumnarArchive import read_table
+        purchases = read_table('purchases', start_date, end_date, columns=cls.ARCHIVE_COLUMNS, archive_dir=archive_dir)
+        return cls(daily_sales(purchases), start_date, end_date, purchases)
+
+
+    @property
+    def empty(self):
+        # True when no purchase was made in the date range
+        return self.sales.empty
+
+
+    def table(self):
+        # The daily sales table as header -> column of formatted text, by day, item and payment method
+        sales = self.sales
+        return {
+            'Date': _format_each_value(sales['Date'], lambda value: value.strftime('%Y-%m-%d')),
+            'Item Name': _text(sales['Item Name']),
+            'Payment Method': _text(sales['Payment Method']),
+            'Units': _format_each_value(sales['Units'], _units),
+            'Purchases': _text(sales['Transactions']),
+            'Revenue': _format_each_value(sales['Revenue'], lambda value: f"${value:.2f}"),
+        }
+
+
+    def revenue_rows(self, revenue):
+        # The rows of a revenue breakdown (revenue_by_item or revenue_by_payment): name and revenue as text
+        return zip(_text(revenue.index), _format_each_value(revenue, lambda value: f"${value:.2f}"))
+
+
+    def table_rows(self):
+        # The rows of the daily sales table, each one a tuple of formatted values in the order of table()
+        return zip(*self.table().values())
+
+
+    def summary_text(self):
+        # The report as text: total revenue, revenue by item and by payment method, then every transaction
+        # (or the daily sales, when the report was made from the rollup)
+        lines = ["--- Financial Report ---", f"Total Revenue: ${self.total_revenue:.2f}", ""]
+
+        lines.append("--- Revenue by Item ---")
+        lines.append("{:<20} {:<10}".format("Item Name", "Revenue"))
+        lines.extend(f"{item:<20} ${revenue:.2f}" for item, revenue in self.revenue_by_item.items())
+
+        lines.append("")
+        lines.append("--- Revenue by Payment Method ---")
+        lines.append("{:<20} {:<10}".format("Payment Method", "Revenue"))
+        lines.extend(f"{method:<20} ${revenue:.2f}" for method, revenue in self.revenue_by_payment.items())
+
+        lines.append("")
+        if self.purchases is None:
+            lines.append("--- Daily Sales ---")
+            lines.append("{:<12} {:<20} {:<15} {:<8} {:<10} {:<10}".format(
+                "Date", "Item Name", "Payment Method", "Units", "Purchases", "Revenue"
+            ))
+            lines.extend("{:<12} {:<20} {:<15} {:<8} {:<10} {:<10}".format(*row) for row in self.table_rows())
+            return "\n".join(lines)
+
+        lines.append("--- Transaction Details ---")
+        lines.append("{:<20} {:<15} {:<15} {:<10} {:<20}".format(
+            "Date", "First Name", "Last Name", "Total", "Payment Method"
+        ))
+        purchases = self.purchases
+        dates = _format_each_value(purchases['Date'], lambda value: value.strftime('%Y-%m-%d'))
+        totals = _format_each_value(purchases['Grand Total'], lambda value: f"{value:.2f}")
+        for date, first_name, last_name, total, method in zip(
+            dates, _text(purchases['First Name']), _text(purchases['Last Name']), totals, _text(purchases['Payment Method'])
+        ):
+            lines.append(f"{date:<20} {first_name:<15} {last_name:<15} ${total:<10} {method:<20}")
+        return "\n".join(lines)
+
+
+def load_purchases(purchase_file):
+    # Read the purchase data CSV with fixed column types and the Date column parsed
+    purchases = pd.read_csv(purchase_file, dtype=_column_types(purchase_file))
+    purchases['Date'] = _parse_dates(purchases['Date'])
+    return purchases
+
+
+def load_rollup(rollup_file):
+    # Read a CSV of the daily sales rollup, in the order of its key
+    sales = pd.read_csv(rollup_file, dtype=FinancialReport.ROLLUP_DTYPES)
+    sales['Date'] = _parse_dates(sales['Date'])
+    return sales.sort_values(FinancialReport.SALES_KEY, kind='stable', ignore_index=True)
+
+
+def daily_sales(purchases):
+    # Group purchase lines into daily sales, the rows SalesRollup keeps
+    key = FinancialReport.SALES_KEY
+    by_key = purchases.groupby(key, observed=True)
+    run, number = purchase_numbers(purchases)
+    item_purchases = purchases.assign(Run=run, Number=number).drop_duplicates(['Run', 'Number', 'Item Name'])
+    return pd.DataFrame({
+        'Units': by_key['Quantity'].sum(),
+        'Revenue': by_key['Total Cost'].sum(),
+        'Transactions': item_purchases.groupby(key, observed=True).size(),
+    }).reset_index()
+
+
+def purchase_numbers(purchases):
+    # Tell which purchase each line belongs to, the way SalesRollup.rebuild() does: returns (run, number) columns,
+    # the lines of one purchase have the same pair. The lines of a sale are written together, so a run is the
+    # consecutive lines with the same PURCHASE_KEY, and a run is split where its line totals reach the grand total
+    # (a customer buying the same total again right after)
+    key = purchases.groupby(FinancialReport.PURCHASE_KEY, observed=True, dropna=False, sort=False).ngroup()
+    run = key.ne(key.shift()).cumsum()
+    cents = _cents(purchases['Total Cost'])
+    grand_total = _cents(purchases['Grand Total'])
+    before = cents.groupby(run).cumsum() - cents  # Cents of the run's lines before each line
+    number = (before // grand_total.where(grand_total > 0)).fillna(0).astype('int64')
+    return run, number
+
+
+def _cents(column):
+    # Amounts of money in whole cents, so totals add up exactly
+    return (column.fillna(0) * 100).round().astype('int64')
+
+
+def _column_types(purchase_file):
+    # Types of the columns the file actually has, older files may lack some of them
+    with open(purchase_file, mode='r') as file:
+        header = file.readline().strip().split(',')
+    return {column: dtype for column, dtype in FinancialReport.DTYPES.items() if column in header}
+
+
+def _parse_dates(dates):
+    # Parse the dates written by Purchases (YYYY-MM-DD), anything else is parsed the slow way or left empty
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    others = parsed.isna() & dates.notna()
+    if others.any():
+        parsed[others] = pd.to_datetime(dates[others], errors='coerce')
+    return parsed
+
+
+def _in_date_range(dates, start_date, end_date):
+    # Mask of the dates between start_date and end_date, both days included
+    mask = dates.notna()
+    if start_date is not None:
+        mask &= dates >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= dates < pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    return mask
+
+
+def _format_each_value(column, format_value):
+    # Format a column as text, calling format_value once per distinct value instead of once per row
+    # (a year of purchases has a few hundred dates and prices but can have millions of lines)
+    codes, values = pd.factorize(column)
+    formatted = np.array([format_value(value) for value in values] + [''], dtype=object)
+    return formatted[codes].tolist()  # Code -1 (a missing value) takes the '' at the end
+
+
+def _units(value):
+    # Units sold as text, without decimals when they are whole
+    return str(int(value)) if value.is_integer() else f"{value:.2f}"
+
+
+def _text(column):
+    # A column as a list of text, missing values as empty text
+    return _format_each_value(column, str)
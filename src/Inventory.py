@@ -2,7 +2,8 @@
 import csv
 import os
 from LoginRoles import LoginRoles  
-from datetime import datetime, timedelta
+from InventoryStore import InventoryStore, _expiration, _quantity
+from datetime import date, datetime, timedelta
 
 class Inventory:
     # Class constructor to initialize the inventory system, takes in the low stock threshold, auto reorder threshold, and paths to CSV databases
@@ -27,7 +28,10 @@ class Inventory:
         self.login_roles = LoginRoles()  
         
         # Initialize CSV files with headers if they don't exist
-        self.initialize_csv(self.inventory_file, ['Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed'])
+        self.initialize_csv(self.inventory_file, InventoryStore.FIELDNAMES)
+
+        # In-memory inventory shared by every Inventory instance, reloaded only when the file changes
+        self.store = InventoryStore.for_file(self.inventory_file)
 
 
     # Function to initialize a CSV file with headers if it does not exist
@@ -42,21 +46,11 @@ class Inventory:
     def read_inventory_data(self, include_removed=False):
         inventory_data = []
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if not include_removed and row.get('Date Removed'):
-                        continue  # Skip removed items unless specified
-                    inventory_data.append({
-                        'Item': row.get('Item', 'Unknown'),
-                        'ID': row.get('ID', 'Unknown'),
-                        'Quantity': row.get('Quantity', '0'),
-                        'Price': row.get('Price', '0.00'),
-                        'Expiration Date': row.get('Expiration Date', 'No Expiration Date'),
-                        'Date Added': row.get('Date Added', ''),
-                        'Date Updated': row.get('Date Updated', ''),
-                        'Date Removed': row.get('Date Removed', '')
-                    })
+            self.store.refresh()
+            for row in self.store.rows:
+                if not include_removed and row['Date Removed']:
+                    continue  # Skip removed items unless specified
+                inventory_data.append(dict(row))  # Copy so callers can't change the in-memory inventory
         except FileNotFoundError:
             print(f"Inventory file not found: {self.inventory_file}")
         return inventory_data
@@ -65,17 +59,13 @@ class Inventory:
     # Function displays the current stock from inventory in the table in the UI
     def view_stock(self):
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip the header row
+            self.store.refresh()
         except FileNotFoundError:
             print("Inventory file not found. The inventory is currently empty.")
 
 
     # Function to update stock quantity and details for specific items and ID's
     def update_stock(self, item, item_id, new_quantity, price, expiration_date):
-        rows = []
-        updated = False
         try:
             # Validate price
             try:
@@ -93,38 +83,35 @@ class Inventory:
                 print(f"Invalid expiration date: {expiration_date}. Skipping update.")
                 return
 
-            # Read existing data
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Item'].strip().lower() == item.strip().lower() and row['ID'].strip() == item_id.strip():
-                        row['Quantity'] = str(new_quantity)
-                        row['Price'] = f"{price:.2f}"
-                        row['Expiration Date'] = expiration_date_obj.strftime('%Y-%m-%d')
-                        row['Date Updated'] = datetime.now().strftime('%Y-%m-%d')
-                        updated = True
-                    rows.append(row)
-
-            # Add new item if not found
-            if not updated:
-                rows.append({
-                    'Item': item,
-                    'ID': item_id,
-                    'Quantity': str(new_quantity),
-                    'Price': f"{price:.2f}",
-                    'Expiration Date': expiration_date_obj.strftime('%Y-%m-%d'),
-                    'Date Added': datetime.now().strftime('%Y-%m-%d'),
-                    'Date Updated': '',
-                    'Date Removed': ''
-                })
+            # Hold the inventory lock from reading the rows to writing them so no other terminal's update is lost
+            with self.store.lock.exclusive():
+                # Find the existing row for this item and ID
+                self.store.refresh()
+                row = None
+                for candidate in self.store.get_by_name(item):
+                    if candidate['ID'].strip() == item_id.strip():
+                        row = candidate
+
+                if row:
+                    row['Quantity'] = str(new_quantity)
+                    row['Price'] = f"{price:.2f}"
+                    row['Expiration Date'] = expiration_date_obj.strftime('%Y-%m-%d')
+                    row['Date Updated'] = datetime.now().strftime('%Y-%m-%d')
+                else:
+                    # Add new item if not found
+                    row = self.store.add_row({
+                        'Item': item,
+                        'ID': item_id,
+                        'Quantity': str(new_quantity),
+                        'Price': f"{price:.2f}",
+                        'Expiration Date': expiration_date_obj.strftime('%Y-%m-%d'),
+                        'Date Added': datetime.now().strftime('%Y-%m-%d'),
+                        'Date Updated': '',
+                        'Date Removed': ''
+                    })
 
-            # Write updated data
-            with open(self.inventory_file, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=[
-                    'Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed'
-                ])
-                writer.writeheader()
-                writer.writerows(rows)
+                # Write updated data
+                self.store.commit([row])
 
         except FileNotFoundError:
             print("Inventory file not found. Could not update stock.")
@@ -133,89 +120,61 @@ class Inventory:
 
     #Function to automatically reorder items if the items are below the threshold 
     def auto_order(self):
-        rows = []
-        reorder_made = False
+        reordered_rows = []
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.reader(file)
-                header = next(reader)
-                for row in reader:
-                    if len(row) == 8:
-                        # Parse the row and check if it needs reordering
-                        item, item_id, quantity, price, exp_date, date_added, date_updated, date_removed = row
-                        quantity = int(quantity) #gets the quantity of the item 
-                        
-                        if quantity < self.auto_reorder_threshold: #checks if the quantity is less than the threshold, and reorders if necessary
-                            reorder_amount = self.low_stock_threshold
-                            quantity += reorder_amount
-                            reorder_made = True
-                        rows.append([item, item_id, str(quantity), price, exp_date, date_added, date_updated, date_removed])
-
-            # Write updated quantities if reorder was made into inventory CSV
-            if reorder_made:
-                with open(self.inventory_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(header)
-                    writer.writerows(rows)
+            # Lock the inventory while quantities are read and reordered
+            with self.store.lock.exclusive():
+                self.store.refresh()
+                for row in self.store.rows:
+                    quantity = int(row['Quantity']) #gets the quantity of the item 
+
+                    if quantity < self.auto_reorder_threshold: #checks if the quantity is less than the threshold, and reorders if necessary
+                        reorder_amount = self.low_stock_threshold
+                        row['Quantity'] = str(quantity + reorder_amount)
+                        reordered_rows.append(row)
+
+                # Write updated quantities if reorder was made into inventory CSV
+                self.store.commit(reordered_rows)
         except FileNotFoundError:
             print("Inventory file not found. No auto-order can be placed.")
-        return reorder_made
+        return bool(reordered_rows)
 
 
     #Function to check what items are low in stock 
     def check_low_stock(self):
         low_stock_items = [] #empty list 
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file) # Create a CSV DictReader for reading rows as dictionaries
-                for row in reader:
-                    if row['Date Removed'] == '':
-                        if int(row['Quantity']) < self.low_stock_threshold:
-                            low_stock_items.append((row['Item'], row['ID'], row['Quantity']))
+            self.store.refresh()
+            for row in self.store.rows:
+                if row['Date Removed'] == '':
+                    if int(row['Quantity']) < self.low_stock_threshold:
+                        low_stock_items.append((row['Item'], row['ID'], row['Quantity']))
         except FileNotFoundError:
             print("Inventory file not found.")
         return low_stock_items #returns list of items found with low stock
 
 
     #Function updates the items quantity from inventory, prioritizing earliest expiration date
+    #Expired and removed lots are skipped, nothing is taken unless the whole quantity is available
     def fill_prescription(self, item, quantity):
-        item_found = False
-        remaining_quantity = quantity
-
         try:
-            # Read current inventory data
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                inventory = [row for row in reader]
-
-            # Filter and sort matching rows by expiration date
-            matching_rows = [
-                row for row in inventory
-                if row['Item'].strip().lower() == item.strip().lower()
-                ]
-            matching_rows.sort(key=lambda x: datetime.strptime(x['Expiration Date'], '%Y-%m-%d'))
-
-            # Updates stock in inventory
-            for row in matching_rows:
-                current_quantity = int(row['Quantity'])
-                if current_quantity >= remaining_quantity:
-                    row['Quantity'] = str(current_quantity - remaining_quantity)
-                    remaining_quantity = 0
-                    item_found = True
-                    break
-                else:
-                    remaining_quantity -= current_quantity
-                    row['Quantity'] = '0'
+            # Lock the inventory while the lots are read and consumed
+            with self.store.lock.exclusive():
+                self.store.refresh()
+
+                # Pick the lots that expire first from the store's FEFO index
+                allocation = self.store.allocate(item, quantity)
+                if allocation is None:
+                    return False
 
-            # Write updated inventory back to the inventory CSV
-            with open(self.inventory_file, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=[
-                    'Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed'
-                ])
-                writer.writeheader()
-                writer.writerows(inventory)
+                # Updates stock in inventory
+                for row, units in allocation:
+                    row['Quantity'] = str(int(row['Quantity']) - units)
 
-            return item_found
+                # Record the updated lots
+                self.store.commit([row for row, _ in allocation])
+
+            return True
 
         except FileNotFoundError:
             print("Inventory file not found.")
@@ -225,6 +184,39 @@ class Inventory:
             return False
 
 
+    #Function to fill many prescriptions at once, orders is a list of (medication, quantity)
+    #Returns a list of True/False in the same order, the inventory is written once for all of them
+    def fill_prescriptions(self, orders):
+        results = []
+        changed_rows = {}
+
+        try:
+            # Lock the inventory while every order is allocated
+            with self.store.lock.exclusive():
+                self.store.refresh()
+
+                for medication, quantity in orders:
+                    allocation = self.store.allocate(medication, quantity)
+                    if allocation is None:
+                        results.append(False)
+                        continue
+
+                    # Take the units now so the next order sees what is left
+                    for row, units in allocation:
+                        row['Quantity'] = str(int(row['Quantity']) - units)
+                        changed_rows[id(row)] = row
+                    results.append(True)
+
+                # Record every updated lot in a single write
+                self.store.commit(changed_rows.values())
+
+        except FileNotFoundError:
+            print("Inventory file not found.")
+            return [False] * len(orders)
+
+        return results
+
+
     # Function to check items that are within 30 days to expire or have already expired
     def check_exp_date(self):
         expiring_items = []  # List to store items close to expiration
@@ -232,20 +224,19 @@ class Inventory:
         threshold_date = today + timedelta(days=30)
 
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)  # Use DictReader to handle all columns by name
-                for row in reader:
-                    if row['Date Removed'].strip() == '':
-                        exp_date = row['Expiration Date'].strip()
-                        if exp_date != 'No Expiration Date':  # Check if there's a valid expiration date
-                            exp_date_obj = datetime.strptime(exp_date, "%Y-%m-%d")
-                            if exp_date_obj <= threshold_date:  # Compare with the threshold
-                                expiring_items.append((
-                                    row['Item'], 
-                                    row['ID'], 
-                                    row['Quantity'], 
-                                    exp_date
-                                ))
+            self.store.refresh()
+            for row in self.store.rows:
+                if row['Date Removed'].strip() == '':
+                    exp_date = row['Expiration Date'].strip()
+                    if exp_date != 'No Expiration Date':  # Check if there's a valid expiration date
+                        exp_date_obj = datetime.strptime(exp_date, "%Y-%m-%d")
+                        if exp_date_obj <= threshold_date:  # Compare with the threshold
+                            expiring_items.append((
+                                row['Item'], 
+                                row['ID'], 
+                                row['Quantity'], 
+                                exp_date
+                            ))
         except FileNotFoundError:
             print("Inventory file not found. No expiring items to report.")
         except Exception as e:
@@ -257,57 +248,83 @@ class Inventory:
 
     # Function to remove an item from inventory based on their ID
     def remove_medication(self, item_id):
-        rows = []  # Store all rows
-        item_found = False
         try:
-            with open(self.inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['ID'] == item_id:  # Find the target item
-                        row['Date Removed'] = datetime.now().strftime('%Y-%m-%d')  # Update "Date Removed"
-                        row['Date Updated'] = datetime.now().strftime('%Y-%m-%d')  # Update "Date Updated"
-                        item_found = True
-                    rows.append(row)  # Keep all rows (including updated one)
-
-            # Write updated rows back to the CSV
-            with open(self.inventory_file, mode='w', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=[
-                    'Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 
-                    'Date Added', 'Date Updated', 'Date Removed'
-                ])
-                writer.writeheader()
-                writer.writerows(rows)
-
-            return item_found
+            # Lock the inventory while the item is marked as removed
+            with self.store.lock.exclusive():
+                self.store.refresh()
+                row = self.store.get_by_id(item_id)  # Find the target item
+                if row is None:
+                    return False
+
+                row['Date Removed'] = datetime.now().strftime('%Y-%m-%d')  # Update "Date Removed"
+                row['Date Updated'] = datetime.now().strftime('%Y-%m-%d')  # Update "Date Updated"
+
+                # Record the removal
+                self.store.commit([row])
+                return True
         except FileNotFoundError:
             print("Inventory file not found.")
             return False
         
         
     def is_expired(self, medication):
-        today = datetime.today() #gets current date
-        with open(self.inventory_file, mode='r') as file:
-            reader = csv.DictReader(file) # Create a CSV DictReader for reading rows as dictionaries
-            for row in reader:
-                if row['Item'].strip().lower() == medication.strip().lower(): 
-                    expiration_date = datetime.strptime(row['Expiration Date'], '%Y-%m-%d') #gets the item expiration date 
-                    if expiration_date < today: #checks of the item has expired
-                        return True
-        return False
+        # True when the medication is in stock but every lot still in stock has expired
+        # Removed and empty lots don't count, a lot with 'No Expiration Date' never expires
+        today = date.today() #gets current date
+        self.store.refresh()
+        in_stock = [row for row in self.store.get_by_name(medication)
+                    if not row['Date Removed'].strip() and _quantity(row) > 0]
+        for row in in_stock:
+            expiration_date = _expiration(row) #None if the date can't be read
+            if expiration_date is not None and expiration_date >= today:
+                return False #this lot can still be dispensed
+        return bool(in_stock)
     
     
     #Function to retrieve all stock entries for a given item 
     def check_stock(self, medication):
         results = [] #empty list
-        with open(self.inventory_file, mode='r') as file:
-            reader = csv.DictReader(file) # Create a CSV DictReader for reading rows as dictionaries
-            for row in reader:
-                if row['Item'] == medication:
-                    results.append({
-                        'Medication': row['Item'],
-                        'Quantity': int(row['Quantity']),
-                        'Expiration Date': row['Expiration Date']
-                    })
+        self.store.refresh()
+        for row in self.store.get_by_name(medication):
+            if row['Item'] == medication:
+                results.append({
+                    'Medication': row['Item'],
+                    'Quantity': int(row['Quantity']),
+                    'Expiration Date': row['Expiration Date']
+                })
         if not results:
             raise ValueError(f"Medication '{medication}' not found in inventory.")
-        return results #returns a list with all the current entries of the item in inventory
\ No newline at end of file
+        return results #returns a list with all the current entries of the item in inventory    
+    
+    #Function to look up a single inventory entry by its ID
+    def get_item(self, item_id):
+        try:
+            self.store.refresh()
+        except FileNotFoundError:
+            print("Inventory file not found.")
+            return None
+        row = self.store.get_by_id(item_id)
+        return dict(row) if row else None #returns a copy of the entry or None if the ID is unknown
+    
+    
+    #Function to take sold units of an item out of stock, the quantity never goes below 0
+    def sell_item(self, item_id, quantity):
+        try:
+            # Lock the inventory while the sold units are taken out
+            with self.store.lock.exclusive():
+                self.store.refresh()
+                row = self.store.get_by_id(item_id)
+                if row is None:
+                    return False
+
+                try:
+                    current_quantity = int(row['Quantity'])
+                except ValueError:
+                    current_quantity = 0
+
+                row['Quantity'] = str(max(0, current_quantity - quantity))
+                self.store.commit([row])
+                return True
+        except FileNotFoundError:
+            print("Inventory file not found.")
+            return False
@@ -0,0 +1,342 @@
+# Import necessary libraries for system operations
+import heapq
+import itertools
+import json
+import os
+from datetime import date, datetime
+from AtomicFile import current_batch
+from Storage import TABLES, open_table
+
+
+class InventoryStore:
+    # Column order of the inventory database
+    FIELDNAMES = TABLES['inventory']['fields']
+
+    # Number of journal records after which the journal is folded back into the CSV file
+    COMPACT_EVERY = 200
+
+    # One store per inventory file, shared by every Inventory instance in the process
+    _stores = {}
+
+    @classmethod
+    def for_file(cls, inventory_file, journal=True):
+        # Return the shared store for the given file, creating it the first time it is requested
+        key = os.path.normcase(os.path.abspath(inventory_file))
+        store = cls._stores.get(key)
+        if store is None:
+            store = cls(key, journal=journal)
+            cls._stores[key] = store
+        return store
+
+
+    def __init__(self, inventory_file, journal=True):
+        self.inventory_file = inventory_file
+        self.table = open_table('inventory', inventory_file)
+
+        # In journal mode every change is appended to a sidecar file instead of rewriting the CSV
+        # The SQLite backend already updates single rows, so it never uses the journal
+        self.journal = journal and self.table.backend == 'csv'
+        self.journal_file = inventory_file + '.journal'
+
+        # Reader/writer lock on the inventory table, it covers the journal too
+        # Callers hold lock.exclusive() around refresh(), the change and commit() so no update is lost
+        self.lock = self.table.lock
+
+        # In-memory copy of the inventory and the indexes built over it
+        self.rows = []  # Every row in file order, including removed items
+        self.by_id = {}  # ID -> row
+        self.by_name = {}  # Lower-cased item name -> list of rows (one per lot)
+
+        # First-expiry-first-out index: lower-cased item name -> min-heap of (expiration date, sequence, ID)
+        # Entries are not removed when a lot changes, stale ones are dropped when they reach the top
+        # Every entry gets a new sequence number, so only the lot's latest entry matches _lot_entries
+        # even when its date changes and then changes back
+        self.lots = {}
+        self._lot_entries = {}  # ID -> (name, expiration date, sequence) of the lot's current heap entry
+        self._lot_sequence = itertools.count()
+
+        # Signature of the table the rows were loaded from, None until the first load
+        self._signature = None
+        # How far into the journal has been replayed and how many records it holds
+        self._journal_offset = 0
+        self._journal_records = 0
+        # ID -> row changed inside an open WriteBatch and not written yet
+        self._pending = {}
+
+
+    def _file_signature(self):
+        # Returns a value that changes whenever the inventory table is written
+        return self.table.signature()
+
+
+    def _journal_size(self):
+        # Returns the size of the journal, 0 if there is none
+        if not self.journal:
+            return 0
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+
+    def refresh(self):
+        # Bring the in-memory inventory up to date with the files on disk
+        # Raises FileNotFoundError if the inventory file does not exist
+        if self._pending:
+            return  # Changes staged in an open WriteBatch are newer than anything on disk
+
+        with self.lock.shared():
+            signature = self._file_signature()
+            journal_size = self._journal_size()
+
+            if signature != self._signature or journal_size < self._journal_offset:
+                # The CSV was rewritten (or the journal compacted) so start over from the file
+                self._load()
+                self._signature = signature
+            elif journal_size > self._journal_offset:
+                # Only new journal records were added, replay just those
+                self._replay_journal()
+
+
+    def _load(self):
+        # Read the whole inventory table, rebuild the indexes and replay the journal on top
+        rows = self.table.read_all()
+
+        self.rows = []
+        self.by_id = {}
+        self.by_name = {}
+        self.lots = {}
+        self._lot_entries = {}
+        for row in rows:
+            # Keep only the known columns
+            self._index({field: row.get(field) or '' for field in self.FIELDNAMES})
+
+        self._journal_offset = 0
+        self._journal_records = 0
+        if self.journal:
+            self._replay_journal()
+
+
+    def _replay_journal(self):
+        # Apply the journal records written since the last replay
+        try:
+            with open(self.journal_file, mode='rb') as file:
+                file.seek(self._journal_offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break  # A record cut short by a crash, ignore it and anything after it
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(record)
+                    self._journal_offset += len(line)
+                    self._journal_records += 1
+        except FileNotFoundError:
+            pass
+
+
+    def _apply(self, record):
+        # Replace the row with the same ID by the journaled row, or add it if it is new
+        record = {field: record.get(field) or '' for field in self.FIELDNAMES}
+        row = self.get_by_id(record['ID'])
+        if row is None:
+            self._index(record)
+            return
+
+        old_name = row['Item'].strip().lower()
+        row.update(record)
+        new_name = row['Item'].strip().lower()
+        if new_name != old_name:
+            self.by_name[old_name].remove(row)
+            self.by_name.setdefault(new_name, []).append(row)
+        self._track_lot(row)
+
+
+    def _index(self, row):
+        # Add a row to the in-memory list and to both indexes
+        self.rows.append(row)
+        self.by_id[row['ID'].strip()] = row
+        self.by_name.setdefault(row['Item'].strip().lower(), []).append(row)
+        self._track_lot(row)
+
+
+    def _track_lot(self, row):
+        # Make sure the lot has an entry in its medication's FEFO heap under its current expiration date
+        item_id = row['ID'].strip()
+        name, expiration = row['Item'].strip().lower(), _expiration(row)
+        if expiration is None:
+            self._lot_entries.pop(item_id, None)  # No usable date, its old entry is stale now
+            return
+        entry = self._lot_entries.get(item_id)
+        if entry is not None and entry[:2] == (name, expiration):
+            return  # The lot is already in the heap
+        sequence = next(self._lot_sequence)
+        self._lot_entries[item_id] = (name, expiration, sequence)
+        heapq.heappush(self.lots.setdefault(name, []), (expiration, sequence, item_id))
+
+
+    def allocate(self, item, quantity, today=None):
+        # Plan taking quantity units of an item from the lots that expire first
+        # Returns a list of (row, units) or None if the unexpired stock is not enough, nothing is changed
+        # Expired, removed and empty lots are dropped from the heap as they are reached
+        name = item.strip().lower()
+        heap = self.lots.get(name, [])
+        today = today or date.today()
+
+        allocation = []
+        usable = []  # Entries popped on the way, pushed back when done
+        remaining = quantity
+        while remaining > 0 and heap:
+            expiration, sequence, item_id = heapq.heappop(heap)
+            if self._lot_entries.get(item_id) != (name, expiration, sequence):
+                continue  # The lot was renamed or its date changed, a newer entry exists
+            row = self.by_id[item_id]
+            available = _quantity(row)
+            if row['Date Removed'].strip() or expiration < today or available <= 0:
+                # Out of the heap until commit() sees the lot change again
+                del self._lot_entries[item_id]
+                continue
+
+            units = min(available, remaining)
+            allocation.append((row, units))
+            remaining -= units
+            usable.append((expiration, sequence, item_id))
+
+        for entry in usable:
+            heapq.heappush(heap, entry)
+        return allocation if remaining <= 0 else None
+
+
+    def get_by_id(self, item_id):
+        # Return the row with the given ID or None if it does not exist
+        return self.by_id.get(str(item_id).strip())
+
+
+    def get_by_name(self, item):
+        # Return every row (lot) whose name matches the item, ignoring case and surrounding spaces
+        return self.by_name.get(item.strip().lower(), [])
+
+
+    def add_row(self, row):
+        # Add a new row to the inventory, the change is only written to disk by commit()
+        row = {field: row.get(field) or '' for field in self.FIELDNAMES}
+        self._index(row)
+        return row
+
+
+    def commit(self, changed_rows):
+        # Persist rows that were added or changed in memory
+        changed_rows = list(changed_rows)
+        if not changed_rows:
+            return
+
+        # Restocked or re-dated lots go back into the FEFO heap
+        for row in changed_rows:
+            self._track_lot(row)
+
+        # Inside a WriteBatch the rows are written once, when the batch ends
+        batch = current_batch()
+        if batch is not None:
+            for row in changed_rows:
+                self._pending[row['ID'].strip()] = row
+            batch.defer(self, self._flush_pending, self._discard_pending)
+            return
+
+        with self.lock.exclusive():
+            try:
+                self._write(changed_rows)
+            except BaseException:
+                self._signature = None  # The rows in memory were not written, reload them on next use
+                raise
+
+
+    def _flush_pending(self):
+        # Write the rows collected during a WriteBatch
+        rows = list(self._pending.values())
+        self._pending = {}
+        with self.lock.exclusive():
+            self._write(rows)
+
+
+    def _discard_pending(self):
+        # The WriteBatch was abandoned, forget the in-memory changes and reload on next use
+        self._pending = {}
+        self._signature = None
+
+
+    def _write(self, changed_rows):
+        # Write changed rows with the table's backend, or to the journal
+        if self.table.backend != 'csv':
+            # Only the changed rows are written to the database
+            self.table.upsert('ID', changed_rows)
+            self._signature = self._file_signature()
+            return
+
+        if not self.journal:
+            self.compact()
+            return
+
+        # Drop a record left half written by a crash so the new records start on a clean line
+        if self._journal_size() > self._journal_offset:
+            os.truncate(self.journal_file, self._journal_offset)
+
+        # Append one small record per changed row and force it to disk
+        data = ''.join(json.dumps(row) + '\n' for row in changed_rows).encode('utf-8')
+        with open(self.journal_file, mode='ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self._journal_offset += len(data)
+        self._journal_records += len(changed_rows)
+
+        # Fold the journal back into the CSV file once it has grown large enough
+        if self._journal_records >= self.COMPACT_EVERY:
+            self.compact()
+
+
+    def checkpoint(self):
+        # Make the CSV file complete on its own so it can be read without the journal
+        # Used before other code reads db_inventory.csv directly (e.g. the reports)
+        with self.lock.exclusive():
+            self.refresh()
+            if self._journal_records:
+                self.compact()
+
+
+    def compact(self):
+        # Rewrite the CSV with every journaled change applied, then empty the journal
+        # If the process dies before the journal is cleared, replaying it again is harmless
+        self.save()
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, mode='wb') as file:
+                os.fsync(file.fileno())
+        self._journal_offset = 0
+        self._journal_records = 0
+
+
+    def save(self):
+        # Write the whole in-memory inventory back to the table
+        self.table.write_all(self.rows)
+
+        # Remember the signature of our own write so it does not trigger a reload
+        self._signature = self._file_signature()
+
+
+def _expiration(row):
+    # Parsed expiration date of a lot, lots without one sort last, None if the date can't be read
+    value = row['Expiration Date'].strip()
+    if value == 'No Expiration Date':
+        return date.max
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _quantity(row):
+    # Quantity of a lot as a number, 0 if it can't be read
+    try:
+        return int(row['Quantity'])
+    except ValueError:
+        return 0
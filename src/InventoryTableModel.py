@@ -0,0 +1,113 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+
+class InventoryTableModel(QAbstractTableModel):
+    # Editable table model over the shared in-memory inventory
+    # Cells are read from the inventory rows only when the view paints them, nothing is copied per cell.
+    # Edits stay in the model until they are saved with Inventory.update_stock(), then refresh() shows the result.
+
+    # Columns shown in the table: (header, inventory column)
+    COLUMNS = [
+        ('Item', 'Item'), ('ID', 'ID'), ('Quantity', 'Quantity'), ('Price', 'Price'),
+        ('Expiration Date', 'Expiration Date'),
+    ]
+
+    # Role that returns a value to sort by, numbers for the quantity and price columns
+    SortRole = Qt.UserRole
+
+    def __init__(self, inventory, parent=None):
+        super(InventoryTableModel, self).__init__(parent)
+        self.inventory = inventory
+        self.rows = []  # Inventory rows shown (not removed), shared with the inventory store
+        self.edits = {}  # id(row) -> {column: value} typed into the table and not saved yet
+        self.refresh()
+
+
+    def refresh(self):
+        # Show the current inventory and drop unsaved edits
+        # The rows are the store's own dictionaries, so this only rebuilds the list of rows that are shown
+        try:
+            self.inventory.store.refresh()
+        except FileNotFoundError:
+            print("Inventory file not found. The inventory is currently empty.")
+
+        self.beginResetModel()
+        self.rows = [row for row in self.inventory.store.rows if not row['Date Removed']]
+        self.edits = {}
+        self.endResetModel()
+
+
+    def create_proxy(self, parent=None):
+        # Proxy the table is shown through: sorting by a header click and the search box go through it,
+        # so the inventory itself is never reordered or copied
+        proxy = QSortFilterProxyModel(parent)
+        proxy.setSourceModel(self)
+        proxy.setSortRole(self.SortRole)
+        proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        proxy.setFilterKeyColumn(-1)  # Search every column
+        return proxy
+
+
+    def add_empty_row(self):
+        # Add a blank row for a new item, it becomes part of the inventory once it is saved
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows))
+        self.rows.append({column: '' for _, column in self.COLUMNS})
+        self.endInsertRows()
+        return len(self.rows) - 1
+
+
+    def row_values(self, row):
+        # The values shown in a row, including unsaved edits
+        values = {column: self.rows[row].get(column, '') for _, column in self.COLUMNS}
+        values.update(self.edits.get(id(self.rows[row]), {}))
+        return values
+
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = self.COLUMNS[index.column()][1]
+        value = self.edits.get(id(row), {}).get(column, row.get(column, ''))
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return value
+        if role == self.SortRole:
+            if column in ('Quantity', 'Price'):
+                try:
+                    return float(value)
+                except ValueError:
+                    return -1.0
+            return value.lower()
+        return None
+
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row = self.rows[index.row()]
+        self.edits.setdefault(id(row), {})[self.COLUMNS[index.column()][1]] = str(value)
+        self.dataChanged.emit(index, index)
+        return True
+
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return str(section + 1)
@@ -1,24 +1,22 @@
 #InventoryUI.py
-from PyQt5.QtWidgets import QMainWindow, QTableWidgetItem, QMessageBox
-from PyQt5.uic import loadUi
-import os
+from PyQt5.QtWidgets import QMainWindow, QMessageBox
+from UILoader import load_ui
 from Inventory import Inventory
+from InventoryTableModel import InventoryTableModel
 from datetime import datetime
 
 class InventoryUI(QMainWindow):
-    def __init__(self, widget, username): #Takes in the widget and current username as parameters
+    def __init__(self, widget, session): #Takes in the widget and session of the logged in user as parameters
         super(InventoryUI, self).__init__()
         self.widget = widget
-        self.username = username
+        self.session = session
+        self.username = session.username
         
         # Initialize the Inventory class
         self.inventory = Inventory()
 
         # Load the UI file relative to the project's root
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'Inventory.ui')
-        if not os.path.exists(ui_path):
-            print(f"UI file not found at: {ui_path}")
-        loadUi(ui_path, self)
+        load_ui('Inventory.ui', self)
 
         # Connect buttons
         self.cancelButton.clicked.connect(self.cancel)
@@ -38,34 +36,44 @@ class InventoryUI(QMainWindow):
 
 
     def initialize_table(self):
-        # Populates the table with the inventory data on load
-        self.ItemsTable.setColumnCount(5)
-        self.ItemsTable.setHorizontalHeaderLabels(['Item', 'ID', 'Quantity', 'Price', 'Expiration Date'])
+        # The table reads its cells from the in-memory inventory as they are painted
+        self.inventory_model = InventoryTableModel(self.inventory, self)
+
+        # Sorting by clicking a header and the search box both go through a proxy, the inventory itself is untouched
+        self.inventory_proxy = self.inventory_model.create_proxy(self)
+        self.searchInventory.textChanged.connect(self.inventory_proxy.setFilterFixedString)
+
+        self.ItemsTable.setModel(self.inventory_proxy)
+
+
+    def on_show(self):
+        # Called by the ScreenRouter when the screen is shown again, show the current stock
         self.load_inventory_into_table()
 
 
     def load_inventory_into_table(self):
-        # Loads the actual inventory data into the table
-        self.ItemsTable.setRowCount(0)  # Clear the table
-        inventory_data = self.inventory.read_inventory_data()  # Read from inventory CSV
-        for i, item in enumerate(inventory_data):
-            self.ItemsTable.insertRow(i)
-            self.ItemsTable.setItem(i, 0, QTableWidgetItem(item['Item']))
-            self.ItemsTable.setItem(i, 1, QTableWidgetItem(item['ID']))
-            self.ItemsTable.setItem(i, 2, QTableWidgetItem(item['Quantity']))
-            self.ItemsTable.setItem(i, 3, QTableWidgetItem(item['Price']))
-            self.ItemsTable.setItem(i, 4, QTableWidgetItem(item['Expiration Date']))
+        # Shows the current inventory data in the table
+        self.inventory_model.refresh()
+
+
+    def selected_source_row(self):
+        # Row of the inventory model behind the selected table row, or -1 if nothing is selected
+        index = self.ItemsTable.currentIndex()
+        if not index.isValid():
+            return -1
+        return self.inventory_proxy.mapToSource(index).row()
 
 
     def remove_selected_item(self):
-        selected_row = self.ItemsTable.currentRow()
+        selected_row = self.selected_source_row()
         if selected_row == -1:
             QMessageBox.warning(self, "Error", "Please select a row to remove!")
             return
 
         # Retrieve item details
-        item = self.ItemsTable.item(selected_row, 0).text()  # Item name
-        item_id = self.ItemsTable.item(selected_row, 1).text()  # Item ID
+        values = self.inventory_model.row_values(selected_row)
+        item = values['Item']  # Item name
+        item_id = values['ID']  # Item ID
 
         # Confirm deletion
         confirmation = QMessageBox.question(
@@ -80,7 +88,7 @@ class InventoryUI(QMainWindow):
             success = self.inventory.remove_medication(item_id)
             if success:
                 # Remove row from GUI table
-                self.ItemsTable.removeRow(selected_row)
+                self.inventory_model.refresh()
                 QMessageBox.information(self, "Success", f"Item '{item}' (ID: {item_id}) has been marked as removed.")
             else:
                 QMessageBox.warning(self, "Error", "Failed to remove the item from the inventory.")
@@ -88,25 +96,22 @@ class InventoryUI(QMainWindow):
 
 
     def add_empty_row(self):
-        # Adds an empty row to the table
-        row_count = self.ItemsTable.rowCount()
-        self.ItemsTable.insertRow(row_count)
-        self.ItemsTable.setItem(row_count, 0, QTableWidgetItem(""))  # Item
-        self.ItemsTable.setItem(row_count, 1, QTableWidgetItem(""))  # ID
-        self.ItemsTable.setItem(row_count, 2, QTableWidgetItem(""))  # Quantity
-        self.ItemsTable.setItem(row_count, 3, QTableWidgetItem(""))  # Price
-        self.ItemsTable.setItem(row_count, 4, QTableWidgetItem(""))  # Expiration Date
+        # Adds an empty row to the table and selects it for editing
+        self.searchInventory.clear()  # Make sure the new row is not hidden by the search
+        row = self.inventory_model.add_empty_row()
+        self.ItemsTable.setCurrentIndex(self.inventory_proxy.mapFromSource(self.inventory_model.index(row, 0)))
         
         
     def update_inventory(self):
-        selected_row = self.ItemsTable.currentRow()
+        selected_row = self.selected_source_row()
         if selected_row != -1:
             try:
-                item = self.ItemsTable.item(selected_row, 0).text().strip()
-                item_id = self.ItemsTable.item(selected_row, 1).text().strip()
-                new_quantity_str = self.ItemsTable.item(selected_row, 2).text().strip()
-                price = self.ItemsTable.item(selected_row, 3).text().strip()
-                expiration_date = self.ItemsTable.item(selected_row, 4).text().strip()
+                values = self.inventory_model.row_values(selected_row)
+                item = values['Item'].strip()
+                item_id = values['ID'].strip()
+                new_quantity_str = values['Quantity'].strip()
+                price = values['Price'].strip()
+                expiration_date = values['Expiration Date'].strip()
 
                 # Validate Quantity
                 try:
@@ -133,6 +138,7 @@ class InventoryUI(QMainWindow):
 
                 # Update inventory
                 self.inventory.update_stock(item, item_id, new_quantity, price, expiration_date)
+                self.inventory_model.refresh()  # Show the saved values
                 QMessageBox.information(self, "Success", f"Item '{item}' updated successfully.")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"An unexpected error occurred: {e}")
@@ -170,12 +176,8 @@ class InventoryUI(QMainWindow):
 
     def cancel(self):
         # Return to the dashboard
-        from src.Dashboard import Dashboard  # Move the import here to avoid circular import
-
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
-        self.widget.setFixedSize(1050, 600)
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
 
 
     def check_exp_date(self):
@@ -4,13 +4,10 @@ import os
 # Add the 'src' folder to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-import resources_rc  # Import the compiled resource file
 from PyQt5.QtWidgets import QMainWindow, QMessageBox, QInputDialog, QLineEdit
-from PyQt5.uic import loadUi
-from Dashboard import Dashboard  # Import the Dashboard UI
-from CreateAccount import CreateAccountUI  # Import CreateAccountUI
-from StoreHoursUI import StoreHoursUI  # Import StoreHoursUI
+from UILoader import load_ui
 from LoginRoles import LoginRoles
+from ScreenRouter import ScreenRouter
 
 class MainUI(QMainWindow):
     def __init__(self, widget):  # Accept the widget as an argument
@@ -21,8 +18,7 @@ class MainUI(QMainWindow):
         self.login_roles = LoginRoles()  
         
         # Load the UI file
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'LogInGUI.ui')
-        loadUi(ui_path, self)
+        load_ui('LogInGUI.ui', self)
 
         # Set fixed dimensions for the login screen
         self.setFixedSize(800, 525) 
@@ -34,6 +30,12 @@ class MainUI(QMainWindow):
         self.storeHoursButton.clicked.connect(self.store_hours)
 
 
+    def on_show(self):
+        # Called by the ScreenRouter when the login screen is shown again, e.g. after a logout
+        self.userName.clear()
+        self.password.clear()
+
+
     def logIn(self):
         # Allow the user to log in to the system via username and password
         try:
@@ -43,21 +45,11 @@ class MainUI(QMainWindow):
             password = str(password)
             
             # Call the back-end login method to see if user is valid
-            success, message = self.login_roles.login(userName, password)
+            session, message = self.login_roles.login(userName, password)
             
-            if success:
-                # Check if the dashboard is already in the stacked widget
-                # Remove any previous instances of Dashboard so its updated for the new users role
-                for i in range(self.widget.count()):
-                    if isinstance(self.widget.widget(i), Dashboard):
-                        self.widget.removeWidget(self.widget.widget(i))
-                        
-                # If not found, create the dashboard and add it to the stacked widget
-                dashboard = Dashboard(self.widget, userName)  
-
-                self.widget.addWidget(dashboard)
-                self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
-                self.widget.setFixedSize(1050, 600)  
+            if session:
+                # Open the dashboard of this user, screens of a previous session are closed first
+                ScreenRouter.for_widget(self.widget).start_session(session)
             else:
                 # Show message if login fails
                 msg = QMessageBox()
@@ -85,38 +77,18 @@ class MainUI(QMainWindow):
             return
 
         # Verify manager credentials
-        success, message = self.login_roles.login(manager_username, manager_password)
-        if not success or self.login_roles.find_user_role(manager_username) != 'manager':
+        session, message = self.login_roles.login(manager_username, manager_password)
+        if not session or session.role != 'manager':
             msg = QMessageBox()
             msg.setWindowTitle("Authorization Failed")
             msg.setText("Manager approval failed. Please try again.")
             msg.exec_()
             return
 
-        # Check if CreateAccountUI is already in the stacked widget
-        for i in range(self.widget.count()):
-            if isinstance(self.widget.widget(i), CreateAccountUI):
-                self.widget.setCurrentIndex(i)
-                self.widget.setFixedSize(1000, 600)  
-                return
-
-        # Create new instance if not found
-        createacc = CreateAccountUI(self.widget)
-        self.widget.addWidget(createacc)
-        self.widget.setCurrentIndex(self.widget.indexOf(createacc))
-        self.widget.setFixedSize(1000, 600)  
+        # Switch to the create account screen
+        ScreenRouter.for_widget(self.widget).show('create_account')
 
 
     def store_hours(self):
         # Store hours of operation screen
-        for i in range(self.widget.count()):
-            if isinstance(self.widget.widget(i), StoreHoursUI):
-                self.widget.setCurrentIndex(i)
-                self.widget.setFixedSize(1000, 600)  
-                return
-
-        # Create new instance if not found
-        storehours = StoreHoursUI(self.widget)
-        self.widget.addWidget(storehours)
-        self.widget.setCurrentIndex(self.widget.indexOf(storehours))
-        self.widget.setFixedSize(1000, 600) 
\ No newline at end of file
+        ScreenRouter.for_widget(self.widget).show('store_hours')
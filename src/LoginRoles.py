@@ -1,6 +1,9 @@
 import csv
 import os
-import logging
+from UserDirectory import UserDirectory
+from Session import Session
+import PasswordHasher
+import TransactionLog
 
 class LoginRoles:
     def __init__(self, roles_file='../DBFiles/db_user_account.csv'): # Default path to the roles file
@@ -21,45 +24,53 @@ class LoginRoles:
         if not os.path.exists(self.roles_file):
             with open(self.roles_file, mode='w', newline='') as file:
                 writer = csv.writer(file)
-                writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
+                writer.writerow(UserDirectory.FIELDNAMES)
+                # The default password is hashed the first time the admin logs in
                 writer.writerow([
                     self.default_admin['username'],
                     self.default_admin['email'],
                     self.default_admin['password'],
                     self.default_admin['role'],
                     self.default_admin['locked_counter'],
-                    self.default_admin['locked_status']
+                    self.default_admin['locked_status'],
+                    ''
                 ])
-        
-        # Setup logging
-        log_file = os.path.join(os.path.dirname(__file__), '..', 'logs', 'transaction.log')
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        logging.basicConfig(filename=log_file, level=logging.INFO, format='%(asctime)s - %(message)s')
+
+        # Shared in-memory copy of the accounts, only re-read when the accounts table changes
+        self.directory = UserDirectory.for_file(self.roles_file)
+        self.table = self.directory.table
 
 
-    def log_transaction(self, event):
-        # Log the transaction event
-        logging.info(event)
+    def log_transaction(self, action, username, event):
+        # Log the transaction event, the transaction log writes it in the background
+        TransactionLog.log(action, username, event)
 
 
     def login(self, username: str, password: str):
         # Check if the user can log in and return a message also logs the transaction
+        # Returns (Session, message) on success and (None, message) otherwise
         user_data = self.get_user_data(username)
         if user_data:
             if user_data['Locked_status'] == 'locked':
-                self.log_transaction(f"Attempted login to locked account: {username}")
-                return False, "Account locked due to too many failed attempts"
-            if user_data['Password'] == password:
+                self.log_transaction(TransactionLog.LOGIN_LOCKED, username, f"Attempted login to locked account: {username}")
+                return None, "Account locked due to too many failed attempts"
+            if PasswordHasher.verify_password(password, user_data['Password']):
+                if PasswordHasher.needs_rehash(user_data['Password']):
+                    # Plain text or an old work factor, store it the current way now that we know the password
+                    self.directory.update(username, self.password_columns(password))
+                elif not PasswordHasher.is_keyed(user_data['Password_Fingerprint']):
+                    # Fingerprint made before they were keyed, make it again so the password is still found
+                    self.directory.update(username, {'Password_Fingerprint': self.directory.fingerprint(password)})
                 self.reset_locked_counter(username)
-                self.log_transaction(f"Login successful for user: {username}")
-                return True, f"Login successful as {user_data['Role']}."
+                self.log_transaction(TransactionLog.LOGIN, username, f"Login successful for user: {username}")
+                return Session.for_account(user_data), f"Login successful as {user_data['Role']}."
             else:
                 self.increment_locked_counter(username)
-                self.log_transaction(f"Failed login for user: {username}")
-                return False, "Invalid password"
+                self.log_transaction(TransactionLog.LOGIN_FAILED, username, f"Failed login for user: {username}")
+                return None, "Invalid password"
         else:
-            self.log_transaction(f"Failed login with non-existent username: {username}")
-            return False, "Invalid username"
+            self.log_transaction(TransactionLog.LOGIN_FAILED, username, f"Failed login with non-existent username: {username}")
+            return None, "Invalid username"
 
 
     def find_user_role(self, username: str):
@@ -70,41 +81,28 @@ class LoginRoles:
 
     def create_account(self, role: str, username: str, password: str, email: str):
         # Creates a new account if the username does not already exist 
-        if self.account_exists(username):
-            return False, "Username is not unique. Please choose a different username."
+        # Lock the accounts table so two terminals can't create the same username at once
+        with self.directory.lock.exclusive():
+            if self.account_exists(username):
+                return False, "Username is not unique. Please choose a different username."
         
-        if self.password_exists(password):
-            return False, "Password is not unique. Please choose a different password."
+            fingerprint = self.directory.fingerprint(password)
+            if self.directory.password_in_use(password, fingerprint):
+                return False, "Password is not unique. Please choose a different password."
 
-        # Add the new user to the CSV file
-        with open(self.roles_file, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([username, email, password, role, '0', 'unlocked'])
-        return True, f"Account created successfully"
+            # Add the new user to the database, only the hash of the password is stored
+            self.directory.add({
+                'Username': username, 'Email': email, 'Role': role,
+                'Locked_counter': '0', 'Locked_status': 'unlocked',
+                **self.password_columns(password, fingerprint)
+            })
+            return True, f"Account created successfully"
 
 
     def remove_account(self, username: str):
         # Removes an account based on the username
-        rows = []
-        found = False
         try:
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] != username:
-                        rows.append([row['Username'], row['Email'], row['Password'], row['Role'], row['Locked_counter'], row['Locked_status']])
-                    else:
-                        found = True
-
-            if found:
-                # if the user is found, write the new data to the file
-                with open(self.roles_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
-                    writer.writerows(rows)
-                return True
-            else:
-                return False
+            return self.directory.remove(username) > 0
         except FileNotFoundError:
             return False
 
@@ -115,26 +113,39 @@ class LoginRoles:
     
     
     def password_exists(self, password: str):
-        # Checks if a password already exists in the CSV file returns True if it does and false if it does not
+        # Checks if a password already exists in the database returns True if it does and false if it does not
+        # Looks up the password's fingerprint instead of checking it against every account's hash
         try:
-            with open(self.roles_file, mode='r', newline='') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row and row['Password'] == password:
-                        return True
+            return self.directory.password_in_use(password)
         except FileNotFoundError:
             print("Roles file not found.")
         return False
 
 
+    def password_columns(self, password: str, fingerprint=None):
+        # Values of the password columns of an account for a new password
+        return {
+            'Password': PasswordHasher.hash_password(password),
+            'Password_Fingerprint': fingerprint or self.directory.fingerprint(password),
+        }
+
+
+    def migrate_passwords(self):
+        # Hash every password still stored as plain text, returns how many accounts were changed
+        # Logging in does this one account at a time, this is for accounts that haven't logged in since
+        count = 0
+        with self.directory.lock.exclusive():
+            self.directory.refresh()
+            for username, user_data in list(self.directory.users.items()):
+                if not PasswordHasher.is_hashed(user_data['Password']):
+                    count += self.directory.update(username, self.password_columns(user_data['Password']))
+        return count
+
+
     def get_user_data(self, username: str):
-        # Helper method to retrieve user data from the CSV file
+        # Helper method to retrieve user data from the database
         try:
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] == username:
-                        return row
+            return self.directory.get(username)
         except FileNotFoundError:
             # Print for debugging purposes
             print("Roles file not found.")
@@ -143,26 +154,9 @@ class LoginRoles:
 
     def increment_locked_counter(self, username: str):
         # Increments the locked counter and locks the account if it reaches 5
-        rows = []
-        user_found = False
+        # The attempt is kept in memory and written together with others, the account is locked right away
         try:
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] == username:
-                        user_found = True
-                        locked_counter = int(row['Locked_counter']) + 1
-                        locked_status = 'locked' if locked_counter >= 5 else 'unlocked' # Lock account if counter reaches 5
-                        row['Locked_counter'] = str(locked_counter)
-                        row['Locked_status'] = locked_status
-                    rows.append([row['Username'], row['Email'], row['Password'], row['Role'], row['Locked_counter'], row['Locked_status']])
-
-            if user_found:
-                # Write the updated data back to the file
-                with open(self.roles_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
-                    writer.writerows(rows)
+            self.directory.record_failure(username)
 
         except FileNotFoundError:
             # Print for debugging purposes
@@ -170,25 +164,9 @@ class LoginRoles:
 
 
     def reset_locked_counter(self, username: str):
-        # Resets the locked counter and unlocks the account
-        rows = []
-        user_found = False
+        # Resets the locked counter and unlocks the account, nothing is written if it already is
         try:
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] == username:
-                        user_found = True
-                        row['Locked_counter'] = '0' # Reset the counter
-                        row['Locked_status'] = 'unlocked' # Unlock the account
-                    rows.append([row['Username'], row['Email'], row['Password'], row['Role'], row['Locked_counter'], row['Locked_status']])
-
-            if user_found:
-                # Write the updated data back to the file
-                with open(self.roles_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
-                    writer.writerows(rows)
+            self.directory.update(username, {'Locked_counter': '0', 'Locked_status': 'unlocked'})
 
         except FileNotFoundError:
             # Print for debugging purposes
@@ -197,24 +175,8 @@ class LoginRoles:
             
     def lock_account(self, username: str):
         # Locks the account based on the username only if the locked counter is 5
-        rows = []
-        user_found = False
         try:
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] == username:
-                        user_found = True
-                        row['Locked_counter'] = '5'
-                        row['Locked_status'] = 'locked'
-                    rows.append([row['Username'], row['Email'], row['Password'], row['Role'], row['Locked_counter'], row['Locked_status']])
-
-            if user_found:
-                # Write the updated data back to the file
-                with open(self.roles_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
-                    writer.writerows(rows)
+            self.directory.update(username, {'Locked_counter': '5', 'Locked_status': 'locked'})
         except FileNotFoundError:
             # Print for debugging purposes
             print("Roles file not found.")
@@ -222,30 +184,17 @@ class LoginRoles:
     
     def update_account(self, username: str, new_email=None, new_password=None, new_role=None):
         # Updates the account based on the username and new values
-        rows = []
-        user_found = False
-        try:
-            # Read the data from the file
-            with open(self.roles_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['Username'] == username:
-                        user_found = True
-                        # Update fields if new values are provided
-                        if new_email:
-                            row['Email'] = new_email
-                        if new_password:
-                            row['Password'] = new_password
-                        if new_role:
-                            row['Role'] = new_role
-                    rows.append([row['Username'], row['Email'], row['Password'], row['Role'], row['Locked_counter'], row['Locked_status']])
+        changes = {}
+        # Update fields if new values are provided
+        if new_email:
+            changes['Email'] = new_email
+        if new_password:
+            changes.update(self.password_columns(new_password))
+        if new_role:
+            changes['Role'] = new_role
 
-            if user_found:
-                # Write the updated data back to the file
-                with open(self.roles_file, mode='w', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow(['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status'])
-                    writer.writerows(rows)
+        try:
+            if self.directory.update(username, changes):
                 print(f"User '{username}' updated.")
                 return True
             else:
@@ -253,4 +202,14 @@ class LoginRoles:
         except FileNotFoundError:
             # Print for debugging purposes
             print("Roles file not found.")
-            return False
\ No newline at end of file
+            return False
+
+
+if __name__ == "__main__":
+    # Usage: python src/LoginRoles.py migrate-passwords
+    import sys
+    if sys.argv[1:] == ['migrate-passwords']:
+        print(f"Hashed the passwords of {LoginRoles().migrate_passwords()} account(s).")
+    else:
+        print("Usage: python src/LoginRoles.py migrate-passwords")
+        sys.exit(1)
@@ -0,0 +1,146 @@
+# Import necessary libraries for system operations
+from itertools import chain, islice
+
+
+class PDFTable:
+    # Draws a table into an FPDF document from any iterable of rows, one page at a time
+    # The column widths are worked out once from the headers and the first rows, the headers are repeated
+    # at the top of every page, and text too wide for its column is wrapped onto more lines of the same row.
+    # Rows are taken from the iterable as they are drawn, so a report never holds all of its rows at once.
+
+    # Rows measured to work out the column widths
+    SAMPLE_SIZE = 200
+
+    # Space left between the text and the cell border on each side, in mm
+    PADDING = 1.5
+
+    def __init__(self, pdf, headers, weights=None, align=None, font_size=10, line_height=10, sample_size=None):
+        # headers: column titles. weights: relative column widths, measured from the sample when not given.
+        # align: 'L', 'C' or 'R' for each column, centred when not given
+        self.pdf = pdf
+        self.headers = list(headers)
+        self.weights = weights
+        self.align = align or ['C'] * len(self.headers)
+        self.font_size = font_size
+        self.line_height = line_height
+        self.sample_size = sample_size or self.SAMPLE_SIZE
+
+        self.widths = None  # Column widths in mm, set when the first row is drawn
+        self.pages = 0  # Pages the table was drawn on
+        self.rows = 0  # Rows drawn
+
+
+    def render(self, rows):
+        # Draw every row of the iterable below what is already on the page, returns the number of rows drawn
+        # Each row is a sequence of values, one per column, converted with str() if they aren't text
+        pdf = self.pdf
+        rows = iter(rows)
+        sample = [[_text(value) for value in row] for row in islice(rows, self.sample_size)]
+        self.widths = self.column_widths(sample)
+        # Values with at most this many characters fit in their column whatever the characters are
+        pdf.set_font("Arial", size=self.font_size)
+        widest_character = max(pdf.get_string_width(character) for character in 'W@%M')
+        self._fitting_lengths = [int((width - 2 * self.PADDING) // widest_character) for width in self.widths]
+
+        # The table breaks its own pages so the headers can be repeated, turn FPDF's page breaks off meanwhile
+        auto_page_break, bottom_margin = pdf.auto_page_break, pdf.b_margin
+        pdf.set_auto_page_break(False, bottom_margin)
+        try:
+            self.draw_headers(new_page=False)
+            for row in chain(sample, rows):
+                self.draw_row([_text(value) for value in row])
+        finally:
+            pdf.set_auto_page_break(auto_page_break, bottom_margin)
+        return self.rows
+
+
+    def column_widths(self, sample):
+        # Widths that fill the page: from the weights, or from the widest of each column's header and sampled values
+        pdf = self.pdf
+        page_width = pdf.w - pdf.l_margin - pdf.r_margin
+        weights = self.weights
+        if weights is None:
+            pdf.set_font("Arial", style='B', size=self.font_size)
+            header_widths = [pdf.get_string_width(header) for header in self.headers]
+            pdf.set_font("Arial", size=self.font_size)
+            weights = []
+            for column, header_width in enumerate(header_widths):
+                values = sorted(pdf.get_string_width(row[column]) for row in sample if column < len(row))
+                # The 90th percentile, so one very long value doesn't squeeze every other column
+                value_width = values[int(len(values) * 0.9)] if values else 0
+                weights.append(max(header_width, value_width) + 2 * self.PADDING)
+        total = sum(weights)
+        return [page_width * weight / total for weight in weights]
+
+
+    def draw_headers(self, new_page=True):
+        # Start a page (unless the table starts on the current one and a row fits under the headers) and draw the column headers at the top
+        pdf = self.pdf
+        if new_page or pdf.page == 0 or pdf.get_y() + 2 * self.line_height > pdf.page_break_trigger:
+            pdf.add_page()
+        self.pages += 1
+        pdf.set_font("Arial", style='B', size=self.font_size)
+        for header, width in zip(self.headers, self.widths):
+            pdf.cell(width, self.line_height, header, border=1, align='C')
+        pdf.ln()
+        pdf.set_font("Arial", size=self.font_size)
+
+
+    def draw_row(self, values):
+        # Draw one row, on a new page with the headers if it doesn't fit on this one
+        pdf = self.pdf
+        lines = [
+            [value] if len(value) <= fitting_length else self._wrap(value, width)
+            for value, width, fitting_length in zip(values, self.widths, self._fitting_lengths)
+        ]
+        line_count = max((len(cell_lines) for cell_lines in lines), default=1)
+        height = self.line_height * line_count
+        if pdf.get_y() + height > pdf.page_break_trigger:
+            self.draw_headers()
+
+        if line_count == 1:
+            for cell_lines, width, align in zip(lines, self.widths, self.align):
+                pdf.cell(width, height, cell_lines[0], border=1, align=align)
+            pdf.ln()
+        else:
+            # A wrapped row: draw each cell's border at the full row height, then its lines inside it
+            x, y = pdf.get_x(), pdf.get_y()
+            for cell_lines, width, align in zip(lines, self.widths, self.align):
+                pdf.rect(x, y, width, height)
+                for number, line in enumerate(cell_lines):
+                    pdf.set_xy(x, y + number * self.line_height)
+                    pdf.cell(width, self.line_height, line, align=align)
+                x += width
+            pdf.set_xy(pdf.l_margin, y + height)
+        self.rows += 1
+
+
+    def _wrap(self, text, width):
+        # Split text into the lines that fit in a column, text that fits is returned after measuring it once
+        pdf = self.pdf
+        room = width - 2 * self.PADDING
+        if pdf.get_string_width(text) <= room:
+            return [text]
+        lines, line = [], ''
+        for word in text.split(' '):
+            candidate = f"{line} {word}" if line else word
+            if pdf.get_string_width(candidate) <= room:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            # A single word wider than the column is cut wherever it reaches the border
+            while pdf.get_string_width(word) > room and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and pdf.get_string_width(word[:cut]) > room:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            line = word
+        lines.append(line)
+        return lines
+
+
+def _text(value):
+    # A cell value as text
+    return value if isinstance(value, str) else str(value)
@@ -0,0 +1,159 @@
+# Import necessary libraries for system operations
+import os
+import time
+import hmac
+import base64
+import hashlib
+from collections import OrderedDict
+
+# Passwords are stored as scrypt$<log2 n>$<r>$<p>$<salt>$<hash>, salt and hash in base64
+SCHEME = 'scrypt'
+
+# Work factor: scrypt uses 2^cost iterations, every step up doubles the time to check a password
+# Pick the highest cost that keeps a login within budget on the pharmacy's computers
+# (python Tests/Benchmarks/bench_password_hashing.py), override with PHARMACY_PASSWORD_COST
+DEFAULT_COST = int(os.environ.get('PHARMACY_PASSWORD_COST', 14))
+BLOCK_SIZE = 8
+PARALLELISM = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# Work factor of the password fingerprints, fixed on purpose and separate from DEFAULT_COST:
+# every stored fingerprint was made with it, so changing it would stop them matching and let a password be reused
+FINGERPRINT_COST = 14
+
+# Secret key the fingerprints are keyed with, kept away from the accounts database: PHARMACY_FINGERPRINT_KEY if
+# set, otherwise a key file in the user's home folder (PHARMACY_FINGERPRINT_KEY_FILE to put it elsewhere)
+# Every terminal sharing an accounts database needs the same key
+FINGERPRINT_KEY_ENV = 'PHARMACY_FINGERPRINT_KEY'
+FINGERPRINT_KEY_FILE = os.environ.get(
+    'PHARMACY_FINGERPRINT_KEY_FILE', os.path.join(os.path.expanduser('~'), '.pharmacy', 'fingerprint.key')
+)
+KEY_BYTES = 32
+
+# Fingerprints made with the key start with this, older ones are replaced at the account's next login
+FINGERPRINT_PREFIX = 'hmac$'
+
+# Successful checks remembered so logging in again (e.g. a manager override) doesn't pay for scrypt twice
+# The password itself is not kept, only an HMAC of it under a key that never leaves this process
+VERIFY_CACHE_SIZE = 256
+_verified = OrderedDict()
+_cache_key = os.urandom(32)
+
+
+def hash_password(password, cost=None):
+    # Hash a password with a new random salt, returns the string stored in the accounts database
+    cost = DEFAULT_COST if cost is None else cost
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, cost, BLOCK_SIZE, PARALLELISM)
+    return '$'.join([SCHEME, str(cost), str(BLOCK_SIZE), str(PARALLELISM), _encode(salt), _encode(digest)])
+
+
+def verify_password(password, stored):
+    # Check a password against the value stored in the accounts database
+    # Accounts created before passwords were hashed still hold the password itself
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode(), (stored or '').encode())
+
+    cache_key = (stored, hmac.new(_cache_key, password.encode(), hashlib.sha256).digest())
+    if cache_key in _verified:
+        _verified.move_to_end(cache_key)
+        return True
+
+    try:
+        _, cost, block_size, parallelism, salt, digest = stored.split('$')
+        expected = base64.b64decode(digest)
+        actual = _scrypt(password, base64.b64decode(salt), int(cost), int(block_size), int(parallelism), len(expected))
+    except ValueError:
+        print("Stored password hash is damaged.")
+        return False
+
+    if not hmac.compare_digest(actual, expected):
+        return False
+    _verified[cache_key] = True
+    if len(_verified) > VERIFY_CACHE_SIZE:
+        _verified.popitem(last=False)
+    return True
+
+
+def needs_rehash(stored, cost=None):
+    # Check if a stored password should be hashed again: it is still plain text or uses another work factor
+    cost = DEFAULT_COST if cost is None else cost
+    if not is_hashed(stored):
+        return True
+    return stored.split('$')[1:4] != [str(cost), str(BLOCK_SIZE), str(PARALLELISM)]
+
+
+def is_hashed(stored):
+    # Check if a stored password was hashed by this module
+    return bool(stored) and stored.startswith(SCHEME + '$') and stored.count('$') == 5
+
+
+def fingerprint(password, salt, key):
+    # Hash a password with the installation's salt and key it with the secret key, so equal passwords give
+    # equal fingerprints. Lets the accounts database tell if a password is already used with one lookup
+    # instead of checking every hash
+    #
+    # One salt for every account means equal passwords have equal fingerprints, that is the point of them.
+    # The secret key is what keeps them from being guessed: whoever copies the accounts database and its salt
+    # file can't test a password against the fingerprints without the key, which is not stored with them.
+    # Without the key, guessing a password also costs one scrypt at FINGERPRINT_COST.
+    digest = _scrypt(password, salt, FINGERPRINT_COST, BLOCK_SIZE, PARALLELISM)
+    return FINGERPRINT_PREFIX + _encode(hmac.new(key, digest, hashlib.sha256).digest())
+
+
+def is_keyed(stored_fingerprint):
+    # Check if a stored fingerprint was made with the secret key
+    return bool(stored_fingerprint) and stored_fingerprint.startswith(FINGERPRINT_PREFIX)
+
+
+def load_salt(salt_file):
+    # Read the installation's fingerprint salt, creating it the first time
+    return _load_secret(salt_file, SALT_BYTES)
+
+
+def load_key(key_file=None):
+    # Read the secret key of the fingerprints, creating the key file the first time
+    key = os.environ.get(FINGERPRINT_KEY_ENV)
+    if key:
+        return key.encode()
+    key_file = key_file or FINGERPRINT_KEY_FILE
+    os.makedirs(os.path.dirname(os.path.abspath(key_file)), mode=0o700, exist_ok=True)
+    return _load_secret(key_file, KEY_BYTES)
+
+
+def _load_secret(path, size):
+    # Read random bytes kept in a file, creating the file with size new random bytes the first time
+    try:
+        with open(path, mode='rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        pass
+
+    try:
+        # O_EXCL: if another terminal creates the file at the same moment, use the one it wrote
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(100):
+            with open(path, mode='rb') as file:
+                secret = file.read()
+            if secret:
+                return secret
+            time.sleep(0.01)  # The other terminal created the file but hasn't written it yet
+        raise RuntimeError(f"Password secret file is empty: {path}")
+    secret = os.urandom(size)
+    with os.fdopen(descriptor, mode='wb') as file:
+        file.write(secret)
+    return secret
+
+
+def _scrypt(password, salt, cost, block_size, parallelism, length=HASH_BYTES):
+    n = 2 ** cost
+    # scrypt needs 128 * r * n bytes, leave room above it so high work factors aren't refused
+    max_memory = 2 * 128 * block_size * n + 1024 * 1024
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=block_size, p=parallelism,
+                          maxmem=max_memory, dklen=length)
+
+
+def _encode(data):
+    return base64.b64encode(data).decode('ascii')
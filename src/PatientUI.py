@@ -1,18 +1,17 @@
 from PyQt5.QtWidgets import QMainWindow, QMessageBox, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton
-import os
-from PyQt5.uic import loadUi
+from UILoader import load_ui
 from src.Patient import Patient  # Import the Patient class
-from LoginRoles import LoginRoles
+from Session import REMOVE_PATIENT
 
 class PatientUI(QMainWindow):
-    def __init__(self, widget, username): # Accept the widget and username as arguments
+    def __init__(self, widget, session): # Accept the widget and session of the logged in user as arguments
         super(PatientUI, self).__init__()
         self.widget = widget
-        self.username = username
+        self.session = session
+        self.username = session.username
 
         # Load the UI file
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'UpdateCustomerInfo.ui')
-        loadUi(ui_path, self)
+        load_ui('UpdateCustomerInfo.ui', self)
         
         # Set the window title
         self.setMinimumSize(1000, 500)  
@@ -27,29 +26,21 @@ class PatientUI(QMainWindow):
         # Initialize the Patient class to interact with the patient database
         self.patient_db = Patient()
         
-        # Initialize the LoginRoles class to check user permissions
-        self.roles = LoginRoles()
-        
         # Set up user role permissions
         self.setup_ui()
         
         
     def setup_ui(self):
-        user_role = self.roles.find_user_role(self.username)
         # Only enable the remove button for managers or pharmacists
-        self.removePatientButton.setEnabled(user_role in ['manager', 'pharmacist'])
+        self.removePatientButton.setEnabled(self.session.can(REMOVE_PATIENT))
         
         
     def backToDashboard(self):
         # Goes back to the Dashboard page
-        from src.Dashboard import Dashboard # Import the Dashboard class don't want circular imports
-        
-        # Create a new instance of the Dashboard class and add it to the stacked widget
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
-        
-        
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
+
+
     def savePatientInfo(self):
         # Save patient information to the database
         patient_data = {
@@ -145,6 +136,11 @@ class PatientUI(QMainWindow):
                 QMessageBox.warning(self, "Error", "Patient not found.")
 
 
+    def on_show(self):
+        # Called by the ScreenRouter when the screen is shown again, start from an empty form
+        self.clearFields()
+
+
     def clearFields(self):
         # Clear all input fields
         self.firstName.clear()
@@ -0,0 +1,189 @@
+# Import necessary libraries for system operations
+import os
+from AtomicFile import current_batch
+from Storage import TABLES, open_table
+
+
+class PrescriptionStore:
+    # Column order of the prescriptions database
+    FIELDNAMES = TABLES['prescriptions']['fields']
+
+    # One store per prescriptions file, shared by every Prescriptions instance in the process
+    _stores = {}
+
+    @classmethod
+    def for_file(cls, prescription_file):
+        # Return the shared store for the given file, creating it the first time it is requested
+        key = os.path.normcase(os.path.abspath(prescription_file))
+        store = cls._stores.get(key)
+        if store is None:
+            store = cls(key)
+            cls._stores[key] = store
+        return store
+
+
+    def __init__(self, prescription_file):
+        self.prescription_file = prescription_file
+        self.table = open_table('prescriptions', prescription_file)
+
+        # Reader/writer lock on the prescriptions table
+        self.lock = self.table.lock
+
+        # In-memory copy of the prescriptions and the indexes built over it
+        self.rows = []  # Every prescription in file order
+        self.by_number = {}  # Prescription number -> list of rows (normally one)
+        self.by_patient = {}  # (first name, last name, DOB) -> list of rows
+        self.by_status = {}  # Status -> {id(row): row}, in the order rows entered the status
+
+        # Signature of the table the rows were loaded from, None until the first load
+        self._signature = None
+        # Rows changed or added inside an open WriteBatch and not written yet
+        self._pending_changed = {}
+        self._pending_new = []
+
+
+    def refresh(self):
+        # Reload the prescriptions if the table was written by someone else since the last load
+        if self._pending_changed or self._pending_new:
+            return  # Changes staged in an open WriteBatch are newer than anything on disk
+
+        with self.lock.shared():
+            signature = self.table.signature()
+            if signature != self._signature:
+                self._load()
+                self._signature = signature
+
+
+    def _load(self):
+        # Read the whole table and rebuild the indexes
+        self.rows = []
+        self.by_number = {}
+        self.by_patient = {}
+        self.by_status = {}
+        for row in self.table.read_all():
+            self._index({field: row.get(field) or '' for field in self.FIELDNAMES})
+
+
+    def _index(self, row):
+        # Add a row to the in-memory list and to every index
+        self.rows.append(row)
+        self.by_number.setdefault(row['Prescription_Number'].strip(), []).append(row)
+        self.by_patient.setdefault(_patient_key(row), []).append(row)
+        self.by_status.setdefault(row['Status'], {})[id(row)] = row
+
+
+    def get(self, prescription_number):
+        # Return the rows with the given prescription number
+        return self.by_number.get(str(prescription_number).strip(), [])
+
+
+    def find_by_patient(self, first_name, last_name, dob):
+        # Return the prescriptions of one patient
+        return self.by_patient.get((first_name, last_name, dob), [])
+
+
+    def find_by_status(self, status):
+        # Return the prescriptions with the given status
+        return list(self.by_status.get(status, {}).values())
+
+
+    def add(self, row):
+        # Add a new prescription and write it
+        row = {field: row.get(field) or '' for field in self.FIELDNAMES}
+        with self.lock.exclusive():
+            self.refresh()
+            self._index(row)
+            self.commit(new_rows=[row])
+        return row
+
+
+    def update(self, prescription_number, changes):
+        # Apply the changes to the prescription(s) with the given number, returns how many rows changed
+        changes = {column: str(value) for column, value in changes.items() if column in self.FIELDNAMES}
+        with self.lock.exclusive():
+            self.refresh()
+            rows = self.get(prescription_number)
+            for row in rows:
+                self._change(row, changes)
+            self.commit(changed_rows=rows)
+        return len(rows)
+
+
+    def _change(self, row, changes):
+        # Update a row in place, moving it between the index buckets of the columns that changed
+        old_number = row['Prescription_Number'].strip()
+        old_patient = _patient_key(row)
+        old_status = row['Status']
+        row.update(changes)
+
+        if row['Prescription_Number'].strip() != old_number:
+            self.by_number[old_number].remove(row)
+            self.by_number.setdefault(row['Prescription_Number'].strip(), []).append(row)
+        if _patient_key(row) != old_patient:
+            self.by_patient[old_patient].remove(row)
+            self.by_patient.setdefault(_patient_key(row), []).append(row)
+        if row['Status'] != old_status:
+            del self.by_status[old_status][id(row)]
+            self.by_status.setdefault(row['Status'], {})[id(row)] = row
+
+
+    def commit(self, changed_rows=(), new_rows=()):
+        # Persist rows that were changed or added in memory
+        changed_rows = list(changed_rows)
+        new_rows = list(new_rows)
+        if not changed_rows and not new_rows:
+            return
+
+        # Inside a WriteBatch the rows are written once, when the batch ends
+        batch = current_batch()
+        if batch is not None:
+            for row in changed_rows:
+                self._pending_changed[id(row)] = row
+            self._pending_new.extend(new_rows)
+            batch.defer(self, self._flush_pending, self._discard_pending)
+            return
+
+        with self.lock.exclusive():
+            try:
+                self._write(changed_rows, new_rows)
+            except BaseException:
+                self._signature = None  # The rows in memory were not written, reload them on next use
+                raise
+
+
+    def _flush_pending(self):
+        # Write the rows collected during a WriteBatch
+        changed_rows = list(self._pending_changed.values())
+        new_rows = self._pending_new
+        self._pending_changed = {}
+        self._pending_new = []
+        with self.lock.exclusive():
+            self._write(changed_rows, new_rows)
+
+
+    def _discard_pending(self):
+        # The WriteBatch was abandoned, forget the in-memory changes and reload on next use
+        self._pending_changed = {}
+        self._pending_new = []
+        self._signature = None
+
+
+    def _write(self, changed_rows, new_rows):
+        if changed_rows and self.table.backend == 'csv':
+            # A changed row means rewriting the file, which writes the new rows too
+            self.table.write_all(self.rows)
+        else:
+            if changed_rows:
+                self.table.update_many('Prescription_Number', {
+                    row['Prescription_Number']: row for row in changed_rows
+                })
+            for row in new_rows:
+                self.table.append(row)
+
+        # Remember the signature of our own write so it does not trigger a reload
+        self._signature = self.table.signature()
+
+
+def _patient_key(row):
+    # Key of the patient index
+    return (row['Patient_First_Name'], row['Patient_Last_Name'], row['Patient_DOB'])
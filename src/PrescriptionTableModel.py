@@ -0,0 +1,90 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class PrescriptionTableModel(QAbstractTableModel):
+    # Table model that shows prescriptions a page at a time
+    # Only the first page is read when the filter is set, the view asks for the next page (fetchMore)
+    # when it scrolls near the end, so opening a table costs the same no matter how long the history is
+
+    # Number of prescriptions read per page
+    PAGE_SIZE = 100
+
+    def __init__(self, prescriptions, columns, parent=None):
+        # prescriptions is a Prescriptions instance, columns a list of (header, column name) pairs
+        super(PrescriptionTableModel, self).__init__(parent)
+        self.prescriptions = prescriptions
+        self.columns = list(columns)
+        self.filter = None
+        self.rows = []  # Prescriptions loaded so far
+        self._exhausted = True  # True once the last page has been read
+
+
+    def set_filter(self, filter):
+        # Show the prescriptions matching filter (a dictionary of column -> value), starting again at the first page
+        self.beginResetModel()
+        self.filter = dict(filter)
+        self.rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+
+    def clear(self):
+        # Show nothing
+        self.beginResetModel()
+        self.filter = None
+        self.rows = []
+        self._exhausted = True
+        self.endResetModel()
+
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._exhausted
+
+
+    def fetchMore(self, parent):
+        # Read the next page and append it to the table
+        if parent.isValid() or self._exhausted:
+            return
+        page = list(self.prescriptions.iter_prescriptions(self.filter, offset=len(self.rows), limit=self.PAGE_SIZE))
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        return self.rows[index.row()].get(self.columns[index.column()][1], '')
+
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return str(section + 1)
+
+
+    def row_data(self, row):
+        # The prescription shown in a row, or None if the row does not exist
+        if 0 <= row < len(self.rows):
+            return self.rows[row]
+        return None
+
+
+    def update_row(self, row, changes):
+        # Show changes made to the prescription in a row without reloading the table
+        self.rows[row].update(changes)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
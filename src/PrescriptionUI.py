@@ -1,17 +1,24 @@
-from PyQt5.QtWidgets import QMainWindow, QTableWidgetItem, QMessageBox, QDialog, QVBoxLayout, QLineEdit, QLabel, QPushButton
-from PyQt5.uic import loadUi
-import os
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QDialog, QVBoxLayout, QLineEdit, QLabel, QPushButton
+from UILoader import load_ui
 from Prescriptions import Prescriptions
+from PrescriptionTableModel import PrescriptionTableModel
 
 class PrescriptionUI(QMainWindow):
-    def __init__(self, widget, username):  # Accept the widget and username as an argument
+    # Columns of the patient prescriptions table: (header, prescription column)
+    COLUMNS = [
+        ('First Name', 'Patient_First_Name'), ('Last Name', 'Patient_Last_Name'), ('DOB', 'Patient_DOB'),
+        ('Prescription Number', 'Prescription_Number'), ('Medication', 'Medication'), ('Quantity', 'Quantity'),
+        ('Status', 'Status'), ('Pharmacist', 'Pharmacist'),
+    ]
+
+    def __init__(self, widget, session):  # Accept the widget and session of the logged in user as an argument
         super(PrescriptionUI, self).__init__()
         self.widget = widget  
-        self.username = username  
+        self.session = session
+        self.username = session.username
 
         # Load the UI file relative to the project's root
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'PendingPrescription.ui')
-        loadUi(ui_path, self)
+        load_ui('PendingPrescription.ui', self)
         
         # Set the window title
         self.setMinimumSize(950, 800)
@@ -25,19 +32,19 @@ class PrescriptionUI(QMainWindow):
         
         # Initialize the Prescriptions class to interact with the prescription database
         self.pending_prescription_db = Prescriptions()
+
+        # The table reads the patient's prescriptions a page at a time
+        self.prescription_model = PrescriptionTableModel(self.pending_prescription_db, self.COLUMNS, self)
+        self.ItemsTable.setModel(self.prescription_model)
         
 
     def backButton(self):
         # Goes back to the Dashboard page
-        from src.Dashboard import Dashboard  # Importing MainUI inside the function to avoid circular import
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
 
         # Reset the table before returning to the dashboard.
         self.reset_table()
-
-        # Always create a new instance of MainUI
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
+        ScreenRouter.for_widget(self.widget).show('dashboard')
 
 
     def addPrescriptionToDB(self):
@@ -78,9 +85,7 @@ class PrescriptionUI(QMainWindow):
 
     def reset_table(self):
         # Clear all items in the table if button is pressed
-        for row in range(self.ItemsTable.rowCount()):
-            for column in range(self.ItemsTable.columnCount()):
-                self.ItemsTable.setItem(row, column, QTableWidgetItem(""))  # Clear the cell contents
+        self.prescription_model.clear()
                 
                 
     def findPatient(self):
@@ -118,24 +123,17 @@ class PrescriptionUI(QMainWindow):
             last_name = lastNameInput.text().strip()
             dob = dobInput.text().strip()
             
-            # Retrieve prescriptions for the patient
-            patient_prescription_data = self.pending_prescription_db.findByPatient(first_name, last_name, dob)
-
-            # Set the table widget's row count to the number of entries found
-            self.ItemsTable.setRowCount(len(patient_prescription_data))
-            self.ItemsTable.setColumnCount(len(self.pending_prescription_db.read_prescriptions()[0]))
-
-            # Populate the table
-            for row_index, row_data in enumerate(patient_prescription_data):
-                for col_index, value in enumerate(row_data.values()):  # Use row_data.values() to get dictionary values
-                    self.ItemsTable.setItem(row_index, col_index, QTableWidgetItem(str(value)))
+            # Show the patient's prescriptions, only the first page is read until the table is scrolled
+            self.prescription_model.set_filter({
+                'Patient_First_Name': first_name, 'Patient_Last_Name': last_name, 'Patient_DOB': dob
+            })
                   
                     
     def pickUpPrescription(self):
         # Change the status of a prescription to 'Picked Up'
         
         # Get the selected row
-        selected_row = self.ItemsTable.currentRow()
+        selected_row = self.ItemsTable.currentIndex().row()
         
         # Check if a row is selected
         if selected_row == -1:
@@ -144,21 +142,21 @@ class PrescriptionUI(QMainWindow):
             return
 
         # Retrieve the Prescription Number from the selected row
-        prescription_number_item = self.ItemsTable.item(selected_row, 3) 
+        prescription = self.prescription_model.row_data(selected_row)
         
-        if prescription_number_item is None:
+        if prescription is None:
             # Notify user if the prescription number is not found
             QMessageBox.warning(self, "Warning", "Invalid selection. Please select a valid row.")
             return
 
-        prescription_number = prescription_number_item.text()
+        prescription_number = prescription['Prescription_Number']
 
         # Call the database method to update the status
         success = self.pending_prescription_db.pickup_prescription(prescription_number)
 
         if success:
             # Update the status in the UI
-            self.ItemsTable.setItem(selected_row, 6, QTableWidgetItem("Picked Up"))  # Assuming the 7th column is Status
+            self.prescription_model.update_row(selected_row, {'Status': 'Picked Up'})
 
             # Show success message
             QMessageBox.information(self, "Success", f"Prescription {prescription_number} marked as Picked Up.")
@@ -1,6 +1,9 @@
 import csv
 import os
 from datetime import datetime
+from itertools import islice
+from PrescriptionStore import PrescriptionStore
+from AtomicFile import WriteBatch
 class Prescriptions:
     def __init__(self, prescription_file='../DBFiles/db_prescriptions.csv'): 
         base_path = os.path.dirname(os.path.abspath(__file__))
@@ -14,76 +17,128 @@ class Prescriptions:
                                 'Prescription_Number', 'Medication', 'Quantity', 
                                 'Status', 'Pharmacist'])
 
+        # In-memory prescriptions shared by every Prescriptions instance, indexed by number, patient and status
+        self.store = PrescriptionStore.for_file(self.prescription_file)
+
 
 
     def add_prescription(self, first_name, last_name, dob, prescription_number, medication, quantity):
         # Add a new prescription to the database
         # Status is set to 'Pending' by default when a new prescription is added
-        with open(self.prescription_file, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([first_name, last_name, dob, prescription_number, medication, quantity, 'Pending'])
+        self.store.add({
+            'Patient_First_Name': first_name, 'Patient_Last_Name': last_name, 'Patient_DOB': dob,
+            'Prescription_Number': prescription_number, 'Medication': medication, 'Quantity': str(quantity),
+            'Status': 'Pending'
+        })
 
 
     def read_prescriptions(self):
         # Read all prescriptions from the database
-        with open(self.prescription_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            return [row for row in reader]
+        self.store.refresh()
+        return [dict(row) for row in self.store.rows]
     
     
     def findByPatient(self, firstName, lastName, dob):
         # Find all prescriptions for a specific patient
-        prescriptions = self.read_prescriptions()
-        return [p for p in prescriptions if p['Patient_First_Name'] == firstName and p['Patient_Last_Name'] == lastName and p['Patient_DOB'] == dob]
+        self.store.refresh()
+        return [dict(row) for row in self.store.find_by_patient(firstName, lastName, dob)]
+
+
+    def find_by_status(self, status):
+        # Find all prescriptions with the given status, e.g. the 'Pending' queue
+        self.store.refresh()
+        return [dict(row) for row in self.store.find_by_status(status)]
     
     
+    def iter_prescriptions(self, filter=None, offset=0, limit=None):
+        # Yield copies of the prescriptions matching filter (a dictionary of column -> value) one at a time
+        # Skips the first offset matches and stops after limit of them, so a page costs only the rows it returns
+        self.store.refresh()
+        filter = filter or {}
+        stop = None if limit is None else offset + limit
+        for row in islice(self._matching_rows(filter), offset, stop):
+            yield dict(row)
+
+
+    def count_prescriptions(self, filter=None):
+        # Count the prescriptions matching filter without copying them
+        self.store.refresh()
+        return sum(1 for _ in self._matching_rows(filter or {}))
+
+
+    def _matching_rows(self, filter):
+        # Start from the smallest index that covers part of the filter, then check the rest of it
+        if 'Prescription_Number' in filter:
+            candidates = list(self.store.get(filter['Prescription_Number']))
+        elif all(column in filter for column in ('Patient_First_Name', 'Patient_Last_Name', 'Patient_DOB')):
+            candidates = list(self.store.find_by_patient(
+                filter['Patient_First_Name'], filter['Patient_Last_Name'], filter['Patient_DOB']
+            ))
+        elif 'Status' in filter:
+            candidates = self.store.find_by_status(filter['Status'])
+        else:
+            candidates = self.store.rows
+
+        for row in candidates:
+            if all(row.get(column) == value for column, value in filter.items()):
+                yield row
+
+
     def pickup_prescription(self, prescription_number):
         # Update the status of a prescription to 'Picked Up' if button is clicked
-        prescriptions = self.read_prescriptions()
-        updated = False # Flag to indicate if the prescription was found and updated
-
-        # Update the status of the prescription
-        for p in prescriptions:
-            if p['Prescription_Number'] == prescription_number:
-                p['Status'] = 'Picked Up'
-                updated = True
-                break
-
-        # Write the updated prescriptions back to the CSV file
-        with open(self.prescription_file, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=['Patient_First_Name', 'Patient_Last_Name', 'Patient_DOB',
-                                                      'Prescription_Number', 'Medication', 'Quantity', 'Status', 'Pharmacist'])
-            writer.writeheader()
-            writer.writerows(prescriptions)
-
-        return updated
+        # Returns True if the prescription was found and updated
+        return self.store.update(prescription_number, {'Status': 'Picked Up'}) > 0
     
     
     def update_status(self, prescription_number, new_status, pharmacist=None):
         # Update the status and optionally the pharmacist of a prescription
-        prescriptions = self.read_prescriptions()
-        updated = False  # Flag to indicate if the prescription was found and updated
-
-        # Update the status and pharmacist for the selected prescription
-        for p in prescriptions:
-            if p['Prescription_Number'] == prescription_number:
-                p['Status'] = new_status
-                if pharmacist:  # Only update the pharmacist if provided
-                    p['Pharmacist'] = pharmacist
-                updated = True
-                break
-
-        # Write back to the CSV if updated
-        if updated:
-            with open(self.prescription_file, mode='w', newline='') as file:
-                writer = csv.DictWriter(
-                    file,
-                    fieldnames=[
-                        'Patient_First_Name', 'Patient_Last_Name', 'Patient_DOB',
-                        'Prescription_Number', 'Medication', 'Quantity', 'Status', 'Pharmacist'
-                    ]
-                )
-                writer.writeheader()
-                writer.writerows(prescriptions)
-
-        return updated
+        changes = {'Status': new_status}
+        if pharmacist:  # Only update the pharmacist if provided
+            changes['Pharmacist'] = pharmacist
+
+        # Returns True if the prescription was found and updated
+        return self.store.update(prescription_number, changes) > 0
+
+
+    def fill_prescriptions(self, prescription_numbers, inventory, pharmacist=None):
+        # Fill many pending prescriptions at once, taking the stock from the given Inventory
+        # The inventory and the prescriptions are each written once, when the batch ends, and nothing is written if a step fails before that
+        # Returns a dictionary of prescription number -> (filled, message) in the order given
+        results = {}
+        orders = []  # (prescription number, row, quantity) of the prescriptions that can be tried
+
+        # Prescriptions are locked before the inventory, the same order every other batch uses
+        with WriteBatch(), self.store.lock.exclusive():
+            self.store.refresh()
+
+            for prescription_number in prescription_numbers:
+                prescription_number = str(prescription_number).strip()
+                rows = self.store.get(prescription_number)
+                if prescription_number in results:
+                    continue  # Selected twice, fill it only once
+                if not rows:
+                    results[prescription_number] = (False, "Prescription not found.")
+                elif rows[0]['Status'] != 'Pending':
+                    results[prescription_number] = (False, f"Prescription is already {rows[0]['Status']}.")
+                else:
+                    try:
+                        orders.append((prescription_number, rows[0], int(rows[0]['Quantity'])))
+                        results[prescription_number] = None  # Keeps the results in the order given
+                    except ValueError:
+                        results[prescription_number] = (False, f"Invalid quantity '{rows[0]['Quantity']}'.")
+
+            # Allocate the stock for every prescription in one pass over the inventory
+            filled = inventory.fill_prescriptions([(row['Medication'], quantity) for _, row, quantity in orders])
+
+            for (prescription_number, row, quantity), success in zip(orders, filled):
+                if success:
+                    changes = {'Status': 'Filled'}
+                    if pharmacist:  # Only update the pharmacist if provided
+                        changes['Pharmacist'] = pharmacist
+                    # Staged in the batch, every filled prescription is written in a single write
+                    self.store.update(prescription_number, changes)
+                    results[prescription_number] = (True, f"Filled {quantity} units of '{row['Medication']}'.")
+                else:
+                    results[prescription_number] = (False, f"Insufficient unexpired stock of '{row['Medication']}'.")
+
+        return results
@@ -1,23 +1,34 @@
 from PyQt5.QtWidgets import QMainWindow, QTableWidgetItem, QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QTextEdit
-from PyQt5.uic import loadUi
+from UILoader import load_ui
 import os
 import csv
 from PyQt5.QtCore import pyqtSlot
 from datetime import datetime
 from Inventory import Inventory
+from Storage import open_table
+from AtomicFile import WriteBatch
+from SalesRollup import SalesRollup
+import TransactionLog
 
 
 class Purchases(QMainWindow):
-    def __init__(self, widget, username): # Accept the widget and username as arguments
+    def __init__(self, widget, session): # Accept the widget and session of the logged in user as arguments
         super(Purchases, self).__init__()
         self.widget = widget
-        self.username = username
+        self.session = session
+        self.username = session.username
         
         # Initialize the inventory class
         self.inventory = Inventory()
 
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'Purchase.ui')
-        loadUi(ui_path, self)
+        # The purchase data and the daily sales totals, opened by the first sale and kept for the next ones,
+        # so a sale only appends to them instead of reading the purchase file again
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        self.purchase_file = os.path.join(base_path, '..', 'DBFiles', 'db_purchase_data.csv')
+        self.purchase_table = None
+        self.sales_rollup = None
+
+        load_ui('Purchase.ui', self)
 
         # Set the window title
         self.setMinimumSize(1100, 600)
@@ -60,12 +71,8 @@ class Purchases(QMainWindow):
 
     def cancelPurchase(self):
         # Takes the user back to the dashboard
-        from src.Dashboard import Dashboard # Don't want circular imports here so import inside the function
-
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
-        self.widget.setFixedSize(1050, 600)
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
 
 
     def complete_purchase(self):
@@ -93,15 +100,17 @@ class Purchases(QMainWindow):
         grand_total = self.grandTotalLabel.text()
         QMessageBox.information(self, "Purchase Complete", f"Purchase completed successfully.\n{grand_total}")
 
-        # Saving purchases details to purchase CSV
-        self.save_to_csv(first_name, last_name, payment_method, grand_total)
+        # Save the purchase and update the inventory together, one durable write per file
+        with WriteBatch():
+            # Saving purchases details to purchase CSV
+            self.save_to_csv(first_name, last_name, payment_method, grand_total)
+
+            # Update the inventory based on the items purchased
+            self.update_inventory_after_purchase()
 
         # Log the purchase action
         self.log_purchase()
 
-        # Update the inventory based on the items purchased
-        self.update_inventory_after_purchase()
-
         # Reset table
         self.reset_table()
         self.FName.clear()
@@ -110,44 +119,19 @@ class Purchases(QMainWindow):
 
 
     def log_purchase(self):
-        # Log the purchase action to a file
-        log_file = os.path.join(os.path.dirname(__file__), '..', 'logs', 'transaction.log')
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        username = self.username
-
-        # Format the log entry
-        log_entry = f"{timestamp} - USER: {username} - ACTION: PURCHASE\n"
-
-        # Write the log entry to the file
-        try:
-            with open(log_file, mode='a') as file:
-                file.write(log_entry)
-        except Exception as e:
-            # Notify the user if the log file write fails
-            QMessageBox.critical(self, "Error", f"Failed to write to log file: {e}")
+        # Log the purchase action with the IDs of the items sold
+        item_ids = [
+            self.ItemsTable.item(row, 1).text().strip() for row in range(self.ItemsTable.rowCount())
+            if self.ItemsTable.item(row, 1) and self.ItemsTable.item(row, 1).text().strip()
+        ]
+        TransactionLog.log(
+            TransactionLog.PURCHASE, self.username, f"Purchase by user: {self.username}",
+            item_ids=item_ids, customer=f"{self.FName.text()} {self.LName.text()}".strip()
+        )
 
 
     def update_inventory_after_purchase(self):
         # Update the inventory quantities after a purchase
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        inventory_file = os.path.join(base_path, '..', 'DBFiles', 'db_inventory.csv')
-
-        if not os.path.exists(inventory_file):
-            # Notify the user if the inventory file is missing
-            QMessageBox.critical(self, "Error", "Inventory file not found.")
-            return
-
-        # Load the inventory data into a dictionary
-        inventory = {}
-        
-        # Read the inventory data from the CSV file
-        with open(inventory_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                inventory[row['ID']] = row
-
-        # Update the inventory quantities based on the items purchased
         for row in range(self.ItemsTable.rowCount()):
             item_id = self.ItemsTable.item(row, 1).text().strip() if self.ItemsTable.item(row, 1) else ""
 
@@ -164,22 +148,8 @@ class Purchases(QMainWindow):
                 # Set the quantity to 0 if it's not a valid number
                 quantity_purchased = 0
 
-            if item_id in inventory:
-                try:
-                    # Subtract the purchased quantity from the current quantity
-                    current_quantity = int(inventory[item_id]['Quantity'])
-                except ValueError:
-                    current_quantity = 0
-
-                # Ensure the new quantity is not negative
-                new_quantity = max(0, current_quantity - quantity_purchased)
-                inventory[item_id]['Quantity'] = str(new_quantity)
-
-        # Write the updated inventory back to the CSV
-        with open(inventory_file, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(inventory.values())
+            # Subtract the purchased quantity from the current quantity, never going below 0
+            self.inventory.sell_item(item_id, quantity_purchased)
 
 
     def check_for_prescription_items(self):
@@ -210,8 +180,7 @@ class Purchases(QMainWindow):
 
     def save_to_csv(self, first_name, last_name, payment_method, grand_total):
         # Save the purchase details to a CSV file
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(base_path, '..', 'DBFiles', 'db_purchase_data.csv')
+        file_path = self.purchase_file
 
         # does csv exist?
         if not os.path.exists(file_path):
@@ -226,25 +195,36 @@ class Purchases(QMainWindow):
         # Get the current date in the format YYYY-MM-DD
         current_date = datetime.now().strftime("%Y-%m-%d")
 
-        # Open the CSV file in append mode to add new data
-        with open(file_path, mode='a', newline='') as file:
-            writer = csv.writer(file)
+        # Open the purchase table with the selected storage backend, the first time a purchase is saved
+        if self.purchase_table is None:
+            self.purchase_table = open_table('purchases', file_path)
+            self.sales_rollup = SalesRollup.for_file(purchase_file=file_path)
+        table = self.purchase_table
 
-            # Collect all rows
-            for row in range(self.ItemsTable.rowCount()):
-                item_name = self.ItemsTable.item(row, 0).text() if self.ItemsTable.item(row, 0) else ""
-                item_id = self.ItemsTable.item(row, 1).text() if self.ItemsTable.item(row, 1) else ""
-                quantity = self.ItemsTable.item(row, 2).text() if self.ItemsTable.item(row, 2) else "0"
-                price = self.ItemsTable.item(row, 3).text() if self.ItemsTable.item(row, 3) else "0.00"
-                total_cost = self.ItemsTable.item(row, 4).text() if self.ItemsTable.item(row, 4) else "0.00"
-                prescription_status = self.ItemsTable.item(row, 5).text().lower() if self.ItemsTable.item(row, 5) else "no"
+        # Collect all rows
+        sold = []
+        for row in range(self.ItemsTable.rowCount()):
+            item_name = self.ItemsTable.item(row, 0).text() if self.ItemsTable.item(row, 0) else ""
+            item_id = self.ItemsTable.item(row, 1).text() if self.ItemsTable.item(row, 1) else ""
+            quantity = self.ItemsTable.item(row, 2).text() if self.ItemsTable.item(row, 2) else "0"
+            price = self.ItemsTable.item(row, 3).text() if self.ItemsTable.item(row, 3) else "0.00"
+            total_cost = self.ItemsTable.item(row, 4).text() if self.ItemsTable.item(row, 4) else "0.00"
+            prescription_status = self.ItemsTable.item(row, 5).text().lower() if self.ItemsTable.item(row, 5) else "no"
+
+            # Skip rows where the ID is empty
+            if not item_id.strip():
+                continue
 
-                # Skip rows where the ID is empty
-                if not item_id.strip():
-                    continue
+            # Write data for each item
+            table.append({
+                'Date': current_date, 'First Name': first_name, 'Last Name': last_name, 'Item Name': item_name,
+                'ID': item_id, 'Quantity': quantity, 'Price': price, 'Total Cost': total_cost,
+                'Grand Total': grand_total_numeric, 'Payment Method': payment_method, 'Prescription': prescription_status
+            })
+            sold.append((item_name, quantity, total_cost))
 
-                # Write data for each item
-                writer.writerow([current_date, first_name, last_name, item_name, item_id, quantity, price, total_cost, grand_total_numeric, payment_method, prescription_status])
+        # Add the sale to the daily sales totals the financial report reads
+        self.sales_rollup.record_sale(current_date, payment_method, sold)
 
 
     def reset_table(self):
@@ -258,17 +238,8 @@ class Purchases(QMainWindow):
 
     def returnToDashboard(self):
         # return to the dashboard
-        from src.Dashboard import Dashboard # Import here to avoid circular imports
-
-        for i in range(self.widget.count()):
-            if isinstance(self.widget.widget(i), Dashboard):
-                self.widget.setCurrentIndex(i)
-                return
-
-        # If the dashboard is not found, create a new instance
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
 
 
     def update_grand_total(self, item=None):
@@ -312,28 +283,21 @@ class Purchases(QMainWindow):
 
             item_id = id_item.text().strip()
 
-            # Read from db_inventory.csv
-            base_path = os.path.dirname(os.path.abspath(__file__))
-            inventory_file = os.path.join(base_path, '..', 'DBFiles', 'db_inventory.csv')
-
-            if not os.path.exists(inventory_file):
+            if not os.path.exists(self.inventory.inventory_file):
                 # Notify the user if the inventory file is missing
                 QMessageBox.critical(self, "Error", "Inventory file not found.")
                 return
 
-            # Look up the item in the inventory file
+            # Look up the item in the inventory
             item_found = False
-            with open(inventory_file, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row_data in reader:
-                    if row_data['ID'] == item_id:
-                        # Populate the table row with the item's details
-                        self.ItemsTable.setItem(row, 0, QTableWidgetItem(row_data['Item']))  
-                        self.ItemsTable.setItem(row, 2, QTableWidgetItem("1"))  
-                        self.ItemsTable.setItem(row, 3, QTableWidgetItem(row_data['Price']))
-                        self.ItemsTable.setItem(row, 5, QTableWidgetItem("No"))
-                        item_found = True
-                        break
+            row_data = self.inventory.get_item(item_id)
+            if row_data:
+                # Populate the table row with the item's details
+                self.ItemsTable.setItem(row, 0, QTableWidgetItem(row_data['Item']))  
+                self.ItemsTable.setItem(row, 2, QTableWidgetItem("1"))  
+                self.ItemsTable.setItem(row, 3, QTableWidgetItem(row_data['Price']))
+                self.ItemsTable.setItem(row, 5, QTableWidgetItem("No"))
+                item_found = True
 
             # If the item was not found, clear the row's data and show a warning
             if not item_found:
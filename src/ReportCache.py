@@ -0,0 +1,148 @@
+# Import necessary libraries for system operations
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+# Directory the generated reports are kept in, override with PHARMACY_REPORT_CACHE_DIR
+CACHE_DIR = os.environ.get('PHARMACY_REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pharmacy_reports'))
+
+# Most megabytes of reports kept, the least recently used ones are removed first. Override with PHARMACY_REPORT_CACHE_MB
+MAX_MB = float(os.environ.get('PHARMACY_REPORT_CACHE_MB', 100))
+
+
+class ReportCache:
+    # Keeps the files of the reports already generated, so asking again for the same report over the same dates
+    # opens the saved file instead of reading the database and drawing the PDF again.
+    #
+    #     key = cache.key("Financial Report", start_date, end_date, [purchase_file])
+    #     path = cache.get(key) or cache.put(key, build_the_pdf())
+    #
+    # A key holds the fingerprint (modification time and size) of the database files the report is made from,
+    # so once one of them changes the saved report is never returned again, and it is deleted when the new
+    # version is saved. Files are named after their key, and the time a file was last used is its modification
+    # time, so several terminals can share the directory without an index to keep in sync.
+
+    # One cache per directory
+    _caches = {}
+
+    @classmethod
+    def default(cls):
+        # The cache of the application, in CACHE_DIR
+        return cls.for_directory(CACHE_DIR)
+
+
+    @classmethod
+    def for_directory(cls, cache_dir, max_mb=None):
+        # Return the shared cache of the given directory, creating it the first time it is requested
+        key = os.path.normcase(os.path.abspath(cache_dir))
+        cache = cls._caches.get(key)
+        if cache is None:
+            cache = cls(key, MAX_MB if max_mb is None else max_mb)
+            cls._caches[key] = cache
+        return cache
+
+
+    def __init__(self, cache_dir, max_mb=MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+
+    def key(self, report, start_date, end_date, sources):
+        # Name of the cached file of a report over a date range (None for the whole history)
+        # made from the given source files, without its extension
+        dates = '_'.join(str(day) if day else 'all' for day in (start_date, end_date))
+        prefix = re.sub(r'[^a-z0-9]+', '_', report.lower()).strip('_')
+        return f"{prefix}_{dates}_{fingerprint(sources)}"
+
+
+    def get(self, key):
+        # Path of the cached file of the key, None when there is none. Marks the file as just used.
+        for name in self._names_of(key):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue  # Evicted by another terminal since the directory was listed
+            return path
+        return None
+
+
+    def put(self, key, file_path):
+        # Move a newly generated file into the cache under the key and return its new path
+        # Older versions of the same report and date range are removed, then the cache is trimmed to its size
+        os.makedirs(self.cache_dir, exist_ok=True)
+        extension = os.path.splitext(file_path)[1]
+        path = os.path.join(self.cache_dir, key + extension)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.move(file_path, temp_path)
+        os.replace(temp_path, path)  # Readers only ever see complete files
+
+        stale_prefix = key.rsplit('_', 1)[0] + '_'
+        for name in self._listing():
+            if name.startswith(stale_prefix) and not name.startswith(key + '.'):
+                self._remove(name)
+        self.trim(keep=os.path.basename(path))
+        return path
+
+
+    def trim(self, keep=None):
+        # Remove the least recently used files until the cache fits in its size, never removing keep
+        entries = []
+        for name in self._listing():
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name != keep:
+                self._remove(name)
+                total -= size
+
+
+    def clear(self):
+        # Remove every cached report
+        for name in self._listing():
+            self._remove(name)
+
+
+    def size(self):
+        # Bytes taken by the cached reports
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in self._listing())
+
+
+    def _names_of(self, key):
+        # Cached files saved under the key, whatever their extension
+        return [name for name in self._listing() if os.path.splitext(name)[0] == key]
+
+
+    def _listing(self):
+        # Names of the cached files, without the files still being moved in
+        try:
+            return [name for name in os.listdir(self.cache_dir) if not name.endswith('.tmp')]
+        except FileNotFoundError:
+            return []
+
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass  # Already removed by another terminal
+
+
+def fingerprint(sources):
+    # Short hash of the modification time and size of each source file, missing files included as missing
+    stats = []
+    for path in sources:
+        try:
+            stat = os.stat(path)
+            stats.append(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+        except FileNotFoundError:
+            stats.append(f"{os.path.abspath(path)}:missing")
+    return hashlib.sha256('\n'.join(stats).encode()).hexdigest()[:16]
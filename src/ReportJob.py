@@ -0,0 +1,94 @@
+# Import necessary libraries for system operations
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class ReportCancelled(Exception):
+    # Raised inside a report job once the user has cancelled it, it unwinds the job without writing the report
+    pass
+
+
+class NoReportData(Exception):
+    # Raised by a report job when there is nothing to report, its message is shown to the user
+    pass
+
+
+class ReportSignals(QObject):
+    # Signals of a report job. They are emitted on the worker thread and delivered on the GUI thread,
+    # so the slots connected to them can update the screens
+    progress = pyqtSignal(int, str)  # Percent done and what the job is doing
+    finished = pyqtSignal(str)  # Path of the report file
+    no_data = pyqtSignal(str)  # Message explaining why there is no report
+    failed = pyqtSignal(str)  # The error that stopped the job
+    cancelled = pyqtSignal()
+
+
+class ReportJob(QRunnable):
+    # Builds one report on a thread of the pool so the application stays responsive while it runs
+    #
+    #     job = ReportJob("Financial Report", build)   # build(job) writes the report and returns its path
+    #     job.signals.finished.connect(open_report)
+    #     job.start()
+    #
+    # build() reports how far it got with job.progress() or by drawing its rows through job.track(),
+    # both of which raise ReportCancelled once job.cancel() has been called.
+
+    # Rows drawn between two progress updates
+    PROGRESS_EVERY = 500
+
+    def __init__(self, name, build):
+        super(ReportJob, self).__init__()
+        self.setAutoDelete(False)  # The screen keeps the job until it ends, to be able to cancel it
+        self.name = name
+        self.build = build
+        self.signals = ReportSignals()
+        self._cancel_requested = threading.Event()
+
+
+    def start(self, pool=None):
+        # Queue the job on the pool, the application's shared pool unless another one is given
+        (pool or QThreadPool.globalInstance()).start(self)
+
+
+    def cancel(self):
+        # Ask the job to stop, it stops at its next progress update
+        self._cancel_requested.set()
+
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_requested.is_set()
+
+
+    def progress(self, percent, text=''):
+        # Report how far the job got, stopping it here if it was cancelled
+        if self.is_cancelled:
+            raise ReportCancelled()
+        self.signals.progress.emit(int(percent), text)
+
+
+    def track(self, rows, total, start=0, end=100, text=''):
+        # Yield the rows, reporting progress from start to end percent as they are taken
+        # total is the number of rows expected (len() of the data they come from)
+        self.progress(start, text)
+        for number, row in enumerate(rows, 1):
+            yield row
+            if number % self.PROGRESS_EVERY == 0:
+                self.progress(start + (end - start) * min(number / max(total, 1), 1), text)
+        self.progress(end, text)
+
+
+    def run(self):
+        # Called on the worker thread: build the report and emit how the job ended
+        try:
+            self.progress(0, "Starting")
+            path = self.build(self)
+            self.progress(100, "Done")  # A job cancelled at the very end is still cancelled
+        except ReportCancelled:
+            self.signals.cancelled.emit()
+        except NoReportData as e:
+            self.signals.no_data.emit(str(e))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(path)
@@ -1,24 +1,28 @@
 #Reports.py
-from PyQt5.QtWidgets import QMainWindow, QDialog, QVBoxLayout, QLabel, QPushButton, QTextEdit, QDateEdit, QMessageBox, QHBoxLayout
-from PyQt5.uic import loadUi
+from PyQt5.QtWidgets import QMainWindow, QDialog, QVBoxLayout, QLabel, QPushButton, QTextEdit, QDateEdit, QMessageBox, QHBoxLayout, QProgressDialog
+from PyQt5.QtCore import Qt
+from UILoader import load_ui
 import os
 from datetime import datetime
-import pandas as pd
-import csv
-from fpdf import FPDF
-import tempfile
-import webbrowser
+from InventoryStore import InventoryStore
+from SalesRollup import SalesRollup
+from Storage import TABLES, report_csv, table_files
+import TransactionLog
+from ReportJob import ReportJob, NoReportData
+# pandas (and FinancialReport, which uses it), fpdf, tempfile and webbrowser are imported inside the methods
+# that build or open a report, so opening the reports page does not pay for them until a report is generated
 
 
 class Reports(QMainWindow):
-    def __init__(self, widget, username): # Accept the widget and username as arguments
+    def __init__(self, widget, session): # Accept the widget and session of the logged in user as arguments
         super(Reports, self).__init__()
         self.widget = widget
-        self.username = username
+        self.session = session
+        self.username = session.username
+        self.jobs = {}  # Report jobs running in the background, by report name: (job, progress dialog)
 
         # Load the UI
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'Reports.ui')
-        loadUi(ui_path, self)
+        load_ui('Reports.ui', self)
 
         # Set the window title
         self.setMinimumSize(900, 600)
@@ -30,15 +34,27 @@ class Reports(QMainWindow):
         self.financialReportButton.clicked.connect(self.show_financial_report)
         self.inventoryTimeReportButton.clicked.connect(self.show_inventory_report_for_period)
         self.prescriptionReports.clicked.connect(self.show_prescription_report)
+        self.archiveButton.clicked.connect(self.export_to_archive)
 
 
-    def read_log_file(self):
-        # Read the transaction log file
-        log_file = os.path.join(os.path.dirname(__file__), '..', 'logs', 'transaction.log')
-        if not os.path.exists(log_file):
-            return []
-        with open(log_file, 'r') as file:
-            return file.readlines()
+    def read_log_file(self, start_date=None, end_date=None):
+        # Read the events of the transaction log between the two dates, each one a dictionary with time, user, action and message
+        # Only the days in the range are read from the log
+        TransactionLog.flush()  # Include the events of this terminal that are still waiting to be written
+        return TransactionLog.read_records(start_date, end_date)
+
+
+    def sales_rollup_files(self, purchase_file):
+        # The files of the daily sales rollup, once it has been built and its journal folded into it
+        rollup = SalesRollup.for_file(purchase_file=purchase_file)
+        rollup.ensure_built()
+        return table_files('sales_daily', rollup.rollup_file)
+
+
+    def log_files(self, start_date, end_date):
+        # The files of the transaction log holding the events between the two dates, once every event is in them
+        TransactionLog.flush()
+        return TransactionLog.log_files(start_date, end_date)
 
 
     def export_to_csv(self, data, report_name):
@@ -55,12 +71,41 @@ class Reports(QMainWindow):
         QMessageBox.information(self, "Export Successful", f"{report_name} has been exported to {file_path}.")
 
 
+    def export_to_archive(self):
+        # Export the purchase, inventory and prescription tables to the Parquet archive, one file per month
+        from ColumnarArchive import ARCHIVE_DIR, ARCHIVE_TABLES, export_table
+        db_dir = os.path.join(os.path.dirname(__file__), '..', 'DBFiles')
+        InventoryStore.for_file(os.path.join(db_dir, TABLES['inventory']['file'])).checkpoint()
+        try:
+            for name in ARCHIVE_TABLES:
+                export_table(name, os.path.join(db_dir, TABLES[name]['file']))
+        except ImportError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+            return
+        QMessageBox.information(self, "Export Successful", f"The database has been archived to {ARCHIVE_DIR}.")
+
+
     def show_inventory_report(self):
-        # Generate a PDF inventory report and display it
+        # Generate a PDF inventory report in the background and display it
         inventory_file = os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_inventory.csv')
         if not os.path.exists(inventory_file):
             QMessageBox.warning(self, "File Not Found", "The inventory file could not be located.")
             return
+        return self.start_report(
+            "Inventory Report", lambda job: self.build_inventory_report(job, inventory_file),
+            sources=lambda: self.inventory_files(inventory_file)
+        )
+
+
+    def build_inventory_report(self, job, inventory_file):
+        # Write the PDF of the items in stock and return its path, runs on a worker thread
+        import pandas as pd
+        from fpdf import FPDF
+
+        # Fold any journaled inventory changes into the CSV before reading it
+        job.progress(5, "Reading the inventory")
+        InventoryStore.for_file(inventory_file).checkpoint()
+        inventory_file = report_csv('inventory', inventory_file)
 
         # Load and filter inventory data
         inventory_data = pd.read_csv(inventory_file)
@@ -88,104 +133,76 @@ class Reports(QMainWindow):
         pdf.cell(200, 10, txt="Inventory Report", ln=True, align='C')
         pdf.ln(10)
 
-        # Define column headers and relative widths
+        # Add the table, one row per item
         headers = ['Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated']
-        col_relative_widths = [2, 1, 1, 1, 2, 2, 2]  # Adjust these relative weights
-        total_width = sum(col_relative_widths)
-        page_width = 190  # Approximate usable width for A4
-        col_widths = [page_width * (w / total_width) for w in col_relative_widths]
-
-        # Add the table headers
-        pdf.set_font("Arial", style='B', size=10)
-        for i, header in enumerate(headers):
-            pdf.cell(col_widths[i], 10, header, border=1, align='C')
-        pdf.ln()
-
-        # Add table rows
-        pdf.set_font("Arial", size=10)
-        for _, row in filtered_data.iterrows():
-            pdf.cell(col_widths[0], 10, str(row['Item']), border=1)
-            pdf.cell(col_widths[1], 10, str(row['ID']), border=1, align='C')
-            pdf.cell(col_widths[2], 10, str(row['Quantity']), border=1, align='C')
-            pdf.cell(col_widths[3], 10, f"{row['Price']:.2f}", border=1, align='C')
-            pdf.cell(col_widths[4], 10, row['Expiration Date'], border=1, align='C')
-            pdf.cell(col_widths[5], 10, row['Date Added'], border=1, align='C')
-            pdf.cell(col_widths[6], 10, row['Date Updated'], border=1, align='C')
-            pdf.ln()
+        rows = zip(
+            filtered_data['Item'], filtered_data['ID'], filtered_data['Quantity'],
+            filtered_data['Price'].map('{:.2f}'.format), filtered_data['Expiration Date'],
+            filtered_data['Date Added'], filtered_data['Date Updated']
+        )
+        rows = job.track(rows, len(filtered_data), 20, 90, "Drawing the table")
+        self.add_table(pdf, headers, rows, align=['L', 'C', 'C', 'C', 'C', 'C', 'C'])
 
         # Save the PDF to a temporary file
-        temp_pdf_path = os.path.join(tempfile.gettempdir(), "Inventory_Report.pdf")
+        job.progress(95, "Saving the PDF")
+        temp_pdf_path = self.new_report_file("Inventory_Report")
         pdf.output(temp_pdf_path)
-
-        # Open the PDF in the default viewer
-        webbrowser.open(temp_pdf_path)
+        return temp_pdf_path
 
 
     def show_user_transactions(self):
         # Generate a PDF report for user login/logout activity within a specified date range.
-        logs = self.read_log_file()
-        formatted_logs = []
-
         # Get the date range from the user
         start_date, end_date = self.get_date_range_from_user()
         if not (start_date and end_date):
             QMessageBox.warning(self, "Invalid Dates", "Please select a valid date range.")
             return
+        return self.start_report(
+            "User Transactions Report", lambda job: self.build_user_transactions_report(job, start_date, end_date),
+            sources=lambda: self.log_files(start_date, end_date), date_range=(start_date, end_date)
+        )
+
+
+    def build_user_transactions_report(self, job, start_date, end_date):
+        # Write the PDF of the logged events between the two dates and return its path, runs on a worker thread
+        from fpdf import FPDF
 
-        if logs:
-            for log in logs:
-                try:
-                    # Extract the date and the rest of the log message
-                    date_part, log_message = log.split(" - ", 1)
-                    # Convert the log's date to a datetime object
-                    log_datetime = datetime.strptime(date_part.split(",")[0], "%Y-%m-%d %H:%M:%S")
-
-                    # Filter logs by the user-selected date range
-                    if start_date <= log_datetime.date() <= end_date:
-                        # Format the date as MM-DD-YYYY and include it in the log
-                        formatted_date = log_datetime.strftime("%m-%d-%Y %I:%M:%S %p")
-                        formatted_logs.append({"Date": formatted_date, "Log Message": log_message.strip()})
-                except ValueError:
-                    # Handle logs that do not match the expected format
-                    formatted_logs.append({"Date": "Invalid Timestamp", "Log Message": log.strip()})
-
-            if formatted_logs:
-                # Generate the PDF
-                pdf = FPDF()
-                pdf.set_auto_page_break(auto=True, margin=15)
-                pdf.add_page()
-                pdf.set_font("Arial", size=10)
-
-                # Add title
-                pdf.set_font("Arial", style='B', size=14)
-                pdf.cell(200, 10, txt="User Transactions Report", ln=True, align='C')
-                pdf.ln(10)
-
-                # Add table headers
-                headers = ['Date', 'Log Message']
-                col_widths = [60, 120]  # Adjust these widths as needed
-                pdf.set_font("Arial", style='B', size=10)
-                for i, header in enumerate(headers):
-                    pdf.cell(col_widths[i], 10, header, border=1, align='C')
-                pdf.ln()
-
-                # Add table rows
-                pdf.set_font("Arial", size=10)
-                for log in formatted_logs:
-                    pdf.cell(col_widths[0], 10, str(log['Date']), border=1, align='C')
-                    pdf.cell(col_widths[1], 10, str(log['Log Message']), border=1, align='L')
-                    pdf.ln()
-
-                # Save the PDF to a temporary file
-                temp_pdf_path = os.path.join(tempfile.gettempdir(), "User_Transactions_Report.pdf")
-                pdf.output(temp_pdf_path)
-
-                # Open the PDF in the default viewer
-                webbrowser.open(temp_pdf_path)
+        job.progress(5, "Reading the transaction log")
+        logs = self.read_log_file(start_date, end_date)
+        if not logs:
+            raise NoReportData("No logs found within the specified date range.")
+
+        formatted_logs = []
+        for log in logs:
+            if not log['time']:
+                # Handle logs that do not match the expected format
+                formatted_logs.append({"Date": "Invalid Timestamp", "Log Message": log['message']})
             else:
-                QMessageBox.information(self, "No Data", "No logs found within the specified date range.")
-        else:
-            QMessageBox.warning(self, "No Data", "No log file found or it is empty.")
+                # Format the date as MM-DD-YYYY and include it in the log
+                formatted_date = datetime.fromisoformat(log['time']).strftime("%m-%d-%Y %I:%M:%S %p")
+                formatted_logs.append({"Date": formatted_date, "Log Message": log['message']})
+
+        # Generate the PDF
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
+
+        # Add title
+        pdf.set_font("Arial", style='B', size=14)
+        pdf.cell(200, 10, txt="User Transactions Report", ln=True, align='C')
+        pdf.ln(10)
+
+        # Add the table, long messages are wrapped inside their cell
+        rows = ((log['Date'], log['Log Message']) for log in formatted_logs)
+        rows = job.track(rows, len(formatted_logs), 20, 90, "Drawing the table")
+        self.add_table(pdf, ['Date', 'Log Message'], rows, align=['C', 'L'])
+
+        # Save the PDF to a temporary file
+        job.progress(95, "Saving the PDF")
+        temp_pdf_path = self.new_report_file("User_Transactions_Report")
+        pdf.output(temp_pdf_path)
+        return temp_pdf_path
 
 
     def show_financial_report(self):
@@ -201,65 +218,69 @@ class Reports(QMainWindow):
         if not (start_date and end_date):
             QMessageBox.warning(self, "Invalid Dates", "Please select a valid date range.")
             return
+        return self.start_report(
+            "Financial Report", lambda job: self.build_financial_report(job, purchase_file, start_date, end_date),
+            sources=lambda: self.sales_rollup_files(purchase_file), date_range=(start_date, end_date)
+        )
+
+
+    def build_financial_report(self, job, purchase_file, start_date, end_date):
+        # Write the PDF of the purchases between the two dates and return its path, runs on a worker thread
+        import ColumnarArchive
+        from FinancialReport import FinancialReport
+        from fpdf import FPDF
+
+        # Totals and daily sales of the date range, read from the Parquet archive when it has every purchase of the
+        # range (it opens only the months of the range), otherwise from the daily sales rollup
+        job.progress(5, "Reading the daily sales")
+        if ColumnarArchive.covers('purchases', end_date, purchase_file):
+            report = FinancialReport.from_archive(start_date, end_date)
+        else:
+            rollup = SalesRollup.for_file(purchase_file=purchase_file)
+            rollup.ensure_built()
+            report = FinancialReport.from_rollup(report_csv('sales_daily', rollup.rollup_file), start_date, end_date)
 
-        try:
-            # Read purchase data
-            purchase_data = pd.read_csv(purchase_file)
-            purchase_data['Date'] = pd.to_datetime(purchase_data['Date'], errors='coerce')
-
-            # Filter by date range
-            filtered_data = purchase_data[
-                (purchase_data['Date'] >= pd.Timestamp(start_date)) & 
-                (purchase_data['Date'] <= pd.Timestamp(end_date))
-            ]
-
-            if filtered_data.empty:
-                QMessageBox.information(self, "No Data", "No financial transactions found for the selected period.")
-                return
-
-            # Generate the PDF
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
-            pdf.set_font("Arial", size=10)
-
-            # Add title
-            pdf.set_font("Arial", style='B', size=14)
-            pdf.cell(200, 10, txt="Financial Report", ln=True, align='C')
-            pdf.ln(10)
-
-            # Add summary
-            total_revenue = filtered_data['Total Cost'].sum()
-            pdf.set_font("Arial", size=12)
-            pdf.cell(200, 10, txt=f"Total Revenue: ${total_revenue:.2f}", ln=True, align='L')
+        if report.empty:
+            raise NoReportData("No financial transactions found for the selected period.")
+
+        # Generate the PDF
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
+
+        # Add title
+        pdf.set_font("Arial", style='B', size=14)
+        pdf.cell(200, 10, txt="Financial Report", ln=True, align='C')
+        pdf.ln(10)
+
+        # Add summary
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 10, txt=f"Total Revenue: ${report.total_revenue:.2f}", ln=True, align='L')
+        pdf.ln(5)
+
+        # Add the revenue of each item and of each payment method, highest first
+        job.progress(10, "Adding the revenue breakdowns")
+        for title, header, revenue in (("Revenue by Item", "Item Name", report.revenue_by_item),
+                                       ("Revenue by Payment Method", "Payment Method", report.revenue_by_payment)):
+            pdf.set_font("Arial", style='B', size=12)
+            pdf.cell(200, 10, txt=title, ln=True, align='L')
+            self.add_table(pdf, [header, 'Revenue'], report.revenue_rows(revenue), align=['L', 'R'])
             pdf.ln(5)
 
-            # Add table headers
-            headers = ['Date', 'Item Name', 'Total Cost', 'Payment Method']
-            col_widths = [40, 50, 40, 60]
-            pdf.set_font("Arial", style='B', size=10)
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 10, header, border=1, align='C')
-            pdf.ln()
-
-            # Add table rows
-            pdf.set_font("Arial", size=10)
-            for _, row in filtered_data.iterrows():
-                pdf.cell(col_widths[0], 10, str(row['Date']), border=1, align='C')
-                pdf.cell(col_widths[1], 10, str(row['Item Name']), border=1, align='C')
-                pdf.cell(col_widths[2], 10, f"${row['Total Cost']:.2f}", border=1, align='C')
-                pdf.cell(col_widths[3], 10, str(row['Payment Method']), border=1, align='C')
-                pdf.ln()
-
-            # Save the PDF to a temporary file
-            temp_pdf_path = os.path.join(tempfile.gettempdir(), "Financial_Report.pdf")
-            pdf.output(temp_pdf_path)
-
-            # Open the PDF in the default viewer
-            webbrowser.open(temp_pdf_path)
+        # Add the daily sales table, its rows are already formatted by the report
+        pdf.set_font("Arial", style='B', size=12)
+        pdf.cell(200, 10, txt="Daily Sales", ln=True, align='L')
+        job.progress(20, "Formatting the daily sales")
+        table = report.table()
+        rows = job.track(zip(*table.values()), len(report.sales), 30, 90, "Drawing the table")
+        self.add_table(pdf, list(table), rows, align=['C', 'L', 'C', 'R', 'R', 'R'])
 
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred while generating the financial report:\n{e}")
+        # Save the PDF to a temporary file
+        job.progress(95, "Saving the PDF")
+        temp_pdf_path = self.new_report_file("Financial_Report")
+        pdf.output(temp_pdf_path)
+        return temp_pdf_path
 
 
     def show_inventory_report_for_period(self):
@@ -269,229 +290,257 @@ class Reports(QMainWindow):
             QMessageBox.warning(self, "Invalid Dates", "Please select a valid date range.")
             return
 
-        # Load the inventory data
         inventory_file = os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_inventory.csv')
         if not os.path.exists(inventory_file):
             QMessageBox.warning(self, "File Not Found", "The inventory file could not be located.")
             return
+        return self.start_report(
+            "Inventory Report for Period",
+            lambda job: self.build_inventory_report_for_period(job, inventory_file, start_date, end_date),
+            sources=lambda: self.inventory_files(inventory_file), date_range=(start_date, end_date)
+        )
 
-        try:
-            # Load and filter inventory data
-            inventory_data = pd.read_csv(inventory_file)
-            inventory_data['Date Updated'] = pd.to_datetime(inventory_data['Date Updated'], errors='coerce')
-            inventory_data['Date Removed'] = pd.to_datetime(inventory_data['Date Removed'], errors='coerce')
-
-            filtered_data = inventory_data[
-                (inventory_data['Date Updated'] >= pd.Timestamp(start_date)) & 
-                (inventory_data['Date Updated'] <= pd.Timestamp(end_date))
-            ]
-
-            if filtered_data.empty:
-                QMessageBox.information(self, "No Data", "No inventory updates found for the selected period.")
-                return
-
-            # Remove the time portion from 'Date Updated' and 'Date Removed'
-            filtered_data['Date Updated'] = filtered_data['Date Updated'].dt.strftime('%m-%d-%Y')
-            filtered_data['Date Removed'] = filtered_data['Date Removed'].dt.strftime('%m-%d-%Y').fillna('')
-
-            # Generate the PDF
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
-            pdf.set_font("Arial", size=10)
-
-            # Add title
-            pdf.set_font("Arial", style='B', size=14)
-            pdf.cell(200, 10, txt="Inventory Report for Period", ln=True, align='C')
-            pdf.ln(10)
-
-            # Add table headers
-            headers = ['Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed']
-            col_relative_widths = [2, 1, 1, 1, 2, 2, 2, 2]  
-            total_width = sum(col_relative_widths)
-            page_width = 190  
-            col_widths = [page_width * (w / total_width) for w in col_relative_widths]
-
-            pdf.set_font("Arial", style='B', size=10)
-            for i, header in enumerate(headers):
-                pdf.cell(col_widths[i], 10, header, border=1, align='C')
-            pdf.ln()
-
-            # Add table rows
-            pdf.set_font("Arial", size=10)
-            for _, row in filtered_data.iterrows():
-                pdf.cell(col_widths[0], 10, str(row['Item']), border=1)
-                pdf.cell(col_widths[1], 10, str(row['ID']), border=1, align='C')
-                pdf.cell(col_widths[2], 10, str(row['Quantity']), border=1, align='C')
-                pdf.cell(col_widths[3], 10, f"${row['Price']:.2f}", border=1, align='C')
-                pdf.cell(col_widths[4], 10, str(row['Expiration Date']), border=1, align='C')
-                pdf.cell(col_widths[5], 10, str(row['Date Added']), border=1, align='C')
-                pdf.cell(col_widths[6], 10, str(row['Date Updated']), border=1, align='C')
-                pdf.cell(col_widths[7], 10, str(row['Date Removed']), border=1, align='C')
-                pdf.ln()
-
-            # Save the PDF to a temporary file
-            temp_pdf_path = os.path.join(tempfile.gettempdir(), "Inventory_Report_Period.pdf")
-            pdf.output(temp_pdf_path)
-
-            # Open the PDF in the default viewer
-            webbrowser.open(temp_pdf_path)
 
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred while generating the inventory report:\n{e}")
+    def build_inventory_report_for_period(self, job, inventory_file, start_date, end_date):
+        # Write the PDF of the items updated between the two dates and return its path, runs on a worker thread
+        import pandas as pd
+        from fpdf import FPDF
+
+        # Fold any journaled inventory changes into the CSV before reading it
+        job.progress(5, "Reading the inventory")
+        InventoryStore.for_file(inventory_file).checkpoint()
+        inventory_file = report_csv('inventory', inventory_file)
+
+        # Load and filter inventory data
+        inventory_data = pd.read_csv(inventory_file)
+        inventory_data['Date Updated'] = pd.to_datetime(inventory_data['Date Updated'], errors='coerce')
+        inventory_data['Date Removed'] = pd.to_datetime(inventory_data['Date Removed'], errors='coerce')
+
+        filtered_data = inventory_data[
+            (inventory_data['Date Updated'] >= pd.Timestamp(start_date)) & 
+            (inventory_data['Date Updated'] <= pd.Timestamp(end_date))
+        ]
+
+        if filtered_data.empty:
+            raise NoReportData("No inventory updates found for the selected period.")
+
+        # Remove the time portion from 'Date Updated' and 'Date Removed'
+        filtered_data['Date Updated'] = filtered_data['Date Updated'].dt.strftime('%m-%d-%Y')
+        filtered_data['Date Removed'] = filtered_data['Date Removed'].dt.strftime('%m-%d-%Y').fillna('')
+
+        # Generate the PDF
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
+
+        # Add title
+        pdf.set_font("Arial", style='B', size=14)
+        pdf.cell(200, 10, txt="Inventory Report for Period", ln=True, align='C')
+        pdf.ln(10)
 
+        # Add the table, one row per item
+        headers = ['Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed']
+        rows = zip(
+            filtered_data['Item'], filtered_data['ID'], filtered_data['Quantity'],
+            filtered_data['Price'].map('${:.2f}'.format), filtered_data['Expiration Date'],
+            filtered_data['Date Added'], filtered_data['Date Updated'], filtered_data['Date Removed']
+        )
+        rows = job.track(rows, len(filtered_data), 20, 90, "Drawing the table")
+        self.add_table(pdf, headers, rows, align=['L', 'C', 'C', 'C', 'C', 'C', 'C', 'C'])
 
+        # Save the PDF to a temporary file
+        job.progress(95, "Saving the PDF")
+        temp_pdf_path = self.new_report_file("Inventory_Report_Period")
+        pdf.output(temp_pdf_path)
+        return temp_pdf_path
+
+
+    @staticmethod
     def generate_financial_report(file_path):
-        # Generate a financial report from the purchase data CSV file
+        # Print a financial report of the purchase data CSV file
+        from FinancialReport import FinancialReport
         try:
-            # Data structures to hold the aggregated data
-            total_revenue = 0.0
-            revenue_by_item = {}
-            revenue_by_payment = {}
-            transactions = []
-
-            # Read the CSV file
-            with open(file_path, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Extract relevant data
-                    item_name = row['Item Name']
-                    payment_method = row['Payment Method']
-                    total_cost = float(row['Total Cost'])
-                    grand_total = float(row['Grand Total'])
-
-                    # Update totals
-                    total_revenue += total_cost
-
-                    # Aggregate revenue by item
-                    if item_name in revenue_by_item:
-                        revenue_by_item[item_name] += total_cost
-                    else:
-                        revenue_by_item[item_name] = total_cost
-
-                    # Aggregate revenue by payment method
-                    if payment_method in revenue_by_payment:
-                        revenue_by_payment[payment_method] += grand_total
-                    else:
-                        revenue_by_payment[payment_method] = grand_total
-
-                    transactions.append(row)
-
-            # Generate and print the report
-            print("\n--- Financial Report ---")
-            print(f"Total Revenue: ${total_revenue:.2f}\n")
-
-            # Revenue by item
-            print("--- Revenue by Item ---")
-            print("{:<20} {:<10}".format("Item Name", "Revenue"))
-            for item, revenue in revenue_by_item.items():
-                print(f"{item:<20} ${revenue:.2f}")
-
-            # Revenue by payment method
-            print("\n--- Revenue by Payment Method ---")
-            print("{:<20} {:<10}".format("Payment Method", "Revenue"))
-            for method, revenue in revenue_by_payment.items():
-                print(f"{method:<20} ${revenue:.2f}")
-
-            # Transaction details
-            print("\n--- Transaction Details ---")
-            print("{:<20} {:<15} {:<15} {:<10} {:<20}".format(
-                "Date", "First Name", "Last Name", "Total", "Payment Method"
-            ))
-            for transaction in transactions:
-                print("{:<20} {:<15} {:<15} ${:<10} {:<20}".format(
-                    transaction['Date'],
-                    transaction['First Name'],
-                    transaction['Last Name'],
-                    transaction['Grand Total'],
-                    transaction['Payment Method']
-                ))
-
+            print()
+            print(FinancialReport.from_csv(file_path).summary_text())
         except Exception as e:
             print(f"Error generating financial report: {e}")
-            
-            
+
+
     def show_prescription_report(self):
+        # Generate a PDF report of every prescription in the background and display it
         prescription_file = os.path.join(os.path.dirname(__file__), '..', 'DBFiles', 'db_prescriptions.csv')
 
         if not os.path.exists(prescription_file):
             QMessageBox.warning(self, "File Not Found", "The prescription data file could not be located.")
             return
+        return self.start_report(
+            "Prescription Report", lambda job: self.build_prescription_report(job, prescription_file),
+            sources=lambda: table_files('prescriptions', prescription_file)
+        )
+
+
+    def build_prescription_report(self, job, prescription_file):
+        # Write the PDF of the prescriptions and return its path, runs on a worker thread
+        import pandas as pd
+        from fpdf import FPDF
+
+        # Load the prescription data
+        job.progress(5, "Reading the prescriptions")
+        prescription_data = pd.read_csv(report_csv('prescriptions', prescription_file))
+
+        # Ensure necessary columns exist
+        if 'Pharmacist' not in prescription_data.columns:
+            prescription_data['Pharmacist'] = ''  # Add column if missing
+
+        # Clean and preprocess the data
+        for col in prescription_data.columns:
+            if prescription_data[col].dtype == 'float64':
+                # Convert float columns to integers where applicable
+                prescription_data[col] = prescription_data[col].fillna(0).astype(int)
+            elif prescription_data[col].dtype == 'object':
+                # Fill missing string values with empty strings
+                prescription_data[col] = prescription_data[col].fillna('')
+        
+        # Specifically handle the 'Patient_DOB' column
+        prescription_data['Patient_DOB'] = prescription_data['Patient_DOB'].apply(
+            lambda x: pd.to_datetime(str(x), errors='coerce').strftime('%m-%d-%Y') if pd.notna(x) else ''
+        )
 
-        try:
-            # Load the prescription data
-            prescription_data = pd.read_csv(prescription_file)
-
-            # Ensure necessary columns exist
-            if 'Pharmacist' not in prescription_data.columns:
-                prescription_data['Pharmacist'] = ''  # Add column if missing
-
-            # Clean and preprocess the data
-            for col in prescription_data.columns:
-                if prescription_data[col].dtype == 'float64':
-                    # Convert float columns to integers where applicable
-                    prescription_data[col] = prescription_data[col].fillna(0).astype(int)
-                elif prescription_data[col].dtype == 'object':
-                    # Fill missing string values with empty strings
-                    prescription_data[col] = prescription_data[col].fillna('')
-            
-            # Specifically handle the 'Patient_DOB' column
-            prescription_data['Patient_DOB'] = prescription_data['Patient_DOB'].apply(
-                lambda x: pd.to_datetime(str(x), errors='coerce').strftime('%m-%d-%Y') if pd.notna(x) else ''
-            )
-
-            # Generate the PDF
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=False, margin=15)
-            pdf.add_page()
-            pdf.set_font("Arial", size=10)
-
-            # Add title
-            pdf.set_font("Arial", style='B', size=14)
-            pdf.cell(200, 10, txt="Prescription Report", ln=True, align='C')
-            pdf.ln(10)
-
-            # Define column headers and their widths
-            headers = ['Patient Name', 'DOB', 'Prescription Number', 'Medication', 'Quantity', 'Status', 'Pharmacist']
-            col_widths = [40, 20, 40, 30, 20, 20, 25]
-
-            # Add table headers
-            self.add_table_headers(pdf, headers, col_widths)
-
-            # Add rows
-            pdf.set_font("Arial", size=10)
-            for _, row in prescription_data.iterrows():
-                if pdf.get_y() > 260:  # Adjust this value if the content overflows
-                    pdf.add_page()
-                    self.add_table_headers(pdf, headers, col_widths)
-
-                patient_name = f"{row.get('Patient_First_Name', '')} {row.get('Patient_Last_Name', '')}"
-                dob = row['Patient_DOB'] if not pd.isna(row['Patient_DOB']) else ''
-                pdf.cell(col_widths[0], 10, patient_name, border=1)
-                pdf.cell(col_widths[1], 10, dob, border=1, align='C')
-                pdf.cell(col_widths[2], 10, str(row['Prescription_Number']), border=1, align='C')
-                pdf.cell(col_widths[3], 10, row['Medication'], border=1, align='C')
-                pdf.cell(col_widths[4], 10, str(row['Quantity']), border=1, align='C')
-                pdf.cell(col_widths[5], 10, row['Status'], border=1, align='C')
-                pdf.cell(col_widths[6], 10, row['Pharmacist'], border=1, align='C')
-                pdf.ln()
-
-            # Save and open the PDF
-            temp_pdf_path = os.path.join(tempfile.gettempdir(), "Prescription_Report.pdf")
-            pdf.output(temp_pdf_path)
-            webbrowser.open(temp_pdf_path)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred while generating the prescription report: {e}")
+        # Generate the PDF
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
 
+        # Add title
+        pdf.set_font("Arial", style='B', size=14)
+        pdf.cell(200, 10, txt="Prescription Report", ln=True, align='C')
+        pdf.ln(10)
 
+        # Add the table, one row per prescription
+        headers = ['Patient Name', 'DOB', 'Prescription Number', 'Medication', 'Quantity', 'Status', 'Pharmacist']
+        no_names = pd.Series('', index=prescription_data.index)
+        patient_names = (
+            prescription_data.get('Patient_First_Name', no_names).astype(str) + ' ' +
+            prescription_data.get('Patient_Last_Name', no_names).astype(str)
+        )
+        rows = zip(
+            patient_names, prescription_data['Patient_DOB'], prescription_data['Prescription_Number'],
+            prescription_data['Medication'], prescription_data['Quantity'], prescription_data['Status'],
+            prescription_data['Pharmacist']
+        )
+        rows = job.track(rows, len(prescription_data), 20, 90, "Drawing the table")
+        self.add_table(pdf, headers, rows, align=['L', 'C', 'C', 'C', 'C', 'C', 'C'])
 
-    def add_table_headers(self, pdf, headers, col_widths):
-        """Adds table headers to the PDF."""
-        pdf.set_font("Arial", style='B', size=10)
-        for header, width in zip(headers, col_widths):
-            pdf.cell(width, 10, header, border=1, align='C')
-        pdf.ln()
+        # Save the PDF to a temporary file
+        job.progress(95, "Saving the PDF")
+        temp_pdf_path = self.new_report_file("Prescription_Report")
+        pdf.output(temp_pdf_path)
+        return temp_pdf_path
+
+
+    def new_report_file(self, name):
+        # A new temporary file to save a report in, so two terminals making the same report don't write over each other
+        import tempfile
+        handle, path = tempfile.mkstemp(prefix=name + '_', suffix='.pdf')
+        os.close(handle)
+        return path
+
+
+    def inventory_files(self, inventory_file):
+        # The files of the inventory table, once the journaled changes are in them
+        InventoryStore.for_file(inventory_file).checkpoint()
+        return table_files('inventory', inventory_file)
+
+
+    def start_report(self, name, build, sources=None, date_range=(None, None)):
+        # Run build(job) on a worker thread, showing its progress in a dialog that can cancel it,
+        # and open the report it wrote once it is done. The rest of the application stays usable meanwhile.
+        # sources() returns the database files the report is made from: the report is then saved in the
+        # ReportCache and opened from there until one of those files changes.
+        if name in self.jobs:
+            # The report is already being generated, show its progress again instead of starting it twice
+            job, dialog = self.jobs[name]
+            dialog.show()
+            dialog.raise_()
+            return job
+
+        if sources is not None:
+            build = self.cached(name, build, sources, date_range)
+        job = ReportJob(name, build)
+        dialog = QProgressDialog(f"Generating the {name.lower()}...", "Cancel", 0, 100, self)
+        dialog.setWindowTitle(name)
+        dialog.setWindowModality(Qt.NonModal)
+        dialog.setMinimumDuration(500)  # Reports that take less than half a second never show the dialog
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(job.cancel)
+        self.jobs[name] = (job, dialog)
+
+        job.signals.progress.connect(lambda percent, text: self.report_progress(name, percent, text))
+        job.signals.finished.connect(lambda path: self.report_finished(name, path))
+        job.signals.no_data.connect(lambda message: self.report_without_data(name, message))
+        job.signals.failed.connect(lambda error: self.report_failed(name, error))
+        job.signals.cancelled.connect(lambda: self.report_ended(name))
+        job.start()
+        return job
+
+
+    def cached(self, name, build, sources, date_range):
+        # Wrap a report job so it returns the saved report when its sources haven't changed, and saves the one it builds
+        def build_or_reuse(job):
+            from ReportCache import ReportCache
+            cache = ReportCache.default()
+            job.progress(2, "Checking for a saved report")
+            key = cache.key(name, *date_range, sources())
+            path = cache.get(key)
+            if path is None:
+                path = cache.put(key, build(job))
+            return path
+        return build_or_reuse
+
+
+    def report_progress(self, name, percent, text):
+        # Show how far a report job got
+        if name in self.jobs:
+            job, dialog = self.jobs[name]
+            if not job.is_cancelled:
+                dialog.setLabelText(f"{text}..." if text else f"Generating the {name.lower()}...")
+                dialog.setValue(percent)
+
+
+    def report_finished(self, name, path):
+        # Called when a report job has written its file: open it in the default viewer
+        import webbrowser
+        self.report_ended(name)
+        webbrowser.open(path)
+
+
+    def report_without_data(self, name, message):
+        # Called when a report job found nothing to report
+        self.report_ended(name)
+        QMessageBox.information(self, "No Data", message)
+
+
+    def report_failed(self, name, error):
+        # Called when a report job stopped on an error
+        self.report_ended(name)
+        QMessageBox.critical(self, "Error", f"An error occurred while generating the {name.lower()}:\n{error}")
+
+
+    def report_ended(self, name):
+        # Forget a report job that is over and close its progress dialog
+        job, dialog = self.jobs.pop(name, (None, None))
+        if dialog is not None:
+            dialog.close()
+            dialog.deleteLater()
+
+
+    def add_table(self, pdf, headers, rows, align=None):
+        """Adds a table of rows to the PDF, fitting the columns to the page and repeating the headers on every page."""
+        from PDFTable import PDFTable
+        return PDFTable(pdf, headers, align=align).render(rows)
 
 
 
@@ -556,8 +605,5 @@ class Reports(QMainWindow):
 
     def cancelPurchase(self):
         # Return to the dashboard.
-        from src.Dashboard import Dashboard # Import Dashboard inside the function to avoid circular import
-        
-        dashboard = Dashboard(self.widget, self.username)
-        self.widget.addWidget(dashboard)
-        self.widget.setCurrentIndex(self.widget.indexOf(dashboard))
\ No newline at end of file
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('dashboard')
@@ -0,0 +1,344 @@
+# Import necessary libraries for system operations
+import json
+import os
+import sys
+from AtomicFile import WriteBatch, current_batch
+from Storage import DB_DIR, TABLES, open_table
+
+
+class SalesRollup:
+    # Daily sales totals kept next to the purchase data: one row per day, item and payment method with the
+    # units sold, the revenue and the number of purchases that included the item. Every sale adds its lines
+    # to the rows of its day, so the financial report reads a few rows per day instead of every purchase line.
+    #
+    # A purchase is the lines one sale appended: they are written together, so they follow each other with the
+    # same date, customer name, grand total and payment method. When the same customer buys the same total
+    # again, the two purchases are told apart by their line totals, a purchase ends once they add up to its
+    # grand total. FinancialReport.daily_sales() counts the purchases of the purchase lines the same way.
+    #
+    # The rollup is kept in memory like the inventory (see InventoryStore): it is read once and read again only
+    # when its signature changes. With CSV files each sale appends the rows it changed to a journal next to
+    # the rollup, which is folded into the CSV file every COMPACT_EVERY records and before the reports read it.
+    # The rollup is written in the same WriteBatch as the purchase lines, and its lock is taken after the
+    # purchase data's (purchases before sales_daily before inventory), so the two never disagree.
+    # `python src/SalesRollup.py rebuild` computes it again from the whole purchase history.
+
+    # Column order of the rollup
+    FIELDNAMES = TABLES['sales_daily']['fields']
+
+    # Columns that identify one rollup row
+    KEY = ['Date', 'Item Name', 'Payment Method']
+
+    # Number of journal records after which the journal is folded back into the CSV file, or the number of
+    # rows of the rollup if it has more, so rewriting the file costs the same per sale however large it grows
+    COMPACT_EVERY = 200
+
+    # One rollup per rollup file, shared by every caller in the process
+    _rollups = {}
+
+    @classmethod
+    def for_file(cls, rollup_file=None, purchase_file=None):
+        # Return the shared rollup for the given files, creating it the first time it is requested
+        rollup_file, purchase_file = _files(rollup_file, purchase_file)
+        key = os.path.normcase(os.path.abspath(rollup_file))
+        rollup = cls._rollups.get(key)
+        if rollup is None:
+            rollup = cls(rollup_file, purchase_file)
+            cls._rollups[key] = rollup
+        return rollup
+
+
+    def __init__(self, rollup_file=None, purchase_file=None):
+        self.rollup_file, self.purchase_file = _files(rollup_file, purchase_file)
+        self.table = open_table('sales_daily', self.rollup_file)
+
+        # With CSV files every sale appends its changed rows to a sidecar journal instead of rewriting the file
+        # The SQLite backend updates single rows, so it never uses the journal
+        self.journal = self.table.backend == 'csv'
+        self.journal_file = self.rollup_file + '.journal'
+
+        # Reader/writer lock on the rollup table, it covers the journal too
+        self.lock = self.table.lock
+
+        # In-memory copy of the rollup: (date, item name, payment method) -> row
+        self.rows = {}
+        # Signature of the table the rows were loaded from, None until the first load
+        self._signature = None
+        # How far into the journal has been replayed and how many records it holds
+        self._journal_offset = 0
+        self._journal_records = 0
+        # Key -> row changed inside an open WriteBatch and not written yet
+        self._pending = {}
+
+
+    def record_sale(self, date, payment_method, lines):
+        # Add one purchase to the rollup. lines are the (item name, quantity, total cost) of its items
+        # Called once the purchase lines have been appended to the purchase data (in the same WriteBatch)
+        # A purchase with the same item on several lines counts as one purchase of that item
+        sold = {}
+        for item_name, quantity, total_cost in lines:
+            units, revenue = sold.get(item_name, (0.0, 0.0))
+            sold[item_name] = (units + _number(quantity), revenue + _number(total_cost))
+        if not sold:
+            return
+
+        with WriteBatch(), self.lock.exclusive():
+            if self._missing():
+                # First sale since the rollup was added: start it from the purchase data, which has this sale already
+                self.rebuild()
+                return
+            self.refresh()
+            changed_rows = []
+            for item_name, (units, revenue) in sold.items():
+                key = (date, item_name, payment_method)
+                row = self.rows.get(key)
+                if row is not None:
+                    units += _number(row['Units'])
+                    revenue += _number(row['Revenue'])
+                transactions = int(row['Transactions'] or 0) + 1 if row is not None else 1
+                row = dict(zip(self.KEY, key), **_totals(units, revenue, transactions))
+                self.rows[key] = row
+                changed_rows.append(row)
+            self._commit(changed_rows)
+
+
+    def ensure_built(self):
+        # Make the rollup table complete on its own for readers of the rollup: build it from the purchase data
+        # if no sale has started it yet, otherwise fold the journal into it
+        if self._missing():
+            self.rebuild()
+        else:
+            self.checkpoint()
+
+
+    def _missing(self):
+        # True until the rollup has been started, e.g. on the first sale after upgrading to a version with it
+        if self.table.backend == 'csv':
+            return not os.path.exists(self.rollup_file)
+        return self.table.find_one() is None
+
+
+    def _journal_size(self):
+        # Returns the size of the journal, 0 if there is none
+        if not self.journal:
+            return 0
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+
+    def refresh(self):
+        # Bring the in-memory rollup up to date with the files on disk
+        if self._pending:
+            return  # Changes staged in an open WriteBatch are newer than anything on disk
+
+        with self.lock.shared():
+            signature = self.table.signature()
+            journal_size = self._journal_size()
+
+            if signature != self._signature or journal_size < self._journal_offset:
+                # The table was rewritten (or the journal compacted) so start over from it
+                self._load()
+                self._signature = signature
+            elif journal_size > self._journal_offset:
+                # Only new journal records were added, replay just those
+                self._replay_journal()
+
+
+    def _load(self):
+        # Read the whole rollup table and replay the journal on top
+        self.rows = {}
+        for row in self.table.read_all():
+            self._apply(row)
+
+        self._journal_offset = 0
+        self._journal_records = 0
+        if self.journal:
+            self._replay_journal()
+
+
+    def _replay_journal(self):
+        # Apply the journal records written since the last replay
+        try:
+            with open(self.journal_file, mode='rb') as file:
+                file.seek(self._journal_offset)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break  # A record cut short by a crash, ignore it and anything after it
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(record)
+                    self._journal_offset += len(line)
+                    self._journal_records += 1
+        except FileNotFoundError:
+            pass
+
+
+    def _apply(self, record):
+        # Replace the row with the same key by the given row, or add it if it is new
+        row = {field: record.get(field) or '' for field in self.FIELDNAMES}
+        self.rows[tuple(row[column] for column in self.KEY)] = row
+
+
+    def _commit(self, changed_rows):
+        # Persist rows changed in memory, called inside the sale's WriteBatch
+        batch = current_batch()
+        if self.table.backend != 'csv':
+            # Only the changed rows are written, in the same transaction as the purchase lines
+            self.table.upsert(self.KEY, changed_rows)
+            batch.defer(self, self._remember_signature, self._discard_pending)
+            return
+
+        # The journal is written once, when the batch ends
+        for row in changed_rows:
+            self._pending[tuple(row[column] for column in self.KEY)] = row
+        batch.defer(self, self._flush_pending, self._discard_pending)
+
+
+    def _remember_signature(self):
+        # Remember the signature of our own write so it does not trigger a reload
+        self._signature = self.table.signature()
+
+
+    def _flush_pending(self):
+        # Append the rows collected during a WriteBatch to the journal
+        rows = list(self._pending.values())
+        self._pending = {}
+        if not rows:
+            return
+        with self.lock.exclusive():
+            # Drop a record left half written by a crash so the new records start on a clean line
+            if self._journal_size() > self._journal_offset:
+                os.truncate(self.journal_file, self._journal_offset)
+
+            # Append one small record per changed row and force it to disk
+            data = ''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8')
+            with open(self.journal_file, mode='ab') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            self._journal_offset += len(data)
+            self._journal_records += len(rows)
+
+            # Fold the journal back into the CSV file once it has grown large enough
+            if self._journal_records >= max(self.COMPACT_EVERY, len(self.rows)):
+                self.compact()
+
+
+    def _discard_pending(self):
+        # The WriteBatch was abandoned, forget the in-memory changes and reload on next use
+        self._pending = {}
+        self._signature = None
+
+
+    def checkpoint(self):
+        # Make the CSV file complete on its own so it can be read without the journal
+        with self.lock.exclusive():
+            self.refresh()
+            if self._journal_records:
+                self.compact()
+
+
+    def compact(self):
+        # Rewrite the CSV with every journaled change applied, then empty the journal
+        # If the process dies before the journal is cleared, replaying it again is harmless
+        self.table.write_all(list(self.rows.values()))
+        self._signature = self.table.signature()
+        self._clear_journal()
+
+
+    def _clear_journal(self):
+        # Empty the journal and force it to disk
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, mode='wb') as file:
+                os.fsync(file.fileno())
+        self._journal_offset = 0
+        self._journal_records = 0
+
+
+    def rebuild(self):
+        # Compute the whole rollup again from the purchase data, returns the number of rollup rows
+        # The purchase data stays locked until the rollup is written, so no sale is missed in between
+        purchase_table = open_table('purchases', self.purchase_file)
+        with purchase_table.lock.shared(), self.lock.exclusive():
+            lines = purchase_table.read_all() if os.path.exists(self.purchase_file) or purchase_table.backend != 'csv' else []
+            totals = {}
+            purchases = {}  # Rollup key -> purchases that included the item, as (run, purchase in the run)
+            previous, run, run_cents = None, 0, 0
+            for line in lines:
+                key = (line.get('Date', ''), line.get('Item Name', ''), line.get('Payment Method', ''))
+                units, revenue = totals.get(key, (0.0, 0.0))
+                totals[key] = (units + _number(line.get('Quantity')), revenue + _number(line.get('Total Cost')))
+
+                # Consecutive lines of the same purchase key, split where their totals reach the grand total
+                purchase = (line.get('Date', ''), line.get('First Name', ''), line.get('Last Name', ''),
+                            _number(line.get('Grand Total')), line.get('Payment Method', ''))
+                if purchase != previous:
+                    previous, run, run_cents = purchase, run + 1, 0
+                grand_total = _cents(line.get('Grand Total'))
+                purchases.setdefault(key, set()).add((run, run_cents // grand_total if grand_total > 0 else 0))
+                run_cents += _cents(line.get('Total Cost'))
+
+            rows = [
+                dict(zip(self.KEY, key), **_totals(units, revenue, len(purchases[key])))
+                for key, (units, revenue) in sorted(totals.items())
+            ]
+            if self.journal:
+                # The journal holds older totals of the same rows. Remove the rollup before emptying it, so a crash
+                # before the new rollup is written leaves none and the next sale builds it again
+                if os.path.exists(self.rollup_file):
+                    os.remove(self.rollup_file)
+                self._clear_journal()
+            self.table.write_all(rows)
+
+            self._pending = {}
+            self.rows = {}
+            for row in rows:
+                self._apply(row)
+            # Inside a WriteBatch the rows are only written when it ends, reload them then
+            self._signature = None if current_batch() else self.table.signature()
+        return len(rows)
+
+
+def _files(rollup_file, purchase_file):
+    # Both files are in DBFiles unless given, when only one of them is given the other one is next to it
+    given = rollup_file or purchase_file
+    db_dir = os.path.dirname(os.path.abspath(given)) if given else DB_DIR
+    return (rollup_file or os.path.join(db_dir, TABLES['sales_daily']['file']),
+            purchase_file or os.path.join(db_dir, TABLES['purchases']['file']))
+
+
+def _number(value):
+    # A quantity or an amount of money written as text, 0 when it is empty or not a number
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _cents(value):
+    # An amount of money written as text in whole cents, so totals add up exactly
+    return round(_number(value) * 100)
+
+
+def _totals(units, revenue, transactions):
+    # The value columns of a rollup row as they are stored
+    return {
+        'Units': str(int(units)) if float(units).is_integer() else str(units),
+        'Revenue': f"{revenue:.2f}",
+        'Transactions': str(transactions),
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python src/SalesRollup.py rebuild [db_dir]
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Usage: python src/SalesRollup.py rebuild [db_dir]")
+        sys.exit(1)
+
+    directory = sys.argv[2] if len(sys.argv) > 2 else DB_DIR
+    rollup = SalesRollup.for_file(os.path.join(directory, TABLES['sales_daily']['file']))
+    print(f"Rebuilt the daily sales rollup from {rollup.purchase_file}: {rollup.rebuild()} rows.")
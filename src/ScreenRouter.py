@@ -0,0 +1,96 @@
+# Import necessary libraries for system operations
+import importlib
+
+
+class ScreenRouter:
+    # Central navigation for the QStackedWidget that holds every screen
+    #
+    # Each screen is created the first time it is shown and then reused, so going back and forth does not
+    # stack up new screens, timers and database readers. Screens may define on_show() to refresh their data
+    # when they are shown again and on_hide() to pause work (e.g. timers) while they are not visible.
+    # Screens that belong to the logged in user get the Session returned by LoginRoles.login() and are deleted
+    # on logout so nothing leaks into the next session.
+
+    # Screen name -> (module, class, window size, True if the screen belongs to the logged in user)
+    # Modules are imported the first time their screen is shown, which also avoids circular imports
+    SCREENS = {
+        'login': ('LogInGUI', 'MainUI', (800, 525), False),
+        'create_account': ('CreateAccount', 'CreateAccountUI', (1000, 600), False),
+        'store_hours': ('StoreHoursUI', 'StoreHoursUI', (1000, 600), False),
+        'dashboard': ('Dashboard', 'Dashboard', (1050, 600), True),
+        'purchases': ('Purchases', 'Purchases', (1169, 558), True),
+        'reports': ('Reports', 'Reports', (1050, 600), True),
+        'inventory': ('InventoryUI', 'InventoryUI', (1010, 500), True),
+        'fill_prescription': ('FillPrescriptionUI', 'FillPrescriptionUI', (1132, 661), True),
+        'patients': ('PatientUI', 'PatientUI', (1050, 600), True),
+        'prescriptions': ('PrescriptionUI', 'PrescriptionUI', (1050, 500), True),
+        'admin': ('AdminUI', 'AdminUI', (1050, 500), True),
+    }
+
+    @classmethod
+    def for_widget(cls, widget):
+        # Return the router of a QStackedWidget, creating it the first time
+        # It is stored on the widget itself so every screen finds the same router
+        router = getattr(widget, 'screen_router', None)
+        if router is None:
+            router = cls(widget)
+            widget.screen_router = router
+        return router
+
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.session = None  # Session of the logged in user, None when logged out
+        self.screens = {}  # Screen name -> screen instance
+        self.current = None  # Name of the screen being shown
+
+
+    def show(self, name):
+        # Show a screen, creating it if needed, and return it
+        module_name, class_name, size, session_screen = self.SCREENS[name]
+        if session_screen and self.session is None:
+            raise RuntimeError(f"The '{name}' screen needs a logged in user.")
+
+        screen = self.screens.get(name)
+        if screen is None:
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            screen = screen_class(self.widget, self.session) if session_screen else screen_class(self.widget)
+            self.screens[name] = screen
+            self.widget.addWidget(screen)
+        elif hasattr(screen, 'on_show'):
+            screen.on_show()  # Shown again, bring its data up to date
+
+        previous = self.screens.get(self.current)
+        if previous is not None and previous is not screen and hasattr(previous, 'on_hide'):
+            previous.on_hide()
+
+        self.current = name
+        self.widget.setCurrentWidget(screen)
+        self.widget.setFixedSize(*size)
+        return screen
+
+
+    def start_session(self, session):
+        # Log a user in and show their dashboard
+        if self.session is not None:
+            self._close_session_screens()
+        self.session = session
+        return self.show('dashboard')
+
+
+    def end_session(self):
+        # Log the user out, delete every screen that belonged to them and go back to the login screen
+        self._close_session_screens()
+        self.session = None
+        return self.show('login')
+
+
+    def _close_session_screens(self):
+        for name in [name for name in self.screens if self.SCREENS[name][3]]:
+            screen = self.screens.pop(name)
+            if hasattr(screen, 'on_hide'):
+                screen.on_hide()
+            self.widget.removeWidget(screen)
+            screen.deleteLater()
+        if self.current not in self.screens:
+            self.current = None
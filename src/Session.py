@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import NamedTuple
+
+# Permissions checked by the screens
+ADMIN = 'admin'  # Manage user accounts
+FILL_PRESCRIPTION = 'fill_prescription'  # Fill prescriptions
+REMOVE_PATIENT = 'remove_patient'  # Remove patients
+
+# Role -> permissions of the accounts with that role
+ROLE_PERMISSIONS = {
+    'manager': frozenset({ADMIN, REMOVE_PATIENT}),
+    'pharmacist': frozenset({FILL_PRESCRIPTION, REMOVE_PATIENT}),
+}
+
+
+class Session(NamedTuple):
+    # The logged in user, returned by LoginRoles.login() and handed to every screen by the ScreenRouter
+    # It can't be changed after login, so a screen checks what the user may do without reading the accounts again
+    # (a NamedTuple rather than a frozen dataclass, dataclasses would add its imports to the login screen's startup)
+    username: str
+    role: str
+    display_name: str
+    login_time: datetime
+    permissions: frozenset = frozenset()
+
+    @classmethod
+    def for_account(cls, user_data, login_time=None):
+        # Build the session of an account row from the user accounts database
+        role = (user_data.get('Role') or '').strip().lower()
+        # The accounts database has no first and last name columns yet, fall back to the username
+        name = f"{user_data.get('First Name', '')} {user_data.get('Last Name', '')}".strip()
+        return cls(
+            username=user_data['Username'],
+            role=role,
+            display_name=name or user_data['Username'],
+            login_time=login_time or datetime.now(),
+            permissions=ROLE_PERMISSIONS.get(role, frozenset()),
+        )
+
+
+    def can(self, permission):
+        # Check if the user has the given permission
+        return permission in self.permissions
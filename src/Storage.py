@@ -0,0 +1,517 @@
+# Import necessary libraries for system operations
+import csv
+import itertools
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from AtomicFile import atomic_write_csv, current_batch, durable_append, format_csv_rows
+from FileLock import FileLock
+
+# Environment variable that selects the storage backend, either 'csv' (default) or 'sqlite'
+BACKEND_ENV = 'PHARMACY_STORAGE'
+
+# Name of the SQLite database file, stored in the same directory as the CSV files
+DATABASE_NAME = 'pharmacy.db'
+
+# Default location of the database files
+DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DBFiles')
+
+# Every table of the pharmacy database: CSV file name, columns, and the columns that are indexed
+TABLES = {
+    'inventory': {
+        'file': 'db_inventory.csv',
+        'fields': ['Item', 'ID', 'Quantity', 'Price', 'Expiration Date', 'Date Added', 'Date Updated', 'Date Removed'],
+        'indexes': [('ID',), ('Item',)],
+    },
+    'patients': {
+        'file': 'db_patient_info.csv',
+        'fields': ['FirstName', 'LastName', 'DateOfBirth', 'StreetAddress', 'City', 'State', 'ZipCode',
+                   'PhoneNumber', 'Email', 'NameInsured', 'Provider', 'PolicyNumber', 'GroupNumber'],
+        'indexes': [('FirstName', 'LastName', 'DateOfBirth')],
+    },
+    'pharmacy_info': {
+        'file': 'db_pharmacy_info.csv',
+        'fields': ['name', 'website', 'address', 'owner', 'phone_number', 'mon_hours', 'tue_hours',
+                   'wed_hours', 'thu_hours', 'fri_hours', 'sat_hours', 'sun_hours'],
+        'indexes': [],
+    },
+    'prescriptions': {
+        'file': 'db_prescriptions.csv',
+        'fields': ['Patient_First_Name', 'Patient_Last_Name', 'Patient_DOB', 'Prescription_Number',
+                   'Medication', 'Quantity', 'Status', 'Pharmacist'],
+        'indexes': [('Prescription_Number',), ('Patient_First_Name', 'Patient_Last_Name', 'Patient_DOB')],
+    },
+    'purchases': {
+        'file': 'db_purchase_data.csv',
+        'fields': ['Date', 'First Name', 'Last Name', 'Item Name', 'ID', 'Quantity', 'Price', 'Total Cost',
+                   'Grand Total', 'Payment Method', 'Prescription'],
+        'indexes': [('Date',)],
+    },
+    'sales_daily': {
+        'file': 'db_sales_daily.csv',
+        'fields': ['Date', 'Item Name', 'Payment Method', 'Units', 'Revenue', 'Transactions'],
+        'indexes': [('Date', 'Item Name', 'Payment Method')],
+    },
+    'user_accounts': {
+        'file': 'db_user_account.csv',
+        'fields': ['Username', 'Email', 'Password', 'Role', 'Locked_counter', 'Locked_status', 'Password_Fingerprint'],
+        'indexes': [('Username',)],
+    },
+}
+
+
+def get_backend():
+    # Returns the name of the storage backend selected for this process
+    backend = os.environ.get(BACKEND_ENV, 'csv').strip().lower()
+    if backend not in ('csv', 'sqlite'):
+        raise ValueError(f"Unknown storage backend '{backend}'. Use 'csv' or 'sqlite'.")
+    return backend
+
+
+def open_table(name, csv_file=None):
+    # Open one of the pharmacy tables with the selected backend
+    # csv_file is the CSV the table lives in (or is imported from); the SQLite database sits next to it
+    table = TABLES[name]
+    if csv_file is None:
+        csv_file = os.path.join(DB_DIR, table['file'])
+
+    if get_backend() == 'sqlite':
+        db_file = os.path.join(os.path.dirname(os.path.abspath(csv_file)), DATABASE_NAME)
+        return SQLiteTable(db_file, name, table['fields'], table['indexes'], csv_file)
+    return CSVTable(csv_file, table['fields'])
+
+
+def report_csv(name, csv_file):
+    # Returns a CSV file with the current contents of the table so the reports can load it with pandas
+    table = open_table(name, csv_file)
+    if table.backend != 'csv':
+        table.export_csv(csv_file)
+    return csv_file
+
+
+def table_files(name, csv_file=None):
+    # The files the rows of the table are stored in with the selected backend, to tell when the table has changed
+    # With SQLite every table is in the same database, so a change to any of them changes these files
+    if csv_file is None:
+        csv_file = os.path.join(DB_DIR, TABLES[name]['file'])
+    if get_backend() == 'sqlite':
+        db_file = os.path.join(os.path.dirname(os.path.abspath(csv_file)), DATABASE_NAME)
+        return [db_file, db_file + '-wal']
+    return [csv_file]
+
+
+def _matches(row, criteria):
+    # True if the row has the given value in every column of the criteria
+    return all(row.get(column) == value for column, value in criteria.items())
+
+
+class CSVTable:
+    backend = 'csv'
+
+    def __init__(self, csv_file, fieldnames):
+        self.csv_file = csv_file
+        self.fieldnames = list(fieldnames)
+        self.columns = list(fieldnames)  # Columns the table is declared with, files may still lack new ones
+        self._header_complete = False  # True once the file is known to have every declared column
+
+        # Reader/writer lock shared with every other process using this file
+        self.lock = FileLock.for_file(csv_file)
+
+
+    def _read(self):
+        # Read every row of the CSV file, keeping any extra columns the file may have
+        # Inside a WriteBatch the rows staged for this file are returned as well
+        batch = current_batch()
+        staged_rows, appended_rows = batch.staged_rows(self.csv_file) if batch else (None, [])
+        if staged_rows is not None:
+            return staged_rows
+
+        with self.lock.shared(), open(self.csv_file, mode='r', newline='') as file:
+            reader = csv.DictReader(file)
+            if reader.fieldnames:
+                # Keep the columns of the file and add declared columns it doesn't have yet,
+                # the file gets them the next time it is rewritten
+                self.fieldnames = list(reader.fieldnames) + [
+                    column for column in self.columns if column not in reader.fieldnames
+                ]
+                self._header_complete = len(self.fieldnames) == len(reader.fieldnames)
+            rows = [{key: value or '' for key, value in row.items() if key is not None} for row in reader]
+        return rows + appended_rows
+
+
+    def read_all(self):
+        # Returns every row in the table as a list of dictionaries
+        return self._read()
+
+
+    def find(self, **criteria):
+        # Returns the rows whose columns equal the given values
+        return [row for row in self._read() if _matches(row, criteria)]
+
+
+    def find_one(self, **criteria):
+        # Returns the first row whose columns equal the given values, or None
+        for row in self._read():
+            if _matches(row, criteria):
+                return row
+        return None
+
+
+    def append(self, row):
+        # Add one row to the end of the table
+        with self.lock.exclusive():
+            if not self._header_complete:
+                self._read()
+                if not self._header_complete:
+                    # The file is missing a column, rewrite it with the new header instead of appending
+                    self.write_all(self._read() + [row])
+                    return
+            batch = current_batch()
+            if batch:
+                batch.stage_append(self.csv_file, self.fieldnames, row)
+            else:
+                durable_append(self.csv_file, format_csv_rows(self.fieldnames, [row]))
+
+
+    def write_all(self, rows):
+        # Replace the contents of the table, the file is replaced atomically so a crash
+        # never leaves a half written table behind
+        with self.lock.exclusive():
+            batch = current_batch()
+            if batch:
+                batch.stage_rewrite(self.csv_file, self.fieldnames, rows)
+            else:
+                atomic_write_csv(self.csv_file, self.fieldnames, rows)
+                self._header_complete = all(column in self.fieldnames for column in self.columns)
+
+
+    def update(self, criteria, changes):
+        # Apply the changes to every row matching the criteria, returns how many rows changed
+        with self.lock.exclusive():
+            rows = self._read()
+            count = 0
+            for row in rows:
+                if _matches(row, criteria):
+                    row.update(changes)
+                    count += 1
+            if count:
+                self.write_all(rows)
+        return count
+
+
+    def update_many(self, key, changes_by_key):
+        # Apply different changes to many rows in one read and one write
+        # changes_by_key maps a value of the key column to the changes for that row, returns how many rows changed
+        with self.lock.exclusive():
+            rows = self._read()
+            count = 0
+            for row in rows:
+                changes = changes_by_key.get(row.get(key))
+                if changes:
+                    row.update(changes)
+                    count += 1
+            if count:
+                self.write_all(rows)
+        return count
+
+
+    def delete(self, criteria):
+        # Remove every row matching the criteria, returns how many rows were removed
+        with self.lock.exclusive():
+            rows = self._read()
+            kept = [row for row in rows if not _matches(row, criteria)]
+            if len(kept) != len(rows):
+                self.write_all(kept)
+        return len(rows) - len(kept)
+
+
+    def upsert(self, key, rows):
+        # Replace the rows that have the same value in the key column (or columns), add the others
+        columns = _key_columns(key)
+        with self.lock.exclusive():
+            existing = self._read()
+            position = {tuple(row.get(column) for column in columns): index for index, row in enumerate(existing)}
+            for row in rows:
+                row_key = tuple(row[column] for column in columns)
+                if row_key in position:
+                    existing[position[row_key]] = dict(row)
+                else:
+                    position[row_key] = len(existing)
+                    existing.append(dict(row))
+            self.write_all(existing)
+
+
+    def signature(self):
+        # Changes whenever the file is rewritten or appended to
+        stat = os.stat(self.csv_file)
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+    def export_csv(self, csv_file):
+        # Write the table to another CSV file
+        rows = self._read()
+        if os.path.abspath(csv_file) != os.path.abspath(self.csv_file):
+            CSVTable(csv_file, self.fieldnames).write_all(rows)
+
+
+class SQLiteTable:
+    backend = 'sqlite'
+
+    # Tables already known to exist, so the schema is only checked once per process
+    _created = set()
+
+    # One connection per database file and thread: every table joins the same transaction inside a WriteBatch
+    # (batches are per thread too), and a thread never sees or commits another thread's open transaction
+    _local = threading.local()
+
+    # Database file -> number of the last write made through any connection of this process. SQLite's
+    # data_version only changes for commits of other connections, this counts the ones of our own
+    _writes = {}
+    _write_numbers = itertools.count(1)
+
+    def __init__(self, db_file, name, fieldnames, indexes=(), csv_file=None):
+        self.db_file = db_file
+        self.name = name
+        self.fieldnames = list(fieldnames)
+        self._db_key = os.path.abspath(db_file)
+
+        # SQLite locks the database for single statements, this lock covers read-modify-write cycles
+        self.lock = FileLock.for_file(f"{db_file}.{name}")
+
+        if (db_file, name) not in SQLiteTable._created:
+            # Locked so only one process imports the CSV file into a new table
+            with self.lock.exclusive():
+                self._create(indexes, csv_file)
+            SQLiteTable._created.add((db_file, name))
+
+
+    def _create(self, indexes, csv_file):
+        # Create the table and its indexes, importing the CSV file the first time the table is made
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.name,)
+        ).fetchone()
+
+        columns = ', '.join(f"{_quote(field)} TEXT NOT NULL DEFAULT ''" for field in self.fieldnames)
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {_quote(self.name)} ({columns})")
+            for index_columns in indexes:
+                index_name = _quote(f"idx_{self.name}_{'_'.join(index_columns)}".replace(' ', '_'))
+                column_list = ', '.join(_quote(column) for column in index_columns)
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(self.name)} ({column_list})"
+                )
+
+            # Add the columns declared after the table was created
+            existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({_quote(self.name)})")}
+            for field in self.fieldnames:
+                if field not in existing:
+                    self.connection.execute(
+                        f"ALTER TABLE {_quote(self.name)} ADD COLUMN {_quote(field)} TEXT NOT NULL DEFAULT ''"
+                    )
+
+        if not exists and csv_file and os.path.exists(csv_file):
+            self.write_all(CSVTable(csv_file, self.fieldnames).read_all())
+
+
+    @property
+    def connection(self):
+        # This thread's connection to the database, opened the first time the thread uses it
+        connections = SQLiteTable._local.__dict__.setdefault('connections', {})
+        connection = connections.get(self._db_key)
+        if connection is None:
+            import sqlite3  # Only loaded when the SQLite backend is used
+            connection = sqlite3.connect(self.db_file, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connections[self._db_key] = connection
+        return connection
+
+
+    @contextmanager
+    def _transaction(self):
+        # Commit the statements run inside the block, or leave them for the open WriteBatch to commit
+        connection = self.connection
+        batch = current_batch()
+        if batch is None:
+            with connection:
+                yield
+        else:
+            batch.defer(connection, connection.commit, connection.rollback)
+            yield
+        SQLiteTable._writes[self._db_key] = next(SQLiteTable._write_numbers)
+
+
+    def _rows(self, cursor):
+        # Convert the rows of a cursor into dictionaries
+        return [dict(zip(self.fieldnames, row)) for row in cursor]
+
+
+    def _where(self, criteria):
+        # Build the WHERE clause and parameters for an equality match on the criteria
+        if not criteria:
+            return '', []
+        clause = ' AND '.join(f"{_quote(column)} = ?" for column in criteria)
+        return f" WHERE {clause}", list(criteria.values())
+
+
+    def _select(self):
+        return f"SELECT {', '.join(_quote(field) for field in self.fieldnames)} FROM {_quote(self.name)}"
+
+
+    def read_all(self):
+        # Returns every row in the table, in insertion order
+        return self._rows(self.connection.execute(self._select() + " ORDER BY rowid"))
+
+
+    def find(self, **criteria):
+        # Returns the rows whose columns equal the given values, using the indexes where possible
+        where, params = self._where(criteria)
+        return self._rows(self.connection.execute(self._select() + where + " ORDER BY rowid", params))
+
+
+    def find_one(self, **criteria):
+        # Returns the first row whose columns equal the given values, or None
+        where, params = self._where(criteria)
+        rows = self._rows(self.connection.execute(self._select() + where + " ORDER BY rowid LIMIT 1", params))
+        return rows[0] if rows else None
+
+
+    def _insert(self, rows):
+        placeholders = ', '.join('?' for _ in self.fieldnames)
+        columns = ', '.join(_quote(field) for field in self.fieldnames)
+        self.connection.executemany(
+            f"INSERT INTO {_quote(self.name)} ({columns}) VALUES ({placeholders})",
+            [[_text(row.get(field)) for field in self.fieldnames] for row in rows]
+        )
+
+
+    def append(self, row):
+        # Add one row to the end of the table
+        with self._transaction():
+            self._insert([row])
+
+
+    def write_all(self, rows):
+        # Replace the contents of the table in a single transaction
+        with self._transaction():
+            self.connection.execute(f"DELETE FROM {_quote(self.name)}")
+            self._insert(rows)
+
+
+    def update(self, criteria, changes):
+        # Apply the changes to every row matching the criteria, returns how many rows changed
+        changes = {column: value for column, value in changes.items() if column in self.fieldnames}
+        if not changes:
+            return len(self.find(**criteria))
+        assignments = ', '.join(f"{_quote(column)} = ?" for column in changes)
+        where, params = self._where(criteria)
+        with self._transaction():
+            cursor = self.connection.execute(
+                f"UPDATE {_quote(self.name)} SET {assignments}{where}",
+                [_text(value) for value in changes.values()] + params
+            )
+        return cursor.rowcount
+
+
+    def update_many(self, key, changes_by_key):
+        # Apply different changes to many rows in one transaction, returns how many rows changed
+        count = 0
+        with self._transaction():
+            for key_value, changes in changes_by_key.items():
+                changes = {column: value for column, value in changes.items() if column in self.fieldnames}
+                if not changes:
+                    continue
+                assignments = ', '.join(f"{_quote(column)} = ?" for column in changes)
+                cursor = self.connection.execute(
+                    f"UPDATE {_quote(self.name)} SET {assignments} WHERE {_quote(key)} = ?",
+                    [_text(value) for value in changes.values()] + [key_value]
+                )
+                count += cursor.rowcount
+        return count
+
+
+    def delete(self, criteria):
+        # Remove every row matching the criteria, returns how many rows were removed
+        where, params = self._where(criteria)
+        with self._transaction():
+            cursor = self.connection.execute(f"DELETE FROM {_quote(self.name)}{where}", params)
+        return cursor.rowcount
+
+
+    def upsert(self, key, rows):
+        # Replace the rows that have the same value in the key column (or columns), add the others
+        columns = _key_columns(key)
+        assignments = ', '.join(f"{_quote(field)} = ?" for field in self.fieldnames)
+        where = ' AND '.join(f"{_quote(column)} = ?" for column in columns)
+        with self._transaction():
+            for row in rows:
+                values = [_text(row.get(field)) for field in self.fieldnames]
+                cursor = self.connection.execute(
+                    f"UPDATE {_quote(self.name)} SET {assignments} WHERE {where}",
+                    values + [_text(row[column]) for column in columns]
+                )
+                if cursor.rowcount == 0:
+                    self._insert([row])
+
+
+    def signature(self):
+        # Changes whenever the database is written: data_version changes when another connection (another thread
+        # or process) commits, the write number when a table of this process writes through this thread's one
+        data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        return data_version, SQLiteTable._writes.get(self._db_key, 0)
+
+
+    def export_csv(self, csv_file):
+        # Write the table to a CSV file, e.g. for the reports
+        CSVTable(csv_file, self.fieldnames).write_all(self.read_all())
+
+
+def _key_columns(key):
+    # The columns of an upsert key, given as one column name or a list of them
+    return [key] if isinstance(key, str) else list(key)
+
+
+def _text(value):
+    # Columns are stored as text exactly like in the CSV files
+    return '' if value is None else str(value)
+
+
+def _quote(identifier):
+    # Quote a table or column name for SQL, the CSV headers contain spaces
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def import_csv_tables(db_dir=DB_DIR):
+    # One-shot import of every CSV file in db_dir into the SQLite database next to them
+    db_file = os.path.join(db_dir, DATABASE_NAME)
+    for name, table in TABLES.items():
+        csv_file = os.path.join(db_dir, table['file'])
+        if not os.path.exists(csv_file):
+            print(f"Skipping {name}, {csv_file} not found.")
+            continue
+        rows = CSVTable(csv_file, table['fields']).read_all()
+        SQLiteTable(db_file, name, table['fields'], table['indexes']).write_all(rows)
+        print(f"Imported {len(rows)} rows into {name}.")
+
+
+def export_csv_tables(db_dir=DB_DIR):
+    # Write every table of the SQLite database back out to its CSV file
+    db_file = os.path.join(db_dir, DATABASE_NAME)
+    for name, table in TABLES.items():
+        csv_file = os.path.join(db_dir, table['file'])
+        SQLiteTable(db_file, name, table['fields'], table['indexes']).export_csv(csv_file)
+        print(f"Exported {name} to {csv_file}.")
+
+
+if __name__ == "__main__":
+    # Usage: python src/Storage.py import|export [db_dir]
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python src/Storage.py import|export [db_dir]")
+        sys.exit(1)
+
+    directory = sys.argv[2] if len(sys.argv) > 2 else DB_DIR
+    if sys.argv[1] == 'import':
+        import_csv_tables(directory)
+    else:
+        export_csv_tables(directory)
@@ -1,10 +1,10 @@
 from PyQt5.QtWidgets import QMainWindow, QMessageBox, QLineEdit, QInputDialog,QLabel
-from PyQt5.uic import loadUi
-import os
+from UILoader import load_ui
 from PyQt5.QtCore import QTimer, QTime
 
 from src.LoginRoles import LoginRoles
 from src.StoreInfoManager import StoreInfoManager
+from AtomicFile import WriteBatch
 
 class StoreHoursUI(QMainWindow):
     def __init__(self, widget):  # Accept the widget as an argument
@@ -16,8 +16,7 @@ class StoreHoursUI(QMainWindow):
 
 
         # Load the UI file relative to the project's root
-        ui_path = os.path.join(os.path.dirname(__file__), '..', 'UI', 'storeHours.ui')
-        loadUi(ui_path, self)
+        load_ui('storeHours.ui', self)
 
         # Set the window title
         self.widget.setFixedSize(1000, 500)
@@ -57,6 +56,18 @@ class StoreHoursUI(QMainWindow):
         self.hoursUpdateBtn.clicked.connect(self.update_store_hours)
         
     
+    def on_show(self):
+        # Called by the ScreenRouter when the screen is shown again
+        self.update_clock()
+        self.timer.start(1000)
+        self.load_pharmacy_info()
+
+
+    def on_hide(self):
+        # No need to update the clock while the screen is not visible
+        self.timer.stop()
+
+
     def update_clock(self):
         # Update the clock display with the current time
         current_time = QTime.currentTime()
@@ -87,21 +98,9 @@ class StoreHoursUI(QMainWindow):
         
     def back_to_login(self):
         # Go back to the login screen
-        from src.LogInGUI import MainUI  # Import MainUI inside the function to avoid circular import
-
-        # Check if MainUI (login screen) is already in the stack to avoid duplicates
-        for i in range(self.widget.count()):
-            if isinstance(self.widget.widget(i), MainUI):
-                self.widget.setCurrentIndex(i)
-                self.widget.setFixedSize(800, 525)
-                return
-
-        # If not found, create a new MainUI instance
-        login_screen = MainUI(self.widget)
-        self.widget.addWidget(login_screen)
-        self.widget.setCurrentIndex(self.widget.indexOf(login_screen))
-        self.widget.setFixedSize(800, 525)  
-        
+        from ScreenRouter import ScreenRouter # Import here to avoid circular imports
+        ScreenRouter.for_widget(self.widget).show('login')
+
 
     def update_store_hours(self):
         # Authenticate the manager since they are the only ones that can make changes
@@ -117,8 +116,8 @@ class StoreHoursUI(QMainWindow):
 
         # Verify manager credentials
         roles = LoginRoles()
-        success, message = roles.login(manager_username, manager_password)
-        if not success or roles.find_user_role(manager_username) != 'manager':
+        session, message = roles.login(manager_username, manager_password)
+        if not session or session.role != 'manager':
             QMessageBox.warning(self, "Authorization Failed", "Manager approval failed. Please try again.")
             return
 
@@ -131,12 +130,6 @@ class StoreHoursUI(QMainWindow):
             "Pharmacy Phone Number": ("phone_number", self.label_pharmacy_phone),
         }
 
-        for field_name, (csv_field, label) in fields.items():
-            new_value, ok = QInputDialog.getText(self, "Update Pharmacy Info", f"Enter {field_name} (Leave blank to skip):")
-            if ok and new_value:  # Only update if the user provided a new value
-                label.setText(f"{field_name}: {new_value}")
-                self.info_manager.update_info(csv_field, new_value)
-
         days = {
             "Monday": ("mon_hours", self.label_monday_hours),
             "Tuesday": ("tue_hours", self.label_tuesday_hours),
@@ -147,11 +140,24 @@ class StoreHoursUI(QMainWindow):
             "Sunday": ("sun_hours", self.label_sunday_hours),
         }
 
+        # Ask for every change first, nothing is locked while the dialogs are open
+        changes = {}  # CSV field -> new value
+        for field_name, (csv_field, label) in fields.items():
+            new_value, ok = QInputDialog.getText(self, "Update Pharmacy Info", f"Enter {field_name} (Leave blank to skip):")
+            if ok and new_value:  # Only update if the user provided a new value
+                label.setText(f"{field_name}: {new_value}")
+                changes[csv_field] = new_value
+
         for day, (csv_field, label) in days.items():
             hours, ok = QInputDialog.getText(self, "Update Pharmacy Info", f"Enter {day} Working Hours (Leave blank to skip):")
             if ok and hours:  # Only update if the user provided new hours
                 label.setText(f"{day}: {hours}")
-                self.info_manager.update_info(csv_field, hours)
+                changes[csv_field] = hours
+
+        # Then write the pharmacy info once with every change
+        with WriteBatch():
+            for csv_field, value in changes.items():
+                self.info_manager.update_info(csv_field, value)
 
         # Reload labels to ensure display reflects the updated CSV
         self.load_pharmacy_info()
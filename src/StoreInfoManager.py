@@ -1,5 +1,6 @@
 import csv
 import os
+from Storage import open_table
 
 class StoreInfoManager:
     def __init__(self, csv_file='../DBFiles/db_pharmacy_info.csv'): # Default file path
@@ -17,6 +18,9 @@ class StoreInfoManager:
         if not os.path.exists(self.csv_file):
             self._initialize_csv()
 
+        # Open the pharmacy info table with the selected storage backend
+        self.table = open_table('pharmacy_info', self.csv_file)
+
         # Load the current data from the CSV
         self.data = self._load_data()
 
@@ -31,11 +35,10 @@ class StoreInfoManager:
 
 
     def _load_data(self):
-        # Read the first row of the CSV file
-        with open(self.csv_file, mode='r') as file:
-            reader = csv.DictReader(file)
-            # Return the first row if it exists, otherwise initialize with empty data
-            return next(reader, {header: "" for header in self.headers})
+        # Read the first row of the table
+        rows = self.table.read_all()
+        # Return the first row if it exists, otherwise initialize with empty data
+        return rows[0] if rows else {header: "" for header in self.headers}
 
 
     def get_info(self):
@@ -45,11 +48,11 @@ class StoreInfoManager:
 
 
     def update_info(self, field, value):
-        # Update a single field in the CSV file
-        self.data[field] = value  # Update in-memory dictionary
-        
-        # Write the updated data back to the CSV file
-        with open(self.csv_file, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=self.headers)
-            writer.writeheader()  # Write the header again
-            writer.writerow(self.data)  # Write the single row of data
+        # Update a single field in the database
+        # Re-read under the lock so changes made by another terminal are kept
+        with self.table.lock.exclusive():
+            self.data = self._load_data()
+            self.data[field] = value  # Update in-memory dictionary
+
+            # Write the single row of data back to the table
+            self.table.write_all([self.data])
@@ -0,0 +1,333 @@
+# Import necessary libraries for system operations
+import os
+import sys
+import json
+import atexit
+import logging
+import threading
+from datetime import date, datetime, time
+
+# Every event is written to the transaction log as one JSON object per line, for example
+# {"time": "2024-11-26T22:17:19.402", "user": "bennett", "action": "purchase", "message": "...", "item_ids": ["12"]}
+# Set PHARMACY_LOG_DIR to write the log somewhere else (e.g. while testing)
+LOG_DIR = os.environ.get('PHARMACY_LOG_DIR', os.path.join(os.path.dirname(__file__), '..', 'logs'))
+
+# The log is split into one file per day, logs/transactions/<YYYY-MM-DD>.log, so a report only opens the days it covers
+SEGMENT_DIR = os.path.join(LOG_DIR, 'transactions')
+# Where each segment's hours start in the file, so a report can seek to the start of the range it asked for
+INDEX_FILE = os.path.join(SEGMENT_DIR, 'index.json')
+# Single log file written before the log was split by day, read until it is split with
+# python src/TransactionLog.py split
+LEGACY_LOG_FILE = os.path.join(LOG_DIR, 'transaction.log')
+
+# Sorts after every timestamp, the end of a range with no end
+_OPEN_END = '\uffff'
+
+# Most records gathered by the writer thread before they are written together
+BATCH_SIZE = 256
+
+# Actions written to the log
+LOGIN = 'login'
+LOGIN_FAILED = 'login_failed'
+LOGIN_LOCKED = 'login_locked'
+PURCHASE = 'purchase'
+PRESCRIPTION_FILL = 'prescription_fill'
+
+# Logger the application writes events to, the queue it puts them on, the background thread that takes
+# them off the queue and the handler it writes them to the file with
+_logger = logging.getLogger('pharmacy.transactions')
+_records = None
+_listener = None
+_handler = None
+# Held while the writer is started, so two threads logging their first event start only one
+_start_lock = threading.Lock()
+
+
+def log(action, user, message, **details):
+    # Log an event, returns right away and the event is written by the background writer
+    # details are the ids of what the event touched, e.g. prescription_number='RX-1'
+    if _listener is None:
+        _start()
+    _logger.info(message, extra={'transaction': {'user': user, 'action': action, **details}})
+
+
+def flush():
+    # Wait until every event logged so far is in the file, the writer keeps running
+    # A marker is put on the queue behind those events, the writer writes what it has when it reaches it
+    if _listener is None:
+        return
+    written = threading.Event()
+    _records.put(logging.makeLogRecord({'written': written}))
+    written.wait()
+
+
+def read_records(start=None, end=None, segment_dir=None):
+    # Read the events between start and end as dictionaries with at least time, user, action and message
+    # start and end are dates (the whole day is included) or datetimes, None leaves that side of the range open
+    # Only the segments of the days in the range are opened, and only the hours in the range are read
+    segment_dir = segment_dir or SEGMENT_DIR
+    start_time = _range_bound(start, time.min, '')
+    end_time = _range_bound(end, time.max, _OPEN_END)
+
+    records = []
+    legacy_file = os.path.join(os.path.dirname(segment_dir), os.path.basename(LEGACY_LOG_FILE))
+    if os.path.exists(legacy_file):
+        with open(legacy_file, mode='r') as file:
+            records.extend(_in_range(map(parse_line, file), start_time, end_time))
+
+    index = SegmentIndex(segment_dir)
+    for segment in index.segments(start_time[:10], end_time[:10]):
+        begin, stop = index.byte_range(segment, start_time, end_time)
+        if begin >= stop:
+            continue
+        with open(os.path.join(segment_dir, segment), mode='rb') as file:
+            file.seek(begin)
+            lines = file.read(stop - begin).decode('utf-8').splitlines()
+        records.extend(_in_range(map(parse_line, lines), start_time, end_time))
+    index.save()
+    return records
+
+
+def log_files(start=None, end=None, segment_dir=None):
+    # The files read_records() reads the events between start and end from, to tell when those events have changed
+    segment_dir = segment_dir or SEGMENT_DIR
+    start_time = _range_bound(start, time.min, '')
+    end_time = _range_bound(end, time.max, _OPEN_END)
+    legacy_file = os.path.join(os.path.dirname(segment_dir), os.path.basename(LEGACY_LOG_FILE))
+    files = [legacy_file] if os.path.exists(legacy_file) else []
+    files.extend(os.path.join(segment_dir, segment) for segment in SegmentIndex(segment_dir).segments(start_time[:10], end_time[:10]))
+    return files
+
+
+def parse_line(line):
+    # Parse one line of the log, None for a blank line
+    # Lines written before the log was JSON are "<date> - <message>" and are turned into records too
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            return json.loads(line)
+        except ValueError:
+            pass
+
+    date_part, _, message = line.partition(' - ')
+    try:
+        logged = datetime.strptime(date_part.split(',')[0], "%Y-%m-%d %H:%M:%S").isoformat(timespec='milliseconds')
+    except ValueError:
+        return {'time': '', 'user': '', 'action': '', 'message': line}
+    return {'time': logged, 'user': '', 'action': '', 'message': message.strip()}
+
+
+def split_legacy_log(segment_dir=None):
+    # Move the events of the single log file into the day segments, returns how many were moved
+    # Older events go in front of the ones already in a segment, the old file is removed afterwards
+    from AtomicFile import atomic_write
+    segment_dir = segment_dir or SEGMENT_DIR
+    legacy_file = os.path.join(os.path.dirname(segment_dir), os.path.basename(LEGACY_LOG_FILE))
+    if not os.path.exists(legacy_file):
+        return 0
+
+    lines_by_day = {}
+    day = None
+    with open(legacy_file, mode='r') as file:
+        for record in map(parse_line, file):
+            if record is None:
+                continue
+            # A line without a readable date stays with the events logged before it
+            day = record['time'][:10] or day or date.today().isoformat()
+            lines_by_day.setdefault(day, []).append(json.dumps(record) + '\n')
+
+    os.makedirs(segment_dir, exist_ok=True)
+    for day, lines in lines_by_day.items():
+        segment_file = os.path.join(segment_dir, day + '.log')
+        if os.path.exists(segment_file):
+            with open(segment_file, mode='r') as file:
+                lines.append(file.read())
+        atomic_write(segment_file, lambda file: file.writelines(lines))
+    SegmentIndex(segment_dir).clear(list(lines_by_day))
+    os.remove(legacy_file)
+    return sum(len(lines) for lines in lines_by_day.values())
+
+
+class SegmentIndex:
+    # Where each hour of every segment starts, kept in logs/transactions/index.json:
+    # {"2024-11-26.log": {"size": 4113, "first": "...", "last": "...", "hours": {"09": 0, "14": 1725}}}
+    # Segments are only ever appended to, so an entry is brought up to date by reading what was added after "size"
+    def __init__(self, segment_dir):
+        self.segment_dir = segment_dir
+        self.index_file = os.path.join(segment_dir, os.path.basename(INDEX_FILE))
+        self.changed = False
+        try:
+            with open(self.index_file, mode='r') as file:
+                self.entries = json.load(file)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+
+    def segments(self, first_day='', last_day=_OPEN_END):
+        # Names of the segments of the days between first_day and last_day, oldest first
+        if not os.path.isdir(self.segment_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.segment_dir)
+            if name.endswith('.log') and first_day <= name[:-len('.log')] <= last_day
+        )
+
+
+    def byte_range(self, segment, start_time, end_time):
+        # (begin, stop) offsets of the part of a segment that can hold events between start_time and end_time
+        entry = self.entry(segment)
+        if not entry['first'] or entry['last'] < start_time or entry['first'] > end_time:
+            return 0, 0
+        hours = entry['hours']
+        day = segment[:-len('.log')]
+        begin = 0
+        if start_time[:10] == day:
+            begin = min((offset for hour, offset in hours.items() if hour >= start_time[11:13]), default=entry['size'])
+        stop = entry['size']
+        if end_time[:10] == day:
+            stop = min((offset for hour, offset in hours.items() if hour > end_time[11:13]), default=entry['size'])
+        return begin, stop
+
+
+    def entry(self, segment):
+        # Index entry of a segment, indexing what was appended to it since it was last read
+        entry = self.entries.get(segment) or {'size': 0, 'first': '', 'last': '', 'hours': {}}
+        path = os.path.join(self.segment_dir, segment)
+        size = os.path.getsize(path)
+        if size < entry['size']:
+            entry = {'size': 0, 'first': '', 'last': '', 'hours': {}}  # The segment was rewritten, start over
+        if size > entry['size']:
+            with open(path, mode='rb') as file:
+                file.seek(entry['size'])
+                data = file.read(size - entry['size'])
+            offset = entry['size']
+            # Only index whole lines, a batch being written right now is picked up next time
+            for line in data[:data.rfind(b'\n') + 1].splitlines(keepends=True):
+                record = parse_line(line.decode('utf-8'))
+                logged = record['time'] if record else ''
+                if logged:
+                    entry['hours'].setdefault(logged[11:13], offset)
+                    entry['first'] = min(entry['first'] or logged, logged)
+                    entry['last'] = max(entry['last'], logged)
+                offset += len(line)
+            entry['size'] = offset
+            self.entries[segment] = entry
+            self.changed = True
+        return entry
+
+
+    def clear(self, days):
+        # Forget the entries of segments that were rewritten
+        for day in days:
+            self.entries.pop(day + '.log', None)
+        self.changed = True
+        self.save()
+
+
+    def save(self):
+        # Write the index if reading the segments added to it
+        if not self.changed:
+            return
+        from AtomicFile import atomic_write
+        try:
+            atomic_write(self.index_file, lambda file: json.dump(self.entries, file))
+        except OSError as e:
+            print(f"Failed to write the transaction log index: {e}")
+        self.changed = False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    # Turns a log record into one line of JSON
+    def format(self, record):
+        logged = datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')
+        return json.dumps({'time': logged, **getattr(record, 'transaction', {}), 'message': record.getMessage()})
+
+
+class SegmentFileHandler(logging.Handler):
+    # Writes the records waiting in the queue to the segment of the day they were logged, with one write per segment
+    # Appending in a single write keeps lines whole when several terminals log to the same file
+    def __init__(self, segment_dir, queue):
+        super().__init__()
+        self.segment_dir = segment_dir
+        self.queue = queue
+        self.lines = {}  # Segment file -> lines waiting to be written
+        self.waiting = 0
+
+    def emit(self, record):
+        written = getattr(record, 'written', None)
+        if written is not None:
+            # A marker from flush(), every event logged before it has been taken from the queue
+            self.flush()
+            written.set()
+            return
+
+        segment = date.fromtimestamp(record.created).isoformat() + '.log'
+        self.lines.setdefault(segment, []).append(self.format(record) + '\n')
+        self.waiting += 1
+        # Write once the records logged so far are all taken from the queue
+        if self.waiting >= BATCH_SIZE or self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        lines, self.lines, self.waiting = self.lines, {}, 0
+        for segment, segment_lines in lines.items():
+            try:
+                os.makedirs(self.segment_dir, exist_ok=True)
+                descriptor = os.open(os.path.join(self.segment_dir, segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(descriptor, ''.join(segment_lines).encode('utf-8'))
+                finally:
+                    os.close(descriptor)
+            except OSError as e:
+                print(f"Failed to write to the transaction log: {e}")
+
+
+def _range_bound(value, default_time, open_end):
+    # ISO text of one end of a range, ISO timestamps sort in time order so records are compared as text
+    if value is None:
+        return open_end
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, default_time)
+    return value.isoformat(timespec='milliseconds')
+
+
+def _in_range(records, start_time, end_time):
+    # Events between the two times, a line without a readable date is kept so it shows up in reports
+    return [record for record in records if record is not None and (
+        not record['time'] or start_time <= record['time'] <= end_time
+    )]
+
+
+def _start():
+    # Start the background writer the first time something is logged
+    import queue
+    from logging.handlers import QueueHandler, QueueListener  # Kept off the startup path until the first event
+    global _records, _listener, _handler
+
+    with _start_lock:
+        if _listener is not None:
+            return  # Another thread started it first
+        _records = queue.SimpleQueue()
+        _handler = SegmentFileHandler(SEGMENT_DIR, _records)
+        _handler.setFormatter(JsonLinesFormatter())
+        _logger.handlers = [QueueHandler(_records)]
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        listener = QueueListener(_records, _handler)
+        listener.start()
+        _listener = listener
+
+
+# Write the events still in the queue when the program exits
+atexit.register(flush)
+
+
+if __name__ == "__main__":
+    # Usage: python src/TransactionLog.py split
+    if sys.argv[1:] == ['split']:
+        print(f"Moved {split_legacy_log()} events into {os.path.normpath(SEGMENT_DIR)}.")
+    else:
+        print("Usage: python src/TransactionLog.py split")
+        sys.exit(1)
@@ -0,0 +1,143 @@
+# Import necessary libraries for system operations
+import os
+import sys
+import importlib
+
+# Build the screens from the precompiled Python modules when they are there and up to date
+# Set PHARMACY_COMPILED_UI=0 to always parse the .ui files instead (e.g. while editing them in Designer)
+USE_COMPILED = os.environ.get('PHARMACY_COMPILED_UI', '1') != '0'
+
+# Folder of the Designer files and the package the build step compiles them into
+UI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'UI'))
+COMPILED_PACKAGE = 'CompiledUI'
+COMPILED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), COMPILED_PACKAGE)
+
+# Icons and images used by the .ui files, compiled into one binary resource file
+RESOURCE_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'resources', 'pharm.rcc'))
+
+# .ui file name -> compiled Ui_ class, or None when the file has to be parsed at runtime
+_classes = {}
+# True once the icons have been registered with Qt
+_resources_loaded = False
+
+
+def load_ui(ui_file, screen):
+    # Build the widgets of a file in UI/ onto screen, the same way PyQt5.uic.loadUi(path, screen) does
+    # The compiled class skips parsing the XML and looking up every widget class by name
+    load_resources()
+    ui_class = compiled_class(ui_file) if USE_COMPILED else None
+    if ui_class is None:
+        from PyQt5.uic import loadUi  # Only imported when a screen is actually parsed at runtime
+        loadUi(os.path.join(UI_DIR, ui_file), screen)
+        return screen
+
+    ui = ui_class()
+    ui.setupUi(screen)
+    # loadUi puts every named widget on the screen itself, do the same so screens work either way
+    for name, value in vars(ui).items():
+        setattr(screen, name, value)
+    return screen
+
+
+def compiled_class(ui_file):
+    # Return the compiled class of a .ui file, or None if it was not compiled or changed since
+    if ui_file in _classes:
+        return _classes[ui_file]
+
+    ui_class = None
+    module_name = _module_name(ui_file)
+    compiled_file = os.path.join(COMPILED_DIR, module_name + '.py')
+    if os.path.exists(compiled_file):
+        if os.path.getmtime(compiled_file) >= os.path.getmtime(os.path.join(UI_DIR, ui_file)):
+            module = importlib.import_module(f'{COMPILED_PACKAGE}.{module_name}')
+            ui_class = next(value for name, value in vars(module).items() if name.startswith('Ui_'))
+        else:
+            print(f"{ui_file} changed since it was compiled, loading it from the .ui file. "
+                  f"Run 'python src/UILoader.py build' to compile it again.")
+
+    _classes[ui_file] = ui_class
+    return ui_class
+
+
+def load_resources():
+    # Register the icons with Qt the first time a screen is built
+    # Qt maps the binary file into memory, nothing is parsed or copied into Python objects
+    global _resources_loaded
+    if _resources_loaded:
+        return
+
+    from PyQt5.QtCore import QResource
+    if not QResource.registerResource(RESOURCE_FILE):
+        try:
+            import resources_rc  # A module generated by pyrcc5 works too, it is only slower to import
+        except ImportError:
+            print(f"Resource file not found at: {RESOURCE_FILE}. The screens will be shown without icons.")
+    _resources_loaded = True
+
+
+def build(ui_dir=UI_DIR, compiled_dir=COMPILED_DIR):
+    # Compile every .ui file into a Python module in the CompiledUI package
+    import io
+    import re
+    from PyQt5.uic import compileUi
+    from AtomicFile import atomic_write
+
+    os.makedirs(compiled_dir, exist_ok=True)
+    init_file = os.path.join(compiled_dir, '__init__.py')
+    if not os.path.exists(init_file):
+        atomic_write(init_file, lambda file: file.write("# Generated by 'python src/UILoader.py build', do not edit\n"))
+
+    for ui_file in sorted(os.listdir(ui_dir)):
+        if not ui_file.endswith('.ui'):
+            continue
+        code = io.StringIO()
+        with open(os.path.join(ui_dir, ui_file), mode='r') as source:
+            compileUi(source, code)
+        # Drop the import of the Designer resource module, load_ui() registers the icons before building a screen
+        compiled = re.sub(r'^import \w+_rc\n', '', code.getvalue(), flags=re.M)
+        atomic_write(os.path.join(compiled_dir, _module_name(ui_file) + '.py'), lambda file: file.write(compiled))
+        print(f"Compiled {ui_file}.")
+
+    _classes.clear()
+
+
+def build_resources(rc_module_file, resource_file=RESOURCE_FILE):
+    # Convert a resource module generated by pyrcc5 (e.g. pyrcc5 pharm.qrc -o resources_rc.py)
+    # into the binary resource file the application loads
+    import importlib.util
+    import struct
+
+    spec = importlib.util.spec_from_file_location('_compiled_resources', rc_module_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # Header: magic, format version, then the offsets of the tree, data and names sections
+    header_size = 20
+    data_offset = header_size
+    names_offset = data_offset + len(module.qt_resource_data)
+    tree_offset = names_offset + len(module.qt_resource_name)
+    temp_file = resource_file + '.tmp'
+    with open(temp_file, mode='wb') as file:
+        file.write(b'qres' + struct.pack('>iiii', 2, tree_offset, data_offset, names_offset))
+        file.write(module.qt_resource_data)
+        file.write(module.qt_resource_name)
+        file.write(module.qt_resource_struct_v2)
+    os.replace(temp_file, resource_file)
+    print(f"Wrote {resource_file}.")
+
+
+def _module_name(ui_file):
+    # Name of the compiled module of a .ui file, e.g. Dashboard.ui -> ui_Dashboard
+    return 'ui_' + os.path.splitext(ui_file)[0]
+
+
+if __name__ == "__main__":
+    # Usage: python src/UILoader.py build
+    #        python src/UILoader.py resources <module generated by pyrcc5>
+    if sys.argv[1:] == ['build']:
+        build()
+    elif len(sys.argv) == 3 and sys.argv[1] == 'resources':
+        build_resources(sys.argv[2])
+    else:
+        print("Usage: python src/UILoader.py build | resources <resources_rc.py>")
+        sys.exit(1)
@@ -0,0 +1,242 @@
+# Import necessary libraries for system operations
+import atexit
+import os
+import threading
+from collections import Counter
+from Storage import TABLES, open_table
+import PasswordHasher
+
+
+class UserDirectory:
+    # In-memory copy of the user accounts with a lookup by username
+    # It is shared by every LoginRoles instance in the process and only re-reads the accounts table
+    # when it changes on disk, so the role checks made every time a screen is built are dictionary reads.
+    #
+    # Failed login attempts are counted in memory and added to the stored counter in one write, either when
+    # they lock the account or FLUSH_INTERVAL seconds after the first of them, by a timer (and when the program
+    # exits), so a burst of wrong passwords does not rewrite the accounts file on every attempt.
+    #
+    # Hashed passwords are counted by their fingerprint, so checking if a password is used is one lookup.
+
+    # Column order of the user accounts database
+    FIELDNAMES = TABLES['user_accounts']['fields']
+
+    # Failed attempts that lock an account
+    LOCKOUT_LIMIT = 5
+
+    # Longest time in seconds a failed attempt waits in memory before it is written
+    FLUSH_INTERVAL = 5.0
+
+    # One directory per accounts file, shared by every LoginRoles instance in the process
+    _directories = {}
+
+    @classmethod
+    def for_file(cls, roles_file):
+        # Return the shared directory for the given file, creating it the first time it is requested
+        key = os.path.normcase(os.path.abspath(roles_file))
+        directory = cls._directories.get(key)
+        if directory is None:
+            directory = cls(key)
+            cls._directories[key] = directory
+            atexit.register(directory.flush)  # Don't lose failed attempts still waiting to be written
+        return directory
+
+
+    def __init__(self, roles_file):
+        self.roles_file = roles_file
+        self.table = open_table('user_accounts', roles_file)
+
+        # Reader/writer lock on the accounts table
+        self.lock = self.table.lock
+
+        self.users = {}  # Username -> account row
+        # Password key -> number of accounts using it, see _password_key()
+        self.passwords = Counter()
+
+        # Salt of the password fingerprints, read from the file next to the accounts the first time it is needed,
+        # and the secret key they are keyed with, which is kept elsewhere (see PasswordHasher.load_key)
+        self.salt_file = roles_file + '.salt'
+        self._salt = None
+        self._key = None
+
+        # Failed login attempts not written yet: username -> attempts, and the timer that will write them
+        self._failures = Counter()
+        self._flush_timer = None
+
+        # Signature of the table the accounts were loaded from, None until the first load
+        self._signature = None
+
+
+    def refresh(self):
+        # Reload the accounts if the table was written by someone else since the last load
+        with self.lock.shared():
+            signature = self.table.signature()
+            if signature != self._signature:
+                self._load()
+                self._signature = signature
+
+
+    def _load(self):
+        self.users = {}
+        for row in self.table.read_all():
+            row = {field: row.get(field) or '' for field in self.FIELDNAMES}
+            self.users.setdefault(row['Username'], row)  # Like a scan, the first account with a username wins
+        self.passwords = Counter(_password_key(row) for row in self.users.values())
+
+
+    def get(self, username):
+        # Return a copy of the account with the given username, or None
+        # The locked counter includes the failed attempts that are not written yet
+        self.refresh()
+        row = self.users.get(username)
+        if row is None:
+            return None
+        row = dict(row)
+        if self._failures[username]:
+            row['Locked_counter'] = str(_counter(row) + self._failures[username])
+        return row
+
+
+    def password_in_use(self, password, fingerprint=None):
+        # Check if any account uses the given password, one lookup whatever the number of accounts
+        # Pass the fingerprint of the password if it was already computed
+        self.refresh()
+        if self.passwords[('plain', password)]:
+            return True
+        return self.passwords[('fingerprint', fingerprint or self.fingerprint(password))] > 0
+
+
+    def fingerprint(self, password):
+        # Fingerprint of a password, equal passwords have equal fingerprints in this accounts database
+        if self._salt is None:
+            self._salt = PasswordHasher.load_salt(self.salt_file)
+            self._key = PasswordHasher.load_key()
+        return PasswordHasher.fingerprint(password, self._salt, self._key)
+
+
+    def add(self, row):
+        # Add a new account and write it
+        row = {field: row.get(field) or '' for field in self.FIELDNAMES}
+        with self.lock.exclusive():
+            self.refresh()
+            self.table.append(row)
+            self.users.setdefault(row['Username'], row)
+            self.passwords[_password_key(row)] += 1
+            self._written()
+        return row
+
+
+    def update(self, username, changes):
+        # Apply the changes to an account, returns how many rows changed
+        # Nothing is written when the account already has the given values
+        changes = {column: str(value) for column, value in changes.items() if column in self.FIELDNAMES}
+        with self.lock.exclusive():
+            if 'Locked_counter' in changes:
+                self._forget_failures(username)  # The new counter replaces the attempts waiting to be written
+            self.refresh()
+            row = self.users.get(username)
+            if row is not None and all(row[column] == value for column, value in changes.items()):
+                return 1
+            count = self.table.update({'Username': username}, changes)
+            if count and row is not None:
+                self.passwords[_password_key(row)] -= 1
+                row.update(changes)
+                self.passwords[_password_key(row)] += 1
+            self._written()
+        return count
+
+
+    def remove(self, username):
+        # Delete the account(s) with the given username, returns how many rows were deleted
+        with self.lock.exclusive():
+            self._forget_failures(username)
+            self.refresh()
+            count = self.table.delete({'Username': username})
+            row = self.users.pop(username, None)
+            if row is not None:
+                self.passwords[_password_key(row)] -= 1
+            self._written()
+        return count
+
+
+    def record_failure(self, username):
+        # Count a failed login attempt, returns True if the account is locked now
+        # The lock keeps the timer's flush from running while the attempt is counted
+        with self.lock.exclusive():
+            self.refresh()
+            row = self.users.get(username)
+            if row is None:
+                return False
+
+            self._failures[username] += 1
+
+            # Locking the account is written right away so every terminal refuses the next attempt
+            if _counter(row) + self._failures[username] >= self.LOCKOUT_LIMIT:
+                self.flush()
+            elif self._flush_timer is None:
+                # Write the attempts FLUSH_INTERVAL seconds from now, even if no other attempt is made
+                self._flush_timer = threading.Timer(self.FLUSH_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+            return self.users.get(username, row)['Locked_status'] == 'locked'
+
+
+    def flush(self):
+        # Add the failed attempts waiting in memory to the stored counters, in one write
+        if not self._failures:
+            return
+
+        with self.lock.exclusive():
+            self._cancel_timer()
+            if not self._failures:
+                return  # Written by another thread while this one waited for the lock
+            self.refresh()  # Start from the counters on disk, other terminals may have added attempts
+            changes_by_username = {}
+            for username, attempts in self._failures.items():
+                row = self.users.get(username)
+                if row is None:
+                    continue
+                counter = _counter(row) + attempts
+                status = 'locked' if counter >= self.LOCKOUT_LIMIT else row['Locked_status']
+                changes_by_username[username] = {'Locked_counter': str(counter), 'Locked_status': status}
+
+            self._failures = Counter()
+            if changes_by_username:
+                self.table.update_many('Username', changes_by_username)
+                for username, changes in changes_by_username.items():
+                    self.users[username].update(changes)
+                self._written()
+
+
+    def _forget_failures(self, username):
+        self._failures.pop(username, None)
+        if not self._failures:
+            self._cancel_timer()
+
+
+    def _cancel_timer(self):
+        # Stop the timer that would write the failed attempts, they were written or forgotten
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+
+    def _written(self):
+        # Remember the signature of our own write so it does not trigger a reload
+        self._signature = self.table.signature()
+
+
+def _password_key(row):
+    # Key of an account's password in UserDirectory.passwords
+    # Hashed passwords are salted differently for every account, they are compared through their fingerprint
+    if PasswordHasher.is_hashed(row['Password']):
+        return ('fingerprint', row['Password_Fingerprint'])
+    return ('plain', row['Password'])
+
+
+def _counter(row):
+    # The locked counter of an account row, a damaged value counts as no failed attempts
+    try:
+        return int(row['Locked_counter'])
+    except ValueError:
+        return 0